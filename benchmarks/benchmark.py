@@ -0,0 +1,545 @@
+"""
+benchmarks.benchmark
+
+This script times the estimation and report hot paths on synthetic projects
+and catalogs, and saves the timings as JSON so runs of different versions
+can be compared. The Dash callbacks are timed through the Flask test client,
+request to response.
+
+    python benchmarks/benchmark.py run -o before.json
+    python benchmarks/benchmark.py run -o after.json --sizes 1 100 10000
+    python benchmarks/benchmark.py compare before.json after.json
+
+compare exits with status 1 if any case got slower than the threshold.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from budgewiser.app import init_app  # noqa: E402
+from budgewiser.catalog import MaterialCatalog, get_catalog  # noqa: E402
+from budgewiser.config.main import PROJECT_SLUG, STORE_ID  # noqa: E402
+from budgewiser.core.definitions import Factors  # noqa: E402
+from budgewiser.core.result_cache import get_result_cache  # noqa: E402
+from budgewiser.metrics import callback_name  # noqa: E402
+from budgewiser.project import estimation, report  # noqa: E402
+
+# Number of equipment items of the synthetic projects
+PROJECT_SIZES = (1, 100, 10_000, 100_000)
+# Number of rows of the synthetic catalogs
+CATALOG_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_REPEAT = 5
+# Relative slowdown of the median time that compare reports as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def project_slice(data: dict, keys: Sequence[str], presence_only: bool = False):
+    """Returns the given keys of the project data, see assets/budgewiser.js."""
+    return {key: True if presence_only else data[key] for key in keys if key in data}
+
+
+def save_slot(data: dict, item_id: Optional[str] = None) -> dict:
+    """Returns the slot of a saved item, see saveSlot in assets/budgewiser.js."""
+    equipment_list = data.get("equipment_list", [])
+    if not item_id:
+        item_ids = {item.get("id") for item in equipment_list}
+        number = len(equipment_list) + 1
+        while f"EQ-{number:03d}" in item_ids:
+            number += 1
+        item_id = f"EQ-{number:03d}"
+    position = next(
+        (i for i, item in enumerate(equipment_list) if item.get("id") == item_id),
+        None,
+    )
+    dropped = ("estimation_output", "monte_carlo_output", "report")
+    return {
+        **project_slice(data, dropped, presence_only=True),
+        "n_clicks": 1,
+        "id": item_id,
+        "position": position,
+        "item": equipment_list[position] if position is not None else None,
+        "has_list": "equipment_list" in data,
+        "has_output": item_id in data.get("equipment_output", {}),
+    }
+
+
+def run_slice(data: dict, catalog_version: str) -> dict:
+    """Returns what Run costs, see runSlice in assets/budgewiser.js."""
+    keys = (
+        "estimation_input",
+        "cost_basis",
+        "costing_basis",
+        "equipment_list",
+        "equipment_output",
+    )
+    slice_ = project_slice(data, keys)
+    basis = data.get("costing_basis")
+    if (
+        basis
+        and basis.get("catalog_version") == catalog_version
+        and basis.get("cost_basis") == data.get("cost_basis")
+    ):
+        outputs = data.get("equipment_output", {})
+        equipment_list = data.get("equipment_list", [])
+        listed = {item.get("id") for item in equipment_list}
+        slice_["equipment_list"] = [
+            item for item in equipment_list if item.get("id") not in outputs
+        ]
+        if "equipment_output" in slice_:
+            slice_["equipment_output"] = {
+                item_id: output
+                for item_id, output in outputs.items()
+                if item_id not in listed
+            }
+    return slice_
+
+
+def output_slice(data: dict) -> dict:
+    """Returns what display_output reads, see outputSlice in assets/budgewiser.js."""
+    slice_ = project_slice(data, ("estimation_output",))
+    if "estimation_output" in slice_:
+        slice_["summary"] = estimation.project_summary(data)
+    return slice_
+
+
+# Browser side store slices of the callbacks timed, by their ID attribute. The
+# last item of the project is saved
+SLICES = {
+    "input_slice": lambda data: project_slice(data, ("estimation_input",)),
+    "output_slice": output_slice,
+    "save_slot": lambda data: save_slot(data, data["equipment_list"][-1]["id"]),
+    "run_slice": lambda data: run_slice(data, get_catalog().version),
+    "costing_slice": lambda data: project_slice(
+        data,
+        (
+            "estimation_input",
+            "cost_basis",
+            "monte_carlo_input",
+            "equipment_list",
+            "equipment_output",
+        ),
+    ),
+}
+
+
+def synthetic_catalog(rows: int) -> MaterialCatalog:
+    """
+    Returns a catalog of the given number of rows, repeating the rows of the
+    material factor table with numbered equipment types so all keys are unique.
+    """
+    base = get_catalog().data
+    copies = []
+    for copy in range(math.ceil(rows / len(base))):
+        frame = base.copy()
+        if copy:
+            frame[Factors.EQUIPMENT_TYPE] = frame[Factors.EQUIPMENT_TYPE] + f" {copy}"
+        copies.append(frame)
+    data = pd.concat(copies, ignore_index=True).iloc[:rows]
+    return MaterialCatalog.from_frame(data)
+
+
+def _sizing_value(row) -> float:
+    s_lower, s_upper = row[Factors.S_LOWER], row[Factors.S_UPPER]
+    if math.isnan(s_lower) or math.isnan(s_upper):
+        return 10.0
+    return (s_lower + s_upper) / 2
+
+
+def synthetic_items(items: int) -> List[dict]:
+    """Returns equipment items cycling through the rows of the catalog."""
+    rows = get_catalog().data.to_dict("records")
+    return [
+        {
+            "id": f"EQ-{i + 1:06d}",
+            "method": row[Factors.METHOD],
+            "plant_type": row[Factors.PLANT_TYPE],
+            "equipment": row[Factors.EQUIPMENT],
+            "equipment_type": row[Factors.EQUIPMENT_TYPE],
+            "sizing_value": _sizing_value(row),
+        }
+        for i, row in zip(range(items), rows * math.ceil(items / len(rows)))
+    ]
+
+
+def synthetic_project(items: int, costed: bool = True) -> dict:
+    """
+    Returns the data of a project with the given number of equipment items,
+    the last one being the estimation input, costed unless costed is False.
+    """
+    equipment_list = synthetic_items(items)
+    estimation_input = {
+        key: value for key, value in equipment_list[-1].items() if key != "id"
+    }
+    data = {
+        "meta_input": {"project_name": f"Benchmark {items}"},
+        "cost_basis": {},
+        "estimation_input": estimation_input,
+        "equipment_list": equipment_list,
+    }
+    if costed:
+        estimation.run_calculation(data)
+        estimation.recalculate(data)
+    return data
+
+
+def measure(
+    function: Callable,
+    repeat: int,
+    setup: Optional[Callable[[], tuple]] = None,
+) -> Dict[str, object]:
+    """
+    Times repeated calls of function(*setup()). The setup is not timed.
+
+    Returns:
+        dict: The times in seconds and their min, median and mean.
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+    }
+
+
+def _cold(*args):
+    """Setup of a case that runs with an empty result cache."""
+
+    def setup():
+        get_result_cache().clear()
+        return args
+
+    return setup
+
+
+def bench_filter_material_data(catalog_sizes, repeat) -> Iterator[dict]:
+    for rows in catalog_sizes:
+        catalog = synthetic_catalog(rows)
+        last = catalog.data.iloc[-1]
+        full_key = (
+            last[Factors.METHOD],
+            last[Factors.PLANT_TYPE],
+            last[Factors.EQUIPMENT],
+            last[Factors.EQUIPMENT_TYPE],
+        )
+        for source, data in (("catalog", catalog), ("frame", catalog.data)):
+            for query, key in (("method", full_key[:1]), ("full_key", full_key)):
+                yield {
+                    "name": "estimation.filter_material_data",
+                    "params": {"catalog_rows": rows, "source": source, "query": query},
+                    **measure(
+                        lambda: estimation.filter_material_data(data, *key), repeat
+                    ),
+                }
+
+
+def bench_run_calculation(catalog_sizes, repeat) -> Iterator[dict]:
+    data = synthetic_project(1, costed=False)
+    for rows in catalog_sizes:
+        catalog = synthetic_catalog(rows)
+        for cache in ("cold", "warm"):
+            setup = _cold() if cache == "cold" else None
+            yield {
+                "name": "estimation.run_calculation",
+                "params": {"catalog_rows": rows, "cache": cache},
+                **measure(
+                    lambda: estimation.run_calculation(data, catalog), repeat, setup
+                ),
+            }
+
+
+def bench_recalculate(project_sizes, repeat) -> Iterator[dict]:
+    for items in project_sizes:
+        data = synthetic_project(items, costed=False)
+        for cache in ("cold", "warm"):
+            setup = _cold() if cache == "cold" else None
+            yield {
+                "name": "estimation.recalculate",
+                "params": {"items": items, "cache": cache, "incremental": False},
+                **measure(
+                    lambda: estimation.recalculate(data, incremental=False),
+                    repeat,
+                    setup,
+                ),
+            }
+
+
+def bench_all_inputs_ready(project_sizes, repeat) -> Iterator[dict]:
+    for items in project_sizes:
+        data = synthetic_project(items, costed=False)
+        yield {
+            "name": "estimation.all_inputs_ready",
+            "params": {"items": items},
+            **measure(lambda: estimation.all_inputs_ready(data), repeat),
+        }
+
+
+def bench_generate_report(project_sizes, repeat) -> Iterator[dict]:
+    for items in project_sizes:
+        data = synthetic_project(items)
+        yield {
+            "name": "report.generate_report",
+            "params": {"items": items},
+            **measure(lambda: report.generate_report(data), repeat),
+        }
+
+
+def _dependency(dash_app, dependencies: List[dict], name: str) -> dict:
+    for dependency in dependencies:
+        if callback_name(dash_app, dependency["output"]) == name:
+            return dependency
+    raise KeyError(f"No callback {name}.")
+
+
+def _outputs(output: str) -> List[dict]:
+    outputs = []
+    for spec in output.strip(".").split("..."):
+        component_id, prop = spec.rsplit(".", 1)
+        outputs.append({"id": component_id, "property": prop.split("@")[0]})
+    return outputs
+
+
+def callback_body(dependency: dict, values: Dict[tuple, object]) -> dict:
+    """
+    Returns the request body of a callback, as the Dash renderer posts it,
+    with the first input as the trigger.
+
+    Args:
+        dependency (dict): The callback from _dash-dependencies.
+        values (dict): Values by (component ID, property), None if missing.
+    """
+    outputs = _outputs(dependency["output"])
+
+    def props(specs):
+        return [
+            {**spec, "value": values.get((spec["id"], spec["property"]))}
+            for spec in specs
+        ]
+
+    trigger = dependency["inputs"][0]
+    return {
+        "output": dependency["output"],
+        "outputs": outputs if len(outputs) > 1 else outputs[0],
+        "inputs": props(dependency["inputs"]),
+        "changedPropIds": [f"{trigger['id']}.{trigger['property']}"],
+        "state": props(dependency["state"]),
+    }
+
+
+def bench_callbacks(project_sizes, repeat) -> Iterator[dict]:
+    dash_app = init_app(server=True, project_slug=PROJECT_SLUG, app_title="Benchmark")
+    client = dash_app.server.test_client()
+    prefix = f"/{PROJECT_SLUG}/"
+    client.get(prefix)
+    dependencies = client.get(f"{prefix}_dash-dependencies").get_json()
+    ids = sys.modules["pages.bw-estimation"].ids
+
+    for items in project_sizes:
+        data = synthetic_project(items)
+        item = data["estimation_input"]
+        values = {
+            (STORE_ID, "data"): data,
+            (ids.run_btn, "n_clicks"): 1,
+            (ids.method_dropdown, "value"): item["method"],
+            (ids.plant_dropdown, "value"): item["plant_type"],
+            (ids.equipment_dropdown, "value"): item["equipment"],
+            (ids.equipment_type_dropdown, "value"): item["equipment_type"],
+            (ids.sizing_quantity_input, "value"): item["sizing_value"],
+        }
+        for slice_name, project_slice_of in SLICES.items():
+            values[(getattr(ids, slice_name), "data")] = project_slice_of(data)
+
+        for name in (
+            "bw-estimation.save_data",
+            "bw-estimation.display_input",
+            "bw-estimation.display_run_btn",
+            "bw-estimation.run_calculation",
+            "bw-estimation.display_output",
+        ):
+            body = json.dumps(
+                callback_body(_dependency(dash_app, dependencies, name), values)
+            )
+
+            def post():
+                response = client.post(
+                    f"{prefix}_dash-update-component",
+                    data=body,
+                    content_type="application/json",
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"{name} returned {response.status_code}.")
+
+            yield {
+                "name": f"callback.{name}",
+                "params": {"items": items},
+                "request_bytes": len(body),
+                **measure(post, repeat),
+            }
+
+
+# Benchmark name -> (function, takes catalog sizes rather than project sizes)
+BENCHMARKS = {
+    "filter_material_data": (bench_filter_material_data, True),
+    "run_calculation": (bench_run_calculation, True),
+    "recalculate": (bench_recalculate, False),
+    "all_inputs_ready": (bench_all_inputs_ready, False),
+    "generate_report": (bench_generate_report, False),
+    "callbacks": (bench_callbacks, False),
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> int:
+    """Runs the benchmarks and writes the results."""
+    results = []
+    for name in args.only or BENCHMARKS:
+        function, by_catalog = BENCHMARKS[name]
+        sizes = args.catalog_sizes if by_catalog else args.sizes
+        for result in function(sizes, args.repeat):
+            print(
+                f"{result['name']} {json.dumps(result['params'])} "
+                f"median {result['median'] * 1000:.3f} ms",
+                file=sys.stderr,
+            )
+            results.append(result)
+
+    output = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "catalog_version": get_catalog().version,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2))
+    return 0
+
+
+def _case(result: dict) -> str:
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare_results(
+    before: Sequence[dict], after: Sequence[dict], threshold: float
+) -> List[dict]:
+    """
+    Pairs the cases of two runs and returns the ratio of their median times,
+    after / before. Cases that are only in one run are left out.
+    """
+    medians = {_case(result): result["median"] for result in before}
+    rows = []
+    for result in after:
+        case = _case(result)
+        if case not in medians:
+            continue
+        ratio = result["median"] / medians[case] if medians[case] else math.inf
+        rows.append(
+            {
+                "case": case,
+                "before": medians[case],
+                "after": result["median"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def compare(args) -> int:
+    """Compares two result files. Returns 1 if any case regressed."""
+    before = json.loads(Path(args.before).read_text())["results"]
+    after = json.loads(Path(args.after).read_text())["results"]
+    rows = compare_results(before, after, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['ratio']:7.2f}x {row['before'] * 1000:10.3f} ms "
+            f"-> {row['after'] * 1000:10.3f} ms  {row['case']} {flag}".rstrip()
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmark", description="BudgeWiser hot path benchmarks."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("run", help="Run the benchmarks.")
+    command.add_argument(
+        "-o", "--output", default="benchmark.json", help="JSON results file."
+    )
+    command.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=PROJECT_SIZES,
+        help="Numbers of equipment items of the synthetic projects.",
+    )
+    command.add_argument(
+        "--catalog-sizes",
+        type=int,
+        nargs="+",
+        default=CATALOG_SIZES,
+        help="Numbers of rows of the synthetic catalogs.",
+    )
+    command.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    command.add_argument(
+        "--only", nargs="+", choices=BENCHMARKS, help="Benchmarks to run."
+    )
+    command.set_defaults(handler=run)
+
+    command = commands.add_parser("compare", help="Compare two result files.")
+    command.add_argument("before")
+    command.add_argument("after")
+    command.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown of the median reported as a regression.",
+    )
+    command.set_defaults(handler=compare)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
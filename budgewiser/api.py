@@ -0,0 +1,214 @@
+"""
+budgewiser.api
+
+This module contains the JSON estimation API, a Flask blueprint registered on
+the server of the Dash app under /<project_slug>/api. Requests are costed
+against the process-wide catalog; batches in one vectorized pass.
+
+    POST /budgewiser/api/estimate
+        {"method": ..., "plant_type": ..., "equipment": ...,
+         "equipment_type": ..., "sizing_value": ..., "sizing_units": ...}
+
+    POST /budgewiser/api/estimate/batch
+        {"items": [{...}, ...], "target_year": 2023}
+
+    GET /budgewiser/api/cache
+        Hit/miss counters of the result cache.
+
+    GET /budgewiser/api/search?q=agit+prop&limit=10&source=materials
+        Ranked typeahead matches over both cost databases.
+
+    GET /budgewiser/api/ranges?value=500&units=kW&quantity=driver+power
+        Catalog rows whose sizing range covers a size.
+
+    POST /budgewiser/api/ranges/batch
+        {"items": [{"sizing_value": ..., "sizing_units": ...,
+                    "sizing_quantity": ...}, ...], "source": "materials"}
+"""
+
+from flask import Blueprint, jsonify, request
+from pydantic import ValidationError
+
+from budgewiser.catalog import (
+    SOURCE_CAPITAL,
+    SOURCE_MATERIALS,
+    get_catalog,
+    range_index,
+    search_index,
+)
+from budgewiser.core import escalation
+from budgewiser.core.batch import INPUT_FIELDS, estimate_items
+from budgewiser.core.result_cache import get_result_cache
+from budgewiser.schemas.estimation import CostBasisInput
+
+MAX_BATCH_ITEMS = 100_000
+MAX_SEARCH_RESULTS = 50
+
+blueprint = Blueprint("budgewiser_api", __name__)
+
+
+class RequestError(Exception):
+    """A client error, answered with its status code and message."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@blueprint.errorhandler(RequestError)
+def handle_request_error(error: RequestError):
+    return jsonify({"error": error.message}), error.status
+
+
+def _body() -> dict:
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise RequestError("The request body must be a JSON object.")
+    return body
+
+
+def _validation_message(error: ValidationError) -> str:
+    messages = []
+    for detail in error.errors():
+        if detail["type"] == "value_error":
+            message = str(detail["ctx"]["error"])
+        else:
+            message = f"{detail['msg']}."
+        field = ".".join(str(part) for part in detail["loc"])
+        messages.append(f"{field}: {message}" if field else message)
+    return " ".join(messages)
+
+
+def _target_index(body: dict) -> float:
+    try:
+        cost_basis = CostBasisInput(
+            target_year=body.get("target_year"), target_index=body.get("target_index")
+        )
+    except ValidationError as e:
+        raise RequestError(_validation_message(e))
+    try:
+        return escalation.target_index(cost_basis.target_year, cost_basis.target_index)
+    except ValueError as e:
+        raise RequestError(str(e))
+
+
+def _item(value) -> dict:
+    if not isinstance(value, dict):
+        raise RequestError("Every item must be a JSON object.")
+    return {field: value[field] for field in INPUT_FIELDS if field in value}
+
+
+def _response(results, target_index: float) -> dict:
+    return {
+        "catalog_version": get_catalog().version,
+        "target_index": target_index,
+        **results,
+    }
+
+
+@blueprint.post("/estimate")
+def estimate():
+    """Costs one equipment item."""
+    body = _body()
+    target_index = _target_index(body)
+    (result,) = estimate_items([_item(body)], target_index)
+    return jsonify(_response({"item": result}, target_index))
+
+
+@blueprint.post("/estimate/batch")
+def estimate_batch():
+    """Costs a list of equipment items in one vectorized pass."""
+    body = _body()
+    items = body.get("items")
+    if not isinstance(items, list):
+        raise RequestError('The request body must have an "items" list.')
+    if len(items) > MAX_BATCH_ITEMS:
+        raise RequestError(f"A batch has at most {MAX_BATCH_ITEMS} items.", 413)
+    target_index = _target_index(body)
+    results = estimate_items([_item(item) for item in items], target_index)
+    return jsonify(
+        _response(
+            {
+                "items": results,
+                "count": len(results),
+                "errors": sum(1 for result in results if result.get("error")),
+            },
+            target_index,
+        )
+    )
+
+
+@blueprint.get("/cache")
+def cache_stats():
+    """Returns the counters of the process-wide result cache."""
+    return jsonify(get_result_cache().stats())
+
+
+def _source(source):
+    source = source or None
+    if source not in (None, SOURCE_MATERIALS, SOURCE_CAPITAL):
+        raise RequestError(
+            f'The source must be "{SOURCE_MATERIALS}" or "{SOURCE_CAPITAL}".'
+        )
+    return source
+
+
+@blueprint.get("/search")
+def search():
+    """Returns the catalog rows best matching the query text q."""
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 10, type=int)
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        raise RequestError(f"The limit must be between 1 and {MAX_SEARCH_RESULTS}.")
+    source = _source(request.args.get("source"))
+    matches = search_index().search(query, limit, source)
+    return jsonify({"query": query, "matches": matches, "count": len(matches)})
+
+
+@blueprint.get("/ranges")
+def ranges():
+    """Returns the catalog rows whose sizing range covers a size."""
+    value = request.args.get("value", type=float)
+    sizing_units = request.args.get("units")
+    if value is None or not sizing_units:
+        raise RequestError("A numeric value and its units are required.")
+    source = _source(request.args.get("source"))
+    matches = range_index().covering(
+        value, sizing_units, request.args.get("quantity"), source
+    )
+    return jsonify({"matches": matches, "count": len(matches)})
+
+
+@blueprint.post("/ranges/batch")
+def ranges_batch():
+    """Returns the covering catalog rows of a list of sizes in one pass."""
+    body = _body()
+    items = body.get("items")
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise RequestError('The request body must have an "items" list of objects.')
+    if len(items) > MAX_BATCH_ITEMS:
+        raise RequestError(f"A batch has at most {MAX_BATCH_ITEMS} items.", 413)
+    source = _source(body.get("source"))
+    try:
+        sizing_values = [float(item.get("sizing_value")) for item in items]
+    except (TypeError, ValueError):
+        raise RequestError("Every item must have a numeric sizing_value.")
+    for field in ("sizing_units", "sizing_quantity"):
+        if not all(isinstance(item.get(field), (str, type(None))) for item in items):
+            raise RequestError(f"The {field} of every item must be text or null.")
+    index = range_index()
+    rows = index.rows_covering(
+        sizing_values,
+        [item.get("sizing_units") or "" for item in items],
+        [item.get("sizing_quantity") for item in items],
+    )
+    results = [index.matches(item_rows, source) for item_rows in rows]
+    return jsonify(
+        {
+            "items": [
+                {"matches": matches, "count": len(matches)} for matches in results
+            ],
+            "count": len(results),
+        }
+    )
@@ -1,9 +1,10 @@
 import dash
 from dash import dcc, html
-import pandas as pd
 
 from agility.components import Sidebar
-from budgewiser.config.main import CONFIG_SIDEBAR, STORE_ID, DATA_STORE
+from budgewiser import api, jobs, metrics
+from budgewiser.catalog import load_catalog, range_index, search_index
+from budgewiser.config.main import CONFIG_SIDEBAR, STORE_ID
 from budgewiser.project import Project
 
 external_scripts = [
@@ -18,6 +19,12 @@ def init_app(
     app_title,
 ):
     route_path_name = f"/{project_slug}/"
+    # Load the material catalog once per process; callbacks read it server side
+    load_catalog()
+    # Build the typeahead search and sizing range indexes up front, not on
+    # the first request
+    search_index()
+    range_index()
     dash_app = dash.Dash(
         __name__,
         suppress_callback_exceptions=True,
@@ -29,16 +36,20 @@ def init_app(
         ],
         external_scripts=external_scripts,  # Tailwind CSS from JS src file
         title=app_title,  # Update title if needed or use a variable
+        # Long running callbacks run as background jobs in worker processes
+        background_callback_manager=jobs.background_callback_manager(),
     )
     #    dash_app.config.suppress_callback_exceptions = True
+    # JSON estimation API next to the Dash routes, e.g. /budgewiser/api/estimate
+    dash_app.server.register_blueprint(api.blueprint, url_prefix=f"/{project_slug}/api")
+    # Time and payload size histograms of the callbacks, e.g. /budgewiser/_metrics
+    metrics.install_callback_metrics(dash_app, f"/{project_slug}/_metrics")
 
     sidebar = Sidebar(CONFIG_SIDEBAR, STORE_ID, Project(), dash_app)
-    material_data = pd.read_csv("budgewiser\\materials_factor.csv", encoding="ISO-8859-1").to_dict()
 
     dash_app.layout = html.Div(
         [
             dcc.Store(id=STORE_ID, storage_type="session", data=None),
-            dcc.Store(id=DATA_STORE, storage_type="session", data=material_data),
             dcc.Location(id="url", refresh=False),
             html.Div(
                 sidebar.layout(),
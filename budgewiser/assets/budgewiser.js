@@ -0,0 +1,246 @@
+/*
+ * Clientside callbacks of the BudgeWiser pages.
+ *
+ * The dropdown cascade of the estimation page is filtered in the browser from
+ * the cascade store, nested objects method -> plant type -> equipment ->
+ * equipment type -> sizing help text, so changing a selection needs no round
+ * trip to the server.
+ *
+ * The slice stores of the pages hold the part of the project store that a
+ * group of server callbacks depends on. They only change, and so only trigger
+ * those callbacks, when that part of the project changes. The slices that
+ * are posted on a click do not grow with the equipment list: saving posts the
+ * saved item and its slot in the list, and Run posts only the items without
+ * an output. Only the Monte Carlo analysis, the report and a Run after the
+ * catalog or the cost basis changed post the whole equipment list, as they
+ * need every item.
+ */
+
+// Cost outputs of an equipment item, see project.estimation.COST_OUTPUT_KEYS
+const COST_OUTPUT_KEYS = ["purchased_cost", "isbl_cost", "total_fixed_capital_cost"];
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    budgewiser: {
+        plantOptions: function (method, cascade) {
+            return cascadeOptions(cascade, [method]);
+        },
+
+        equipmentOptions: function (plant, method, cascade) {
+            return cascadeOptions(cascade, [method, plant]);
+        },
+
+        equipmentTypeOptions: function (method, plant, equipment, data, cascade) {
+            return cascadeOptions(cascade, [method, plant, equipment]);
+        },
+
+        sizingPlaceholder: function (method, plant, equipment, equipmentType, cascade) {
+            if (!(method && plant && equipment && equipmentType)) {
+                return "Enter sizing value11";
+            }
+            const placeholder = cascadeNode(cascade, [method, plant, equipment, equipmentType]);
+            if (typeof placeholder !== "string") {
+                // Stale selection while the cascade above is being changed
+                return window.dash_clientside.no_update;
+            }
+            return placeholder;
+        },
+
+        loadedSlice: function (data, previous) {
+            return changedSlice(data !== null && data !== undefined, previous);
+        },
+
+        inputSlice: function (data, previous) {
+            return changedSlice(projectSlice(data, ["estimation_input"]), previous);
+        },
+
+        // The estimation output and the project summary, not the items
+        outputSlice: function (data, previous) {
+            const slice = projectSlice(data, ["estimation_output"]);
+            if (slice !== null && "estimation_output" in slice) {
+                slice.summary = projectSummary(data);
+            }
+            return changedSlice(slice, previous);
+        },
+
+        costBasisSlice: function (data, previous) {
+            return changedSlice(projectSlice(data, ["cost_basis"]), previous);
+        },
+
+        // Where a click on Save puts the item in the equipment list, and the
+        // outputs save_data drops by presence only
+        saveSlot: function (nClicks, itemId, data) {
+            if (!nClicks || data === null || data === undefined) {
+                return window.dash_clientside.no_update;
+            }
+            const list = data.equipment_list || [];
+            const id = itemId || nextItemId(list);
+            const position = list.findIndex((item) => item.id === id);
+            const dropped = ["estimation_output", "monte_carlo_output", "report"];
+            return Object.assign(projectSlice(data, dropped, true), {
+                n_clicks: nClicks,
+                id: id,
+                position: position < 0 ? null : position,
+                item: position < 0 ? null : list[position],
+                has_list: Array.isArray(data.equipment_list),
+                has_output: Boolean(data.equipment_output && id in data.equipment_output),
+            });
+        },
+
+        // What Run costs: the items without an output and the outputs of items
+        // no longer in the list, or every item if the outputs were costed
+        // against another catalog version or cost basis
+        runSlice: function (data, catalogVersion, previous) {
+            const slice = projectSlice(data, [
+                "estimation_input",
+                "cost_basis",
+                "costing_basis",
+                "equipment_list",
+                "equipment_output",
+            ]);
+            const basis = data && data.costing_basis;
+            const current =
+                basis &&
+                basis.catalog_version === catalogVersion &&
+                canonicalJson(basis.cost_basis) === canonicalJson(data.cost_basis);
+            if (slice !== null && current) {
+                const list = data.equipment_list || [];
+                const outputs = data.equipment_output || {};
+                const listed = new Set(list.map((item) => item.id));
+                slice.equipment_list = list.filter((item) => !(item.id in outputs));
+                if ("equipment_output" in slice) {
+                    slice.equipment_output = {};
+                    for (const id of Object.keys(outputs)) {
+                        if (!listed.has(id)) {
+                            slice.equipment_output[id] = outputs[id];
+                        }
+                    }
+                }
+            }
+            return changedSlice(slice, previous);
+        },
+
+        // What the Monte Carlo analysis costs the project from
+        costingSlice: function (data, previous) {
+            const keys = [
+                "estimation_input",
+                "cost_basis",
+                "monte_carlo_input",
+                "equipment_list",
+                "equipment_output",
+            ];
+            return changedSlice(projectSlice(data, keys), previous);
+        },
+
+        monteCarloSlice: function (data, previous) {
+            return changedSlice(projectSlice(data, ["monte_carlo_output"]), previous);
+        },
+
+        // What the report is built from, see project.report.REPORT_SECTIONS
+        reportSlice: function (data, previous) {
+            const keys = [
+                "meta_input",
+                "estimation_input",
+                "estimation_output",
+                "equipment_list",
+                "equipment_output",
+                "cost_basis",
+            ];
+            return changedSlice(projectSlice(data, keys), previous);
+        },
+
+        progressSlice: function (data, previous) {
+            const keys = ["estimation_input", "estimation_output", "report"];
+            return changedSlice(projectSlice(data, keys, true), previous);
+        },
+    },
+});
+
+// Returns the given keys of the project data, with true as value if only
+// their presence matters, or null if no project is loaded
+function projectSlice(data, keys, presenceOnly) {
+    if (data === null || data === undefined) {
+        return null;
+    }
+    const slice = {};
+    for (const key of keys) {
+        if (Object.prototype.hasOwnProperty.call(data, key)) {
+            slice[key] = presenceOnly ? true : data[key];
+        }
+    }
+    return slice;
+}
+
+// Returns the number of items, the number with errors and the summed costs
+// of the equipment list, as project.estimation.project_summary
+function projectSummary(data) {
+    const outputs = data.equipment_output || {};
+    const summary = { items: 0, errors: 0 };
+    for (const key of COST_OUTPUT_KEYS) {
+        summary[key] = 0;
+    }
+    for (const item of data.equipment_list || []) {
+        const output = outputs[item.id] || {};
+        summary.items += 1;
+        if ("error" in output) {
+            summary.errors += 1;
+        }
+        for (const key of COST_OUTPUT_KEYS) {
+            summary[key] += output[key] || 0;
+        }
+    }
+    return summary;
+}
+
+// Returns the next free "EQ-nnn" item ID, as project.estimation.upsert_item
+function nextItemId(list) {
+    const ids = new Set(list.map((item) => item.id));
+    let number = list.length + 1;
+    while (ids.has(`EQ-${String(number).padStart(3, "0")}`)) {
+        number += 1;
+    }
+    return `EQ-${String(number).padStart(3, "0")}`;
+}
+
+// Returns JSON of a value with sorted object keys, undefined as null
+function canonicalJson(value) {
+    if (value === undefined) {
+        return "null";
+    }
+    return JSON.stringify(value, (key, nested) =>
+        nested && typeof nested === "object" && !Array.isArray(nested)
+            ? Object.fromEntries(Object.entries(nested).sort())
+            : nested
+    );
+}
+
+// Returns the slice, or no_update if it equals the previous one
+function changedSlice(slice, previous) {
+    if (previous !== undefined && JSON.stringify(slice) === JSON.stringify(previous)) {
+        return window.dash_clientside.no_update;
+    }
+    return slice;
+}
+
+// Returns the node of the cascade below the given keys, undefined if unknown
+function cascadeNode(cascade, keys) {
+    let node = cascade;
+    for (const key of keys) {
+        if (!node || !Object.prototype.hasOwnProperty.call(node, key)) {
+            return undefined;
+        }
+        node = node[key];
+    }
+    return node;
+}
+
+// Returns the dropdown options of the cascade level below the given keys
+function cascadeOptions(cascade, keys) {
+    if (!keys.every(Boolean)) {
+        return [];
+    }
+    const node = cascadeNode(cascade, keys);
+    if (!node || typeof node !== "object") {
+        return [];
+    }
+    return Object.keys(node).map((key) => ({ label: key, value: key }));
+}
@@ -0,0 +1,24 @@
+"""
+budgewiser.catalog
+
+This package holds the process-wide equipment cost catalogs.
+"""
+
+from budgewiser.catalog.materials import (
+    MATERIALS_BASE_INDEX,
+    MATERIALS_FACTOR_PATH,
+    MaterialCatalog,
+    get_catalog,
+    load_catalog,
+)
+from budgewiser.catalog.records import CostRecord
+from budgewiser.catalog.capital import (
+    CAPITAL_DATABASE_PATH,
+    CAPITAL_LOCATION_FACTOR,
+    CapitalCatalog,
+    get_capital_catalog,
+)
+from budgewiser.catalog.schema import SOURCE_CAPITAL, SOURCE_MATERIALS
+from budgewiser.catalog.unified import unified_records
+from budgewiser.catalog.search import SearchIndex, search_index
+from budgewiser.catalog.ranges import RangeIndex, range_index
@@ -0,0 +1,242 @@
+"""
+budgewiser.catalog.capital
+
+This module loads the capital equipment cost database
+(Capital_Equipment_Cost_Database.csv), whose rows describe a power law
+C = Min_Cost * (S / Min_Scale)^Scaling_Factor at a given CEPCI, into a
+read-only catalog that is shared by every session of the application. The
+csv is validated and compiled once; later starts memory-map its snapshot.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from budgewiser.catalog.materials import BASE_DIR
+from budgewiser.catalog.records import (
+    build_records,
+    records_frame,
+    records_hash,
+    row_dicts,
+)
+from budgewiser.catalog.schema import validate_table
+from budgewiser.catalog.snapshot import load_records
+from budgewiser.core import units
+from budgewiser.core.definitions import CapitalFactors
+
+# Get path to Capital_Equipment_Cost_Database.csv file
+CAPITAL_DATABASE_PATH = BASE_DIR / "Capital_Equipment_Cost_Database.csv"
+CAPITAL_DATABASE_ENCODING = "ISO-8859-1"
+# Location factor applied to the purchased cost of the power law
+CAPITAL_LOCATION_FACTOR = 1.07
+
+CAPITAL_TEXT_COLUMNS: Tuple[str, ...] = (
+    CapitalFactors.EQUIPMENT,
+    CapitalFactors.FAMILY_TYPE,
+    CapitalFactors.SCALING_QUANTITY,
+    CapitalFactors.UNIT,
+)
+CAPITAL_COST_COLUMNS: Tuple[str, ...] = (
+    CapitalFactors.MIN_SCALE,
+    CapitalFactors.MAX_SCALE,
+    CapitalFactors.MIN_COST,
+    CapitalFactors.MAX_COST,
+    CapitalFactors.SCALING_FACTOR,
+    CapitalFactors.CEPCI,
+)
+NO_MATCH_MESSAGE = "No capital cost data found for the selected equipment."
+
+
+class CapitalCatalog:
+    """
+    Read-only catalog of the capital equipment cost database.
+
+    Rows are indexed by (equipment, family type) once at load time. Rows
+    without a family type are indexed with family type None.
+
+    Attributes:
+        data (pd.DataFrame): The capital equipment cost table.
+        version (str): Hash of the table content, changes when the data does.
+        records (np.ndarray): Read-only structured array, one typed element per
+            row, with fields named after the CapitalFactors columns. Missing
+            text values are empty strings.
+        unit_factors (np.ndarray): Factor from the row units to SI units, NaN
+            where the units cannot be parsed.
+        canonical_units (np.ndarray): SI units of each row, e.g. "kg/s".
+    """
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+        self.version = records_hash(records)
+        self._data: Optional[pd.DataFrame] = None
+        self._rows = row_dicts(records)
+        self.unit_factors, self.canonical_units = units.unit_factors(
+            records[CapitalFactors.UNIT]
+        )
+        self._index: Dict[tuple, Tuple[int, ...]] = {}
+        self._family_types: Dict[str, list] = {}
+        for position, row in enumerate(self._rows):
+            equipment = row[CapitalFactors.EQUIPMENT]
+            family_type = row[CapitalFactors.FAMILY_TYPE] or None
+            key = (equipment, family_type)
+            if key not in self._index:
+                self._family_types.setdefault(equipment, []).append(family_type)
+            self._index[key] = self._index.get(key, ()) + (position,)
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "CapitalCatalog":
+        """
+        Validates and compiles a capital equipment cost table into a catalog.
+
+        Raises:
+            ValueError: If the table is not valid.
+        """
+        validate_capital(data)
+        return cls(build_records(data, CAPITAL_TEXT_COLUMNS, CAPITAL_COST_COLUMNS))
+
+    @classmethod
+    def from_csv(
+        cls, path: Path = CAPITAL_DATABASE_PATH, snapshot: bool = True
+    ) -> "CapitalCatalog":
+        """
+        Loads the catalog from a capital equipment cost database csv file.
+
+        Args:
+            path (Path): Path to the csv file.
+            snapshot (bool): Memory-map the binary snapshot of the csv content,
+                writing it on first use. If False the csv is always parsed.
+
+        Returns:
+            CapitalCatalog: The loaded catalog.
+
+        Raises:
+            ValueError: If the table is not valid.
+        """
+        if snapshot:
+            return cls(load_records(path, _compile_csv))
+        return cls(_compile_csv(path))
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The capital equipment cost table. Callers must not modify it."""
+        if self._data is None:
+            self._data = records_frame(self.records)
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def equipment(self) -> Tuple[str, ...]:
+        """Returns the available equipment."""
+        return tuple(self._family_types)
+
+    def family_types(self, equipment: str) -> Tuple[Optional[str], ...]:
+        """Returns the family types available for an equipment."""
+        return tuple(self._family_types.get(equipment, ()))
+
+    def select(self, equipment: str, family_type: Optional[str] = None) -> int:
+        """
+        Returns the position of the first row of an equipment and family type.
+
+        Raises:
+            KeyError: If no row matches.
+        """
+        positions = self._index.get((equipment, family_type or None))
+        if not positions:
+            raise KeyError(NO_MATCH_MESSAGE)
+        return positions[0]
+
+    def lookup(self, equipment: str, family_type: Optional[str] = None) -> dict:
+        """
+        Returns the first row of an equipment and family type.
+
+        Raises:
+            KeyError: If no row matches.
+        """
+        return self._rows[self.select(equipment, family_type)]
+
+    def row(self, position: int) -> dict:
+        """Returns the row at a position."""
+        return self._rows[position]
+
+    def convert_sizes(
+        self, positions, sizing_values, sizing_units, strict: bool = True
+    ) -> np.ndarray:
+        """
+        Converts sizing values to the units of the database rows in one pass.
+        Values without a unit are in the row units already.
+
+        Raises:
+            ValueError: If strict and a unit cannot be converted.
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        return units.convert_sizes(
+            sizing_values,
+            sizing_units,
+            self.unit_factors[positions],
+            self.canonical_units[positions],
+            strict,
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a read-only view of a field of the records, without copying:
+        a float array for CAPITAL_COST_COLUMNS, a unicode array otherwise.
+        """
+        return self.records[name]
+
+
+def validate_capital(data: pd.DataFrame):
+    """
+    Checks a capital equipment cost table.
+
+    Raises:
+        ValueError: If columns are missing or values are invalid.
+    """
+    validate_table(
+        data,
+        "The capital equipment cost database",
+        key_columns=(CapitalFactors.EQUIPMENT,),
+        float_columns=CAPITAL_COST_COLUMNS,
+        required_columns=CAPITAL_COST_COLUMNS,
+        # Min_Scale is 0 for some rows, whose power law is not usable
+        positive_columns=(CapitalFactors.MIN_COST, CapitalFactors.CEPCI),
+        range_columns=(
+            (CapitalFactors.MIN_SCALE, CapitalFactors.MAX_SCALE),
+            (CapitalFactors.MIN_COST, CapitalFactors.MAX_COST),
+        ),
+    )
+    missing = set(CAPITAL_TEXT_COLUMNS) - set(data.columns)
+    if missing:
+        raise ValueError(
+            f"The capital equipment cost database is missing the columns: {', '.join(sorted(missing))}"
+        )
+
+
+def _compile_csv(path: Path) -> np.ndarray:
+    """Parses, validates and compiles a capital equipment cost database csv file."""
+    data = pd.read_csv(path, encoding=CAPITAL_DATABASE_ENCODING)
+    validate_capital(data)
+    return build_records(data, CAPITAL_TEXT_COLUMNS, CAPITAL_COST_COLUMNS)
+
+
+_capital_catalog: Optional[CapitalCatalog] = None
+_capital_catalog_lock = threading.Lock()
+
+
+def get_capital_catalog() -> CapitalCatalog:
+    """
+    Returns the process-wide capital cost catalog, loading it on first use.
+
+    Returns:
+        CapitalCatalog: The shared catalog.
+    """
+    global _capital_catalog
+    if _capital_catalog is None:
+        with _capital_catalog_lock:
+            if _capital_catalog is None:
+                _capital_catalog = CapitalCatalog.from_csv()
+    return _capital_catalog
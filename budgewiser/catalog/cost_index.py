@@ -0,0 +1,96 @@
+"""
+budgewiser.catalog.cost_index
+
+This module loads the bundled Chemical Engineering Plant Cost Index series
+(cost_index.csv, annual averages) used to escalate costs between years.
+"""
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from budgewiser.catalog.materials import BASE_DIR, content_hash
+
+# Get path to cost_index.csv file
+COST_INDEX_PATH = BASE_DIR / "cost_index.csv"
+YEAR_COLUMN = "Year"
+INDEX_COLUMN = "CEPCI"
+
+
+class CostIndex:
+    """
+    Read-only cost index time series, linearly interpolated between years.
+
+    Attributes:
+        years (np.ndarray): The years of the series, increasing.
+        values (np.ndarray): The index value of each year.
+        version (str): Hash of the series content, changes when the data does.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        data = data.sort_values(YEAR_COLUMN)
+        self.version = content_hash(data)
+        self.years = data[YEAR_COLUMN].to_numpy(dtype=float)
+        self.values = data[INDEX_COLUMN].to_numpy(dtype=float)
+        self.years.flags.writeable = False
+        self.values.flags.writeable = False
+
+    @classmethod
+    def from_csv(cls, path: Path = COST_INDEX_PATH) -> "CostIndex":
+        """
+        Loads the series from a csv file with Year and CEPCI columns.
+
+        Args:
+            path (Path): Path to the csv file.
+
+        Returns:
+            CostIndex: The loaded series.
+        """
+        return cls(pd.read_csv(path))
+
+    @property
+    def first_year(self) -> float:
+        return float(self.years[0])
+
+    @property
+    def last_year(self) -> float:
+        return float(self.years[-1])
+
+    def at(self, year):
+        """
+        Returns the index value of a year or an array of years. Fractional
+        years are interpolated linearly between the annual values.
+
+        Raises:
+            ValueError: If a year lies outside the series.
+        """
+        years = np.asarray(year, dtype=float)
+        if np.any((years < self.years[0]) | (years > self.years[-1])):
+            raise ValueError(
+                f"The cost index covers {self.first_year:g} to {self.last_year:g}, "
+                f"got {year}."
+            )
+        values = np.interp(years, self.years, self.values)
+        return float(values) if values.ndim == 0 else values
+
+
+_cost_index: Optional[CostIndex] = None
+_cost_index_lock = threading.Lock()
+
+
+def get_cost_index() -> CostIndex:
+    """
+    Returns the process-wide cost index series, loading it on first use.
+
+    Returns:
+        CostIndex: The shared series.
+    """
+    global _cost_index
+    if _cost_index is None:
+        with _cost_index_lock:
+            if _cost_index is None:
+                _cost_index = CostIndex.from_csv()
+    return _cost_index
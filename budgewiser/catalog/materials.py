@@ -0,0 +1,407 @@
+"""
+budgewiser.catalog.materials
+
+This module loads the material factor cost correlations (materials_factor.csv)
+into a read-only catalog that is shared by every session of the application.
+The csv is validated and compiled once; later starts memory-map its snapshot.
+"""
+
+import hashlib
+import itertools
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from budgewiser.catalog.records import (
+    RECORD_FLOAT_FIELDS,
+    RECORD_TEXT_FIELDS,
+    CostRecord,
+    build_cost_records,
+    build_records,
+    records_frame,
+    records_hash,
+    row_dicts,
+)
+from budgewiser.catalog.schema import validate_table
+from budgewiser.catalog.snapshot import load_records
+from budgewiser.core import units
+from budgewiser.core.definitions import Factors
+
+# Get the directory of the budgewiser package
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Get path to materials_factor.csv file
+MATERIALS_FACTOR_PATH = BASE_DIR / "materials_factor.csv"
+MATERIALS_FACTOR_ENCODING = "ISO-8859-1"
+# CEPCI basis of the material factor cost correlations
+MATERIALS_BASE_INDEX = 509.7
+
+# Key columns of the method -> plant type -> equipment -> equipment type cascade
+CASCADE_COLUMNS: Tuple[str, ...] = (
+    Factors.METHOD,
+    Factors.PLANT_TYPE,
+    Factors.EQUIPMENT,
+    Factors.EQUIPMENT_TYPE,
+)
+# Numeric columns compiled to float fields for the vectorized cost engine
+COST_COLUMNS: Tuple[str, ...] = tuple(RECORD_FLOAT_FIELDS.values())
+NO_MATCH_MESSAGE = (
+    "Empty Dataframe! Check the input criteria as no matching data was found."
+)
+
+
+class MaterialCatalog:
+    """
+    Read-only catalog of the material factor cost correlations.
+
+    The catalog is loaded once per process and shared by all callbacks, so the
+    table no longer has to travel with every browser session.
+
+    The cascade of key columns is indexed once at load time, so dropdown
+    options and the selected row are dictionary lookups instead of DataFrame
+    scans. Every full or partial (method, plant_type, equipment,
+    equipment_type) key is hashed to its matching row positions.
+
+    Attributes:
+        data (pd.DataFrame): The material factor table.
+        cascade (dict): Nested dict method -> plant type -> equipment ->
+            equipment type -> row position.
+        version (str): Hash of the table content, changes when the data does.
+        records (np.ndarray): Read-only structured array, one typed element per
+            row, with fields named after the Factors columns.
+        unit_factors (np.ndarray): Factor from the row units to SI units, NaN
+            where the units cannot be parsed.
+        canonical_units (np.ndarray): SI units of each row, e.g. "kg/s".
+    """
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+        self.version = records_hash(records)
+        self._data: Optional[pd.DataFrame] = None
+        self._rows = row_dicts(records)
+        self.cascade = _build_cascade(self._rows)
+        self._choices = _build_choices(self.cascade)
+        self._index = _build_key_index(self._rows)
+        self._cost_records = build_cost_records(records)
+        self.unit_factors, self.canonical_units = units.unit_factors(
+            records[Factors.UNITS]
+        )
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "MaterialCatalog":
+        """
+        Validates and compiles a material factor table into a catalog.
+
+        Raises:
+            ValueError: If the table is not valid.
+        """
+        validate_materials(data)
+        return cls(build_records(data))
+
+    @classmethod
+    def from_csv(
+        cls, path: Path = MATERIALS_FACTOR_PATH, snapshot: bool = True
+    ) -> "MaterialCatalog":
+        """
+        Loads the catalog from a materials factor csv file.
+
+        Args:
+            path (Path): Path to the csv file.
+            snapshot (bool): Memory-map the binary snapshot of the csv content,
+                writing it on first use. If False the csv is always parsed.
+
+        Returns:
+            MaterialCatalog: The loaded catalog.
+
+        Raises:
+            ValueError: If the table is not valid.
+        """
+        if snapshot:
+            return cls(load_records(path, _compile_csv))
+        return cls(_compile_csv(path))
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The material factor table. Callers must not modify it."""
+        if self._data is None:
+            self._data = records_frame(self.records)
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def choices(self, *keys: str) -> Tuple[str, ...]:
+        """
+        Returns the options of the next cascade level below the given keys.
+
+        Args:
+            *keys (str): Leading cascade keys, e.g. (method, plant_type).
+
+        Returns:
+            tuple: The option values in catalog order, empty if the keys are unknown.
+        """
+        return self._choices.get(keys, ())
+
+    def methods(self) -> Tuple[str, ...]:
+        """Returns the available methods."""
+        return self.choices()
+
+    def plant_types(self, method: str) -> Tuple[str, ...]:
+        """Returns the plant types available for a method."""
+        return self.choices(method)
+
+    def equipment(self, method: str, plant_type: str) -> Tuple[str, ...]:
+        """Returns the equipment available for a method and plant type."""
+        return self.choices(method, plant_type)
+
+    def equipment_types(
+        self, method: str, plant_type: str, equipment: str
+    ) -> Tuple[str, ...]:
+        """Returns the equipment types available for an equipment."""
+        return self.choices(method, plant_type, equipment)
+
+    def select(
+        self,
+        method: Optional[str] = None,
+        plant_type: Optional[str] = None,
+        equipment: Optional[str] = None,
+        equipment_type: Optional[str] = None,
+    ) -> Tuple[int, ...]:
+        """
+        Returns the positions of the rows matching the given keys.
+        Keys that are None or empty are ignored, as in filter_material_data.
+
+        Args:
+            method (str, optional): The method.
+            plant_type (str, optional): The plant type.
+            equipment (str, optional): The equipment.
+            equipment_type (str, optional): The equipment type.
+
+        Returns:
+            tuple: Row positions in catalog order.
+
+        Raises:
+            KeyError: If no row matches the keys.
+        """
+        key = (
+            method or None,
+            plant_type or None,
+            equipment or None,
+            equipment_type or None,
+        )
+        positions = self._index.get(key)
+        if not positions:
+            raise KeyError(NO_MATCH_MESSAGE)
+        return positions
+
+    def lookup(
+        self,
+        method: Optional[str] = None,
+        plant_type: Optional[str] = None,
+        equipment: Optional[str] = None,
+        equipment_type: Optional[str] = None,
+    ) -> dict:
+        """
+        Returns the first catalog row matching the given keys.
+
+        Args:
+            method (str, optional): The method.
+            plant_type (str, optional): The plant type.
+            equipment (str, optional): The equipment.
+            equipment_type (str, optional): The equipment type.
+
+        Returns:
+            dict: The catalog row keyed by column name.
+
+        Raises:
+            KeyError: If no row matches the keys.
+        """
+        return self._rows[self.select(method, plant_type, equipment, equipment_type)[0]]
+
+    def record(
+        self,
+        method: Optional[str] = None,
+        plant_type: Optional[str] = None,
+        equipment: Optional[str] = None,
+        equipment_type: Optional[str] = None,
+    ) -> CostRecord:
+        """
+        Returns the typed record of the first catalog row matching the given keys.
+
+        Raises:
+            KeyError: If no row matches the keys.
+        """
+        position = self.select(method, plant_type, equipment, equipment_type)[0]
+        return self._cost_records[position]
+
+    def frame(self, positions: Tuple[int, ...]) -> pd.DataFrame:
+        """Returns the rows at the given positions as a DataFrame."""
+        return self.data.iloc[list(positions)]
+
+    def positions(self, keys: Iterable[tuple]) -> np.ndarray:
+        """
+        Resolves (method, plant_type, equipment, equipment_type) keys to row positions.
+
+        Args:
+            keys (iterable): Key tuples, one per equipment item.
+
+        Returns:
+            np.ndarray: The position of the first matching row for each key.
+
+        Raises:
+            KeyError: If any key has no matching row.
+        """
+        return np.fromiter((self.select(*key)[0] for key in keys), dtype=np.intp)
+
+    def convert_sizes(
+        self, positions, sizing_values, sizing_units, strict: bool = True
+    ) -> np.ndarray:
+        """
+        Converts sizing values to the units of the catalog rows in one pass.
+
+        Args:
+            positions (array-like): Catalog row position per value.
+            sizing_values (array-like): Sizing values.
+            sizing_units (str or array-like): Unit of each value, or one unit
+                for all. Values without a unit are in the row units already.
+            strict (bool): Raise on units that cannot be converted; if False
+                such values become NaN.
+
+        Returns:
+            np.ndarray: The sizing values in the row units.
+
+        Raises:
+            ValueError: If strict and a unit cannot be converted.
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        return units.convert_sizes(
+            sizing_values,
+            sizing_units,
+            self.unit_factors[positions],
+            self.canonical_units[positions],
+            strict,
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a read-only view of a field of the records, without copying.
+
+        Args:
+            name (str): A column name from COST_COLUMNS or a text column such
+                as Factors.METHOD.
+
+        Returns:
+            np.ndarray: Float array for cost columns, unicode array otherwise.
+        """
+        return self.records[name]
+
+
+def validate_materials(data: pd.DataFrame):
+    """
+    Checks a material factor table.
+
+    Raises:
+        ValueError: If columns are missing or values are invalid.
+    """
+    validate_table(
+        data,
+        "The material factor table",
+        key_columns=CASCADE_COLUMNS,
+        float_columns=COST_COLUMNS,
+        required_columns=(Factors.A, Factors.B, Factors.N, Factors.LOCATION_FACTOR),
+        range_columns=((Factors.S_LOWER, Factors.S_UPPER),),
+    )
+    missing = set(RECORD_TEXT_FIELDS.values()) - set(data.columns)
+    if missing:
+        raise ValueError(
+            f"The material factor table is missing the columns: {', '.join(sorted(missing))}"
+        )
+
+
+def _compile_csv(path: Path) -> np.ndarray:
+    """Parses, validates and compiles a materials factor csv file."""
+    data = pd.read_csv(path, encoding=MATERIALS_FACTOR_ENCODING)
+    validate_materials(data)
+    return build_records(data)
+
+
+def _build_cascade(rows) -> dict:
+    """Builds the nested cascade index, keeping the first row of duplicate keys."""
+    cascade: dict = {}
+    for position, row in enumerate(rows):
+        node = cascade
+        for column in CASCADE_COLUMNS[:-1]:
+            node = node.setdefault(row[column], {})
+        node.setdefault(row[CASCADE_COLUMNS[-1]], position)
+    return cascade
+
+
+def content_hash(data: pd.DataFrame) -> str:
+    """Returns a short hash of the content of a DataFrame."""
+    hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
+
+
+def _build_key_index(rows) -> Dict[tuple, Tuple[int, ...]]:
+    """
+    Hashes every full and partial key of each row to the matching row positions.
+    Missing keys are stored as None, so all 16 key combinations are covered.
+    """
+    index: Dict[tuple, list] = {}
+    masks = list(itertools.product((True, False), repeat=len(CASCADE_COLUMNS)))
+    for position, row in enumerate(rows):
+        values = tuple(row[column] for column in CASCADE_COLUMNS)
+        for mask in masks:
+            key = tuple(value if keep else None for value, keep in zip(values, mask))
+            index.setdefault(key, []).append(position)
+    return {key: tuple(positions) for key, positions in index.items()}
+
+
+def _build_choices(cascade: dict) -> Dict[Tuple[str, ...], Tuple[str, ...]]:
+    """Flattens the cascade into option tuples keyed by their leading keys."""
+    choices = {}
+    stack = [((), cascade)]
+    while stack:
+        keys, node = stack.pop()
+        choices[keys] = tuple(node)
+        if len(keys) < len(CASCADE_COLUMNS) - 1:
+            stack.extend((keys + (key,), child) for key, child in node.items())
+    return choices
+
+
+_catalog: Optional[MaterialCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def load_catalog(path: Path = MATERIALS_FACTOR_PATH) -> MaterialCatalog:
+    """
+    Loads the process-wide catalog, replacing any catalog loaded before.
+
+    Args:
+        path (Path): Path to the materials factor csv file.
+
+    Returns:
+        MaterialCatalog: The loaded catalog.
+    """
+    global _catalog
+    catalog = MaterialCatalog.from_csv(path)
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
+
+
+def get_catalog() -> MaterialCatalog:
+    """
+    Returns the process-wide catalog, loading it on first use.
+
+    Returns:
+        MaterialCatalog: The shared catalog.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = MaterialCatalog.from_csv()
+    return _catalog
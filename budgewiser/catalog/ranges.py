@@ -0,0 +1,238 @@
+"""
+budgewiser.catalog.ranges
+
+This module indexes the valid sizing ranges of both cost databases, S lower
+to S upper of the material factor table and Min_Scale to Max_Scale of the
+capital database, to answer "which equipment covers this size?", e.g. all
+equipment types valid for 500 kW of driver power.
+
+Ranges are converted to SI units and grouped by (sizing quantity, canonical
+unit), and by canonical unit alone for queries of any sizing quantity. Each
+group splits the line at the sorted range endpoints into elementary
+segments, and keeps the rows covering each segment, so a query is a binary
+search for its segment, and a batch of queries is one vectorized search per
+group.
+"""
+
+import functools
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from budgewiser.catalog.capital import CapitalCatalog, get_capital_catalog
+from budgewiser.catalog.materials import MaterialCatalog, get_catalog
+from budgewiser.catalog.unified import row_dict, source_positions, unified_records
+from budgewiser.core import units
+
+# Fields of the common schema returned with each match
+RESULT_FIELDS = (
+    "method",
+    "plant_type",
+    "equipment",
+    "equipment_type",
+    "sizing_quantity",
+    "units",
+    "s_lower",
+    "s_upper",
+)
+
+_SPACES = re.compile(r"\s+")
+
+
+def quantity_key(sizing_quantity: Optional[str]) -> Optional[str]:
+    """Normalizes a sizing quantity text for grouping, e.g. " Driver  power"."""
+    if not sizing_quantity:
+        return None
+    return _SPACES.sub(" ", sizing_quantity).strip().lower() or None
+
+
+class Intervals:
+    """
+    Closed intervals [lower, upper] answering which of them contain a value.
+
+    The sorted distinct endpoints e0 < e1 < ... cut the line into 2m + 1
+    slots: the open gap below e0, the point e0, the gap (e0, e1), the point
+    e1, and so on. The rows covering each slot are stored once, in one
+    array with slot offsets.
+
+    Attributes:
+        endpoints (np.ndarray): The sorted distinct endpoints.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, rows: np.ndarray):
+        self.endpoints = np.unique(np.concatenate([lower, upper]))
+        first = 2 * np.searchsorted(self.endpoints, lower) + 1
+        last = 2 * np.searchsorted(self.endpoints, upper) + 1
+        spans = last - first + 1
+        slots = np.repeat(first - np.cumsum(spans) + spans, spans) + np.arange(
+            spans.sum()
+        )
+        order = np.argsort(slots, kind="stable")
+        self._rows = np.repeat(rows, spans)[order]
+        self._offsets = np.searchsorted(
+            slots[order], np.arange(2 * len(self.endpoints) + 2)
+        )
+
+    def slots(self, values: np.ndarray) -> np.ndarray:
+        """Returns the slot of each value."""
+        values = np.asarray(values, dtype=float)
+        i = np.searchsorted(self.endpoints, values)
+        hit = i < len(self.endpoints)
+        hit[hit] = self.endpoints[i[hit]] == values[hit]
+        return 2 * i + hit
+
+    def covering(self, values) -> List[np.ndarray]:
+        """Returns the rows whose interval contains each value."""
+        return [
+            self._rows[self._offsets[slot] : self._offsets[slot + 1]]
+            for slot in self.slots(values).tolist()
+        ]
+
+
+class RangeIndex:
+    """
+    Index of the valid sizing ranges of the rows of the common catalog schema.
+
+    Rows without a sizing range are not range checked when costed, so they
+    cover every size. Rows whose units cannot be parsed are left out.
+
+    Attributes:
+        records (np.ndarray): The indexed rows, see catalog.unified_records.
+        positions (np.ndarray): Position of each row in its own catalog.
+    """
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+        self.positions = source_positions(records)
+        factors, canonical = units.unit_factors(records["units"])
+        unbounded = np.isnan(records["s_lower"]) | np.isnan(records["s_upper"])
+        lower = np.where(unbounded, -np.inf, records["s_lower"] * factors)
+        upper = np.where(unbounded, np.inf, records["s_upper"] * factors)
+
+        groups: Dict[Tuple[Optional[str], str], List[int]] = {}
+        for row, (quantity, unit) in enumerate(
+            zip(records["sizing_quantity"].tolist(), canonical.tolist())
+        ):
+            if not unit:
+                continue
+            groups.setdefault((None, unit), []).append(row)
+            if quantity_key(quantity):
+                groups.setdefault((quantity_key(quantity), unit), []).append(row)
+        self._groups = {
+            key: Intervals(lower[rows], upper[rows], np.array(rows, dtype=np.intp))
+            for key, rows in groups.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def rows_covering(
+        self,
+        sizing_values: Sequence[float],
+        sizing_units: Sequence[str],
+        sizing_quantities: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[np.ndarray]:
+        """
+        Returns, for each size, the rows whose sizing range covers it. The
+        queries are grouped, and each group is answered in one pass.
+
+        Args:
+            sizing_values (sequence): The sizes.
+            sizing_units (sequence): The units of each size, e.g. "kW".
+            sizing_quantities (sequence, optional): The sizing quantity of each
+                size, e.g. "driver power", None for any sizing quantity.
+
+        Returns:
+            list: An array of row positions of the common schema per size,
+                empty where the units cannot be parsed.
+        """
+        count = len(sizing_values)
+        if sizing_quantities is None:
+            sizing_quantities = [None] * count
+        factors, canonical = units.unit_factors([unit or "" for unit in sizing_units])
+        values = np.asarray(sizing_values, dtype=float) * factors
+
+        queries: Dict[tuple, List[int]] = {}
+        for i, (quantity, unit) in enumerate(
+            zip(sizing_quantities, canonical.tolist())
+        ):
+            queries.setdefault((quantity_key(quantity), unit), []).append(i)
+
+        empty = np.zeros(0, dtype=np.intp)
+        results = [empty] * count
+        for key, indices in queries.items():
+            intervals = self._groups.get(key)
+            if intervals is None:
+                continue
+            for i, rows in zip(indices, intervals.covering(values[indices])):
+                results[i] = rows
+        return results
+
+    def covering(
+        self,
+        sizing_value: float,
+        sizing_units: str,
+        sizing_quantity: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Returns the catalog rows whose sizing range covers a size, e.g.
+        covering(500, "kW", "driver power").
+
+        Args:
+            sizing_value (float): The size.
+            sizing_units (str): Its units, any units of the same dimension as
+                the catalog rows.
+            sizing_quantity (str, optional): Only rows of this sizing quantity.
+            source (str, optional): Only rows of this source, e.g.
+                SOURCE_MATERIALS.
+
+        Returns:
+            list: One dict per row with the source, the position in its
+                catalog and the RESULT_FIELDS, in catalog order.
+        """
+        (rows,) = self.rows_covering([sizing_value], [sizing_units], [sizing_quantity])
+        return self.matches(rows, source)
+
+    def matches(self, rows: Iterable[int], source: Optional[str] = None) -> List[dict]:
+        """Returns rows of the common schema as dicts, optionally of one source."""
+        matches = []
+        for row in sorted(rows):
+            record = self.records[row]
+            if source is not None and record["source"] != source:
+                continue
+            matches.append(
+                {
+                    "source": str(record["source"]),
+                    "position": int(self.positions[row]),
+                    **row_dict(record, RESULT_FIELDS),
+                }
+            )
+        return matches
+
+
+@functools.lru_cache(maxsize=4)
+def _range_index(materials: MaterialCatalog, capital: CapitalCatalog) -> RangeIndex:
+    return RangeIndex(unified_records(materials, capital))
+
+
+def range_index(
+    materials: Optional[MaterialCatalog] = None,
+    capital: Optional[CapitalCatalog] = None,
+) -> RangeIndex:
+    """
+    Returns the sizing range index of both cost databases, built once per
+    pair of catalogs.
+
+    Args:
+        materials (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        capital (CapitalCatalog, optional): Defaults to the process-wide catalog.
+
+    Returns:
+        RangeIndex: The shared index.
+    """
+    return _range_index(
+        materials if materials is not None else get_catalog(),
+        capital if capital is not None else get_capital_catalog(),
+    )
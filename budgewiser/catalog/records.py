@@ -0,0 +1,154 @@
+"""
+budgewiser.catalog.records
+
+This module compiles the cost tables into compact typed records: one NumPy
+structured array for batch costing, and for the material factor table one
+__slots__ record with float fields per equipment type for single-item costing.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from budgewiser.core.definitions import Factors
+
+# Text fields of a record, attribute name -> column name
+RECORD_TEXT_FIELDS: Dict[str, str] = {
+    "method": Factors.METHOD,
+    "plant_type": Factors.PLANT_TYPE,
+    "equipment": Factors.EQUIPMENT,
+    "equipment_type": Factors.EQUIPMENT_TYPE,
+    "sizing_quantity": Factors.SIZING_QUANTITY,
+    "units": Factors.UNITS,
+}
+
+# Float fields of a record, attribute name -> column name
+RECORD_FLOAT_FIELDS: Dict[str, str] = {
+    "s_lower": Factors.S_LOWER,
+    "s_upper": Factors.S_UPPER,
+    "a": Factors.A,
+    "b": Factors.B,
+    "n": Factors.N,
+    "installation_factor": Factors.INSTALLATION_FACTOR,
+    "material_factor": Factors.MATERIAL_FACTOR,
+    "equipment_erection_factor": Factors.EQUIPMENT_ERECTION_FACTOR,
+    "piping_factor": Factors.PIPING_FACTOR,
+    "instrumentation_and_control_factor": Factors.INSTRUMENTATION_AND_CONTROL_FACTOR,
+    "electrical_factor": Factors.ELECTRICAL_FACTOR,
+    "civil_factor": Factors.CIVIL_FACTOR,
+    "structures_and_buildings_factor": Factors.STRUCTURES_AND_BUILDINGS_FACTOR,
+    "lagging_and_paint_factor": Factors.LAGGING_AND_PAINT_FACTOR,
+    "isbl_cost_factor": Factors.ISBL_COST_FACTOR,
+    "offsites_factor": Factors.OFFSITES_FACTOR,
+    "design_and_engineering_factor": Factors.DESIGN_AND_ENGINEERING_FACTOR,
+    "contingency": Factors.CONTINGENCY,
+    "location_factor": Factors.LOCATION_FACTOR,
+}
+
+
+class CostRecord:
+    """
+    Typed record of one equipment type. Float fields are plain Python floats
+    (NaN where the catalog has no value), so single-item costing needs no
+    pandas or NumPy scalar access.
+    """
+
+    __slots__ = tuple(RECORD_TEXT_FIELDS) + tuple(RECORD_FLOAT_FIELDS)
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    @classmethod
+    def from_row(cls, row: Mapping) -> "CostRecord":
+        """
+        Builds a record from a row indexable by the Factors column names,
+        e.g. a dict, a pandas Series or a structured array element.
+        """
+        values = {name: str(row[column]) for name, column in RECORD_TEXT_FIELDS.items()}
+        values.update(
+            {name: float(row[column]) for name, column in RECORD_FLOAT_FIELDS.items()}
+        )
+        return cls(**values)
+
+    def __repr__(self) -> str:
+        return (
+            f"CostRecord({self.method!r}, {self.plant_type!r}, "
+            f"{self.equipment!r}, {self.equipment_type!r})"
+        )
+
+
+def record_dtype(
+    data: pd.DataFrame,
+    text_columns: Iterable[str] = tuple(RECORD_TEXT_FIELDS.values()),
+    float_columns: Iterable[str] = tuple(RECORD_FLOAT_FIELDS.values()),
+) -> np.dtype:
+    """
+    Returns the structured dtype of the records of a table. Fields are named
+    after the columns; text fields are fixed width unicode.
+    """
+    fields = []
+    for column in text_columns:
+        width = max(1, int(data[column].fillna("").astype(str).str.len().max() or 1))
+        fields.append((column, f"U{width}"))
+    fields.extend((column, "f8") for column in float_columns)
+    return np.dtype(fields)
+
+
+def build_records(
+    data: pd.DataFrame,
+    text_columns: Iterable[str] = tuple(RECORD_TEXT_FIELDS.values()),
+    float_columns: Iterable[str] = tuple(RECORD_FLOAT_FIELDS.values()),
+) -> np.ndarray:
+    """
+    Compiles a cost table into a read-only structured array. Missing text
+    values become empty strings, missing numbers NaN.
+
+    Args:
+        data (pd.DataFrame): The cost table, by default the material factor table.
+        text_columns (iterable): Columns stored as text fields.
+        float_columns (iterable): Columns stored as float fields.
+
+    Returns:
+        np.ndarray: One structured element per row.
+    """
+    text_columns, float_columns = tuple(text_columns), tuple(float_columns)
+    records = np.empty(len(data), dtype=record_dtype(data, text_columns, float_columns))
+    for column in text_columns:
+        records[column] = data[column].fillna("").astype(str).to_numpy()
+    for column in float_columns:
+        records[column] = data[column].to_numpy(dtype=float)
+    records.flags.writeable = False
+    return records
+
+
+def records_frame(records: np.ndarray) -> pd.DataFrame:
+    """Returns the records as a DataFrame with one column per field."""
+    return pd.DataFrame({name: records[name] for name in records.dtype.names})
+
+
+def records_hash(records: np.ndarray) -> str:
+    """Returns a short hash of the content of a structured array."""
+    digest = hashlib.sha1(str(records.dtype.descr).encode())
+    digest.update(np.ascontiguousarray(records).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def row_dicts(records: np.ndarray) -> Tuple[dict, ...]:
+    """Returns the records as dicts of Python values keyed by field name."""
+    names = records.dtype.names
+    return tuple(dict(zip(names, values)) for values in records.tolist())
+
+
+def build_cost_records(records: np.ndarray) -> Tuple[CostRecord, ...]:
+    """Builds one CostRecord per element of a structured array."""
+    columns = {
+        name: records[column].tolist()
+        for name, column in {**RECORD_TEXT_FIELDS, **RECORD_FLOAT_FIELDS}.items()
+    }
+    return tuple(
+        CostRecord(**{name: values[i] for name, values in columns.items()})
+        for i in range(len(records))
+    )
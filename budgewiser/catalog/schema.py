@@ -0,0 +1,112 @@
+"""
+budgewiser.catalog.schema
+
+This module validates the catalog csv tables, and defines the common schema
+that both cost databases are mapped to. In the common schema every row is a
+purchased cost model
+
+    C = (a + b * (S / s_ref)^n) * target_index / base_index * purchase_factor
+
+which is the a + b * S^n correlation of the material factor table
+(s_ref = 1, base_index = 509.7, purchase_factor = 1) and the power law of the
+capital equipment cost database (a = 0, b = Min_Cost, s_ref = Min_Scale,
+base_index = CEPCI, purchase_factor = 1.07).
+"""
+
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+SOURCE_MATERIALS = "materials"
+SOURCE_CAPITAL = "capital"
+
+# Text fields of the common schema
+UNIFIED_TEXT_FIELDS = (
+    "source",
+    "method",
+    "plant_type",
+    "equipment",
+    "equipment_type",
+    "sizing_quantity",
+    "units",
+)
+# Float fields of the common schema
+UNIFIED_FLOAT_FIELDS = (
+    "s_lower",
+    "s_upper",
+    "a",
+    "b",
+    "s_ref",
+    "n",
+    "base_index",
+    "purchase_factor",
+)
+
+
+def validate_table(
+    data: pd.DataFrame,
+    name: str,
+    key_columns: Iterable[str] = (),
+    float_columns: Iterable[str] = (),
+    required_columns: Iterable[str] = (),
+    positive_columns: Iterable[str] = (),
+    range_columns: Iterable[tuple] = (),
+):
+    """
+    Checks a catalog table and reports all problems at once.
+
+    Args:
+        data (pd.DataFrame): The table.
+        name (str): Name of the table in the error message.
+        key_columns (iterable): Text columns that must not be empty.
+        float_columns (iterable): Columns that must be numeric.
+        required_columns (iterable): Numeric columns that must have a value.
+        positive_columns (iterable): Numeric columns whose values must be > 0.
+        range_columns (iterable): (lower, upper) column pairs with lower <= upper.
+
+    Raises:
+        ValueError: If the table has missing columns or invalid values.
+    """
+    key_columns, float_columns = tuple(key_columns), tuple(float_columns)
+    missing = [
+        column for column in key_columns + float_columns if column not in data.columns
+    ]
+    if missing:
+        raise ValueError(f"{name} is missing the columns: {', '.join(missing)}")
+
+    problems: List[str] = []
+    for column in key_columns:
+        empty = data[column].isna() | (data[column].astype(str).str.strip() == "")
+        if empty.any():
+            problems.append(f"{column} is empty in {int(empty.sum())} rows")
+    for column in float_columns:
+        if not pd.api.types.is_numeric_dtype(data[column]):
+            problems.append(f"{column} is not numeric")
+    if not problems:
+        for column in required_columns:
+            if data[column].isna().any():
+                problems.append(
+                    f"{column} is missing in {int(data[column].isna().sum())} rows"
+                )
+        for column in positive_columns:
+            if (data[column] <= 0).any():
+                problems.append(f"{column} must be positive")
+        for lower, upper in range_columns:
+            if (data[lower] > data[upper]).any():
+                problems.append(f"{lower} is above {upper} in some rows")
+    if problems:
+        raise ValueError(f"{name} is not valid: {'; '.join(problems)}.")
+
+
+def unified_dtype(*widths: dict) -> np.dtype:
+    """
+    Returns the structured dtype of the common schema, with text fields wide
+    enough for the given {field: width} requirements.
+    """
+    fields = []
+    for field in UNIFIED_TEXT_FIELDS:
+        width = max([1] + [w.get(field, 1) for w in widths])
+        fields.append((field, f"U{width}"))
+    fields.extend((field, "f8") for field in UNIFIED_FLOAT_FIELDS)
+    return np.dtype(fields)
@@ -0,0 +1,156 @@
+"""
+budgewiser.catalog.search
+
+This module contains the typeahead search over both cost databases. The
+equipment, equipment type (family type) and sizing quantity text of every row
+of the common schema is indexed by its trigrams once per pair of catalogs, so
+each keystroke is answered from the index in well under a millisecond.
+
+Words are padded like "  word ", so the trigrams of a query word that is
+still being typed match the words it is a prefix of, and misspelt words
+still share most of their trigrams with the right ones.
+"""
+
+import functools
+import re
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from budgewiser.catalog.capital import CapitalCatalog, get_capital_catalog
+from budgewiser.catalog.materials import MaterialCatalog, get_catalog
+from budgewiser.catalog.unified import row_dict, source_positions, unified_records
+
+# Fields of the common schema whose text is searched
+SEARCH_FIELDS = (
+    "equipment",
+    "equipment_type",
+    "sizing_quantity",
+    "units",
+    "method",
+    "plant_type",
+)
+# Fields of the common schema returned with each match
+RESULT_FIELDS = SEARCH_FIELDS + ("s_lower", "s_upper")
+DEFAULT_LIMIT = 10
+# Share of the query trigrams a row must contain to match
+MIN_SCORE = 0.5
+
+_NOT_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def words(text: str) -> List[str]:
+    """Splits text into lower case alphanumeric words."""
+    return _NOT_WORD.sub(" ", text.lower()).split()
+
+
+def trigrams(text: str, prefix: bool = False) -> Set[str]:
+    """
+    Returns the trigrams of the words of a text. With prefix, the last word is
+    left open at the end, so it matches the words it is a prefix of.
+    """
+    grams = set()
+    text_words = words(text)
+    for i, word in enumerate(text_words):
+        padded = f"  {word}" if prefix and i == len(text_words) - 1 else f"  {word} "
+        grams.update(padded[j : j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """
+    Trigram index of the rows of the common catalog schema.
+
+    Attributes:
+        records (np.ndarray): The indexed rows, see catalog.unified_records.
+        positions (np.ndarray): Position of each row in its own catalog.
+    """
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+        self.positions = source_positions(records)
+
+        postings: Dict[str, list] = {}
+        lengths = []
+        for position, row in enumerate(records):
+            text = " ".join(str(row[field]) for field in SEARCH_FIELDS)
+            lengths.append(len(text))
+            for gram in trigrams(text):
+                postings.setdefault(gram, []).append(position)
+        self._postings = {
+            gram: np.array(rows, dtype=np.intp) for gram, rows in postings.items()
+        }
+        self._lengths = np.array(lengths)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        source: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Returns the rows best matching a query, e.g. "agit prop", ranked by the
+        share of the query trigrams they contain, shorter rows first on ties.
+
+        Args:
+            query (str): Text typed so far, the last word may be incomplete.
+            limit (int): Maximum number of matches.
+            source (str, optional): Only match rows of this source, e.g.
+                SOURCE_MATERIALS.
+
+        Returns:
+            list: One dict per match with the source, the position in its
+                catalog, the score and the RESULT_FIELDS.
+        """
+        grams = trigrams(query, prefix=True)
+        if not grams or limit < 1:
+            return []
+        hits = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not hits:
+            return []
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.records))
+        scores = counts / len(grams)
+        candidates = scores >= MIN_SCORE
+        if source is not None:
+            candidates &= self.records["source"] == source
+        candidates = np.flatnonzero(candidates)
+        order = np.lexsort((self._lengths[candidates], -scores[candidates]))
+        return [self._match(row, scores[row]) for row in candidates[order[:limit]]]
+
+    def _match(self, row: int, score: float) -> dict:
+        record = self.records[row]
+        return {
+            "source": str(record["source"]),
+            "position": int(self.positions[row]),
+            "score": round(float(score), 3),
+            **row_dict(record, RESULT_FIELDS),
+        }
+
+
+@functools.lru_cache(maxsize=4)
+def _search_index(materials: MaterialCatalog, capital: CapitalCatalog) -> SearchIndex:
+    return SearchIndex(unified_records(materials, capital))
+
+
+def search_index(
+    materials: Optional[MaterialCatalog] = None,
+    capital: Optional[CapitalCatalog] = None,
+) -> SearchIndex:
+    """
+    Returns the search index of both cost databases, built once per pair of
+    catalogs.
+
+    Args:
+        materials (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        capital (CapitalCatalog, optional): Defaults to the process-wide catalog.
+
+    Returns:
+        SearchIndex: The shared index.
+    """
+    return _search_index(
+        materials if materials is not None else get_catalog(),
+        capital if capital is not None else get_capital_catalog(),
+    )
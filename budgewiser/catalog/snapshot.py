@@ -0,0 +1,90 @@
+"""
+budgewiser.catalog.snapshot
+
+This module caches the compiled records of a catalog csv file as a binary
+.npy snapshot, keyed by the hash of the csv content. Later starts memory-map
+the snapshot instead of parsing and validating the csv again.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the compiled records changes
+SNAPSHOT_FORMAT = 1
+# Directory of the snapshots, can be overridden with BUDGEWISER_CACHE_DIR
+SNAPSHOT_DIR = Path(
+    os.environ.get("BUDGEWISER_CACHE_DIR", Path.home() / ".cache" / "budgewiser")
+)
+
+
+def file_hash(path: Path) -> str:
+    """Returns a short hash of the content of a file."""
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()[:16]
+
+
+def snapshot_path(path: Path, directory: Optional[Path] = None) -> Path:
+    """Returns the snapshot path of a csv file for its current content."""
+    path = Path(path)
+    directory = Path(directory or SNAPSHOT_DIR)
+    return directory / f"{path.stem}.v{SNAPSHOT_FORMAT}.{file_hash(path)}.npy"
+
+
+def load_records(
+    path: Path,
+    build: Callable[[Path], np.ndarray],
+    directory: Optional[Path] = None,
+) -> np.ndarray:
+    """
+    Returns the compiled records of a csv file, memory-mapped from its snapshot
+    if there is one for the current csv content. Otherwise the records are
+    built from the csv and a snapshot is written for the next start.
+
+    Snapshots of older content of the same csv file are removed. If the
+    snapshot directory is not writable the built records are returned as is.
+
+    Args:
+        path (Path): Path to the csv file.
+        build (callable): Parses, validates and compiles the csv file into a
+            structured array without object fields.
+        directory (Path, optional): Snapshot directory, defaults to SNAPSHOT_DIR.
+
+    Returns:
+        np.ndarray: Read-only structured array.
+    """
+    target = snapshot_path(path, directory)
+    if target.exists():
+        try:
+            return np.load(target, mmap_mode="r")
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable catalog snapshot %s", target)
+
+    records = build(path)
+    try:
+        _write_snapshot(records, target)
+        for stale in target.parent.glob(f"{Path(path).stem}.v*.npy"):
+            if stale != target:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        logger.warning("Could not write catalog snapshot %s", target)
+    return records
+
+
+def _write_snapshot(records: np.ndarray, target: Path):
+    # Write to a temporary file first, so no reader sees a partial snapshot
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            np.save(file, records, allow_pickle=False)
+        os.replace(temporary, target)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,128 @@
+"""
+budgewiser.catalog.unified
+
+This module maps the material factor catalog and the capital equipment cost
+catalog onto the common schema of budgewiser.catalog.schema, so both cost
+databases can be searched and costed as one table.
+"""
+
+import functools
+from typing import Optional
+
+import numpy as np
+
+from budgewiser.catalog.capital import (
+    CAPITAL_LOCATION_FACTOR,
+    CapitalCatalog,
+    get_capital_catalog,
+)
+from budgewiser.catalog.materials import (
+    MATERIALS_BASE_INDEX,
+    MaterialCatalog,
+    get_catalog,
+)
+from budgewiser.catalog.schema import SOURCE_CAPITAL, SOURCE_MATERIALS, unified_dtype
+from budgewiser.core.definitions import CapitalFactors, Factors
+
+# Common schema field -> material factor column
+MATERIALS_FIELDS = {
+    "method": Factors.METHOD,
+    "plant_type": Factors.PLANT_TYPE,
+    "equipment": Factors.EQUIPMENT,
+    "equipment_type": Factors.EQUIPMENT_TYPE,
+    "sizing_quantity": Factors.SIZING_QUANTITY,
+    "units": Factors.UNITS,
+    "s_lower": Factors.S_LOWER,
+    "s_upper": Factors.S_UPPER,
+    "a": Factors.A,
+    "b": Factors.B,
+    "n": Factors.N,
+}
+# Common schema field -> capital equipment cost column
+CAPITAL_FIELDS = {
+    "equipment": CapitalFactors.EQUIPMENT,
+    "equipment_type": CapitalFactors.FAMILY_TYPE,
+    "sizing_quantity": CapitalFactors.SCALING_QUANTITY,
+    "units": CapitalFactors.UNIT,
+    "s_lower": CapitalFactors.MIN_SCALE,
+    "s_upper": CapitalFactors.MAX_SCALE,
+    "b": CapitalFactors.MIN_COST,
+    "s_ref": CapitalFactors.MIN_SCALE,
+    "n": CapitalFactors.SCALING_FACTOR,
+    "base_index": CapitalFactors.CEPCI,
+}
+
+
+def _text_widths(records: np.ndarray, fields: dict) -> dict:
+    return {
+        field: records.dtype[column].itemsize // 4
+        for field, column in fields.items()
+        if records.dtype[column].kind == "U"
+    }
+
+
+@functools.lru_cache(maxsize=4)
+def _unified_records(materials: MaterialCatalog, capital: CapitalCatalog) -> np.ndarray:
+    dtype = unified_dtype(
+        _text_widths(materials.records, MATERIALS_FIELDS),
+        _text_widths(capital.records, CAPITAL_FIELDS),
+        {"source": max(len(SOURCE_MATERIALS), len(SOURCE_CAPITAL))},
+    )
+    records = np.zeros(len(materials) + len(capital), dtype=dtype)
+    head, tail = records[: len(materials)], records[len(materials) :]
+
+    head["source"] = SOURCE_MATERIALS
+    for field, column in MATERIALS_FIELDS.items():
+        head[field] = materials.records[column]
+    head["s_ref"] = 1.0
+    head["base_index"] = MATERIALS_BASE_INDEX
+    head["purchase_factor"] = 1.0
+
+    tail["source"] = SOURCE_CAPITAL
+    for field, column in CAPITAL_FIELDS.items():
+        tail[field] = capital.records[column]
+    tail["purchase_factor"] = CAPITAL_LOCATION_FACTOR
+
+    records.flags.writeable = False
+    return records
+
+
+def source_positions(records: np.ndarray) -> np.ndarray:
+    """Returns the position of each row of the common schema in its own catalog."""
+    positions = np.zeros(len(records), dtype=np.intp)
+    for source in np.unique(records["source"]):
+        rows = np.flatnonzero(records["source"] == source)
+        positions[rows] = np.arange(len(rows))
+    return positions
+
+
+def row_dict(record, fields) -> dict:
+    """Returns fields of a row of the common schema as plain values, NaN as None."""
+    values = {}
+    for field in fields:
+        value = record[field].item()
+        values[field] = None if value != value else value  # NaN
+    return values
+
+
+def unified_records(
+    materials: Optional[MaterialCatalog] = None,
+    capital: Optional[CapitalCatalog] = None,
+) -> np.ndarray:
+    """
+    Returns both cost databases as one read-only structured array of the
+    common schema, material factor rows first. The array is built once per
+    pair of catalogs.
+
+    Args:
+        materials (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        capital (CapitalCatalog, optional): Defaults to the process-wide catalog.
+
+    Returns:
+        np.ndarray: One element per catalog row, with the fields of
+            UNIFIED_TEXT_FIELDS and UNIFIED_FLOAT_FIELDS.
+    """
+    return _unified_records(
+        materials if materials is not None else get_catalog(),
+        capital if capital is not None else get_capital_catalog(),
+    )
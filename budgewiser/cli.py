@@ -0,0 +1,245 @@
+"""
+budgewiser.cli
+
+This module contains the headless command line interface. The estimate
+command costs a CSV or JSONL file of equipment items and streams the results
+to CSV or JSONL, in chunks that are decoded, costed and encoded in parallel
+worker processes.
+
+    budgewiser estimate items.csv -o costs.csv --workers 8
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from budgewiser.catalog import get_catalog
+from budgewiser.core import escalation
+from budgewiser.core.batch import (
+    INPUT_ALIASES,
+    INPUT_FIELDS,
+    OUTPUT_FIELDS,
+    estimate_items,
+)
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def read_records(file, file_format: str) -> Iterator:
+    """
+    Reads raw records without decoding them into dicts: lists of strings for
+    CSV, the first being the header, and text lines for JSONL.
+    """
+    if file_format == "csv":
+        return csv.reader(file)
+    return (line for line in file if line.strip())
+
+
+def _input_field(key: str) -> Optional[str]:
+    field = INPUT_ALIASES.get(key, key)
+    return field if field in INPUT_FIELDS else None
+
+
+def decode_rows(records: List, file_format: str, header: Optional[List[str]] = None):
+    """
+    Decodes raw records into dicts of the INPUT_FIELDS. Records that cannot be
+    decoded become dicts with only an "error".
+    """
+    if file_format == "csv":
+        columns = [
+            (_input_field(key), i) for i, key in enumerate(header) if _input_field(key)
+        ]
+        return [
+            {field: record[i] for field, i in columns if i < len(record)}
+            for record in records
+        ]
+    rows = []
+    for record in records:
+        # A bad line becomes an error row, the rest of the chunk is still costed
+        try:
+            row = json.loads(record)
+        except json.JSONDecodeError as e:
+            rows.append({"error": f"Invalid JSON: {e.msg}."})
+            continue
+        if not isinstance(row, dict):
+            rows.append({"error": "Every line must be a JSON object."})
+            continue
+        rows.append(
+            {
+                _input_field(key): value
+                for key, value in row.items()
+                if _input_field(key)
+            }
+        )
+    return rows
+
+
+def encode_rows(rows: List[dict], file_format: str) -> str:
+    """Encodes result rows as CSV (without header) or JSONL text."""
+    if file_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+        writer.writerows(rows)
+        return buffer.getvalue()
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def estimate_chunk(
+    records: List,
+    input_format: str,
+    header: Optional[List[str]],
+    output_format: str,
+    target_index: float,
+) -> Tuple[str, int, int]:
+    """
+    Decodes, costs and encodes one chunk of raw records. Runs in the worker
+    processes, so only text crosses the process boundary.
+
+    Returns:
+        tuple: The encoded results, the number of rows and of rows with errors.
+    """
+    rows = decode_rows(records, input_format, header)
+    costed = iter(
+        estimate_items([row for row in rows if "error" not in row], target_index)
+    )
+    rows = [row if "error" in row else next(costed) for row in rows]
+    errors = sum(1 for row in rows if row.get("error"))
+    return encode_rows(rows, output_format), len(rows), errors
+
+
+def chunked(records: Iterable, size: int) -> Iterator[List]:
+    """Splits records into lists of at most size records."""
+    records = iter(records)
+    while chunk := list(itertools.islice(records, size)):
+        yield chunk
+
+
+def run_chunks(chunks: Iterable[tuple], workers: int = 1) -> Iterator[tuple]:
+    """
+    Runs estimate_chunk over argument tuples, yielding results in input order.
+    With more than one worker the chunks run in a process pool, with at most
+    two chunks per worker in flight so memory stays bounded for any input size.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield estimate_chunk(*chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=get_catalog) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(estimate_chunk, *chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _file_format(path: str, file_format: Optional[str], default: Optional[str] = None):
+    if file_format:
+        return file_format
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    if default:
+        return default
+    raise SystemExit(f"Cannot tell the format of {path}, give it with --input-format.")
+
+
+def _open(path: str, mode: str):
+    # Input may start with the byte order mark that Excel writes to csv files
+    encoding = "utf-8-sig" if "r" in mode else "utf-8"
+    if path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        return open(stream.fileno(), mode, encoding=encoding, newline="", closefd=False)
+    return open(path, mode, encoding=encoding, newline="")
+
+
+def estimate(args) -> Dict[str, int]:
+    """Runs the estimate command. Returns the number of rows and errors."""
+    target_index = escalation.target_index(args.target_year, args.target_index)
+    input_format = _file_format(args.input, args.input_format)
+    output_format = _file_format(args.output, args.output_format, input_format)
+    counts = {"rows": 0, "errors": 0}
+    with _open(args.input, "r") as source, _open(args.output, "w") as target:
+        records = read_records(source, input_format)
+        header = next(records, []) if input_format == "csv" else None
+        if output_format == "csv":
+            csv.writer(target).writerow(OUTPUT_FIELDS)
+        chunks = (
+            (chunk, input_format, header, output_format, target_index)
+            for chunk in chunked(records, args.chunk_size)
+        )
+        for text, rows, errors in run_chunks(chunks, args.workers):
+            target.write(text)
+            counts["rows"] += rows
+            counts["errors"] += errors
+    return counts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="budgewiser", description="BudgeWiser capital cost estimation."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "estimate",
+        help="Cost a CSV or JSONL file of equipment items.",
+        description=(
+            "Costs equipment items with the columns method, plant_type, "
+            "equipment, equipment_type, sizing_value and optionally id and "
+            "sizing_units, and writes them with their costs."
+        ),
+    )
+    command.add_argument("input", help="Input file, or - for stdin.")
+    command.add_argument(
+        "-o", "--output", default="-", help="Output file, stdout by default."
+    )
+    command.add_argument("--input-format", choices=FORMATS)
+    command.add_argument(
+        "--output-format", choices=FORMATS, help="Defaults to the input format."
+    )
+    command.add_argument(
+        "-w", "--workers", type=int, default=1, help="Number of worker processes."
+    )
+    command.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Rows costed per vectorized pass.",
+    )
+    target = command.add_mutually_exclusive_group()
+    target.add_argument("--target-year", type=float, help="Year to escalate to.")
+    target.add_argument("--target-index", type=float, help="CEPCI to escalate to.")
+    command.set_defaults(handler=estimate)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if getattr(args, "chunk_size", 1) < 1:
+        raise SystemExit("--chunk-size must be at least 1.")
+    try:
+        counts = args.handler(args)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(
+        f"Costed {counts['rows']} rows, {counts['errors']} with errors.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
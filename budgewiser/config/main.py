@@ -1,5 +1,4 @@
 STORE_ID = "budgewiser" + "_store"
-DATA_STORE = "material_store_data"
 PROJECT_NAME = "budgeWiser".replace("_", " ").title()
 PROJECT_SLUG = "budgewiser"
 
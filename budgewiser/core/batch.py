@@ -0,0 +1,155 @@
+"""
+budgewiser.core.batch
+
+This module costs lists of loosely typed equipment item rows, as read from
+files or request bodies, in one vectorized engine pass. Rows that cannot be
+costed carry an error message instead of failing the whole batch.
+"""
+
+import math
+from typing import List
+
+import numpy as np
+
+from budgewiser.catalog import get_catalog
+from budgewiser.core import engine, escalation
+from budgewiser.core.definitions import Factors
+from budgewiser.core.result_cache import get_result_cache, item_key
+
+# Input fields of an equipment item
+INPUT_FIELDS = (
+    "id",
+    "method",
+    "plant_type",
+    "equipment",
+    "equipment_type",
+    "sizing_value",
+    "sizing_units",
+)
+# Accepted spellings of the input fields, e.g. the materials factor columns
+INPUT_ALIASES = {
+    Factors.METHOD: "method",
+    Factors.PLANT_TYPE: "plant_type",
+    Factors.EQUIPMENT: "equipment",
+    Factors.EQUIPMENT_TYPE: "equipment_type",
+    "type": "equipment_type",
+    "size": "sizing_value",
+    "units": "sizing_units",
+}
+COST_FIELDS = ("purchased_cost", "isbl_cost", "total_fixed_capital_cost")
+# Catalog key fields an item must have, with the message if one is missing,
+# as in schemas.estimation.EstimationInput
+KEY_FIELDS = {
+    "method": "Method must be selected.",
+    "plant_type": "Plant type must be selected.",
+    "equipment": "Equipment must be selected.",
+    "equipment_type": "Equipment type must be selected.",
+}
+OUTPUT_FIELDS = INPUT_FIELDS + COST_FIELDS + ("error",)
+
+
+def estimate_items(
+    rows: List[dict], target_index: float = escalation.DEFAULT_TARGET_INDEX
+) -> List[dict]:
+    """
+    Costs a list of equipment items in one vectorized pass.
+
+    Items that cannot be costed get an "error" and no costs. Results are
+    memoized in the process-wide result cache, so only items not costed
+    before against the current catalog go through the engine.
+
+    Args:
+        rows (list): Dicts with the INPUT_FIELDS.
+        target_index (float): Cost index to escalate the costs to.
+
+    Returns:
+        list: Copies of the rows with the COST_FIELDS added.
+    """
+    catalog = get_catalog()
+    cache = get_result_cache()
+    results = [dict(row) for row in rows]
+    costed, keys, positions, sizing_values, sizing_units = [], [], [], [], []
+    for result in results:
+        try:
+            sizing_value = float(result.get("sizing_value"))
+            if not (sizing_value > 0 and math.isfinite(sizing_value)):
+                raise ValueError
+        except (TypeError, ValueError):
+            result["error"] = "Sizing quantity must be a finite positive number."
+            if isinstance(result.get("sizing_value"), float):
+                # Not echoed back, as Infinity and NaN are not valid JSON
+                result["sizing_value"] = None
+            continue
+        # The catalog treats missing keys as wildcards, so they are required
+        errors = [
+            message
+            for field, message in KEY_FIELDS.items()
+            if not isinstance(result.get(field), str) or not result[field]
+        ]
+        if not isinstance(result.get("sizing_units"), (str, type(None))):
+            errors.append("Sizing units must be text.")
+        if errors:
+            result["error"] = " ".join(errors)
+            continue
+        key = item_key(
+            "item",
+            target_index,
+            result.get("method"),
+            result.get("plant_type"),
+            result.get("equipment"),
+            result.get("equipment_type"),
+            sizing_value,
+            result.get("sizing_units"),
+        )
+        cached = cache.get(catalog.version, key)
+        if cached is not None:
+            result.update(cached)
+            continue
+        try:
+            position = catalog.select(
+                result.get("method"),
+                result.get("plant_type"),
+                result.get("equipment"),
+                result.get("equipment_type"),
+            )[0]
+        except KeyError as e:
+            result["error"] = e.args[0]
+            cache.put(catalog.version, key, {"error": result["error"]})
+            continue
+        costed.append(result)
+        keys.append(key)
+        positions.append(position)
+        sizing_values.append(sizing_value)
+        sizing_units.append(result.get("sizing_units") or None)
+
+    if not costed:
+        return results
+
+    positions = np.asarray(positions, dtype=np.intp)
+    sizing_values = catalog.convert_sizes(
+        positions, sizing_values, sizing_units, strict=False
+    )
+    estimate = engine.estimate_positions(
+        positions, sizing_values, catalog, target_index=target_index
+    )
+    s_lower = catalog.column(Factors.S_LOWER)[positions]
+    s_upper = catalog.column(Factors.S_UPPER)[positions]
+    catalog_units = catalog.column(Factors.UNITS)[positions]
+    for i, result in enumerate(costed):
+        output = {}
+        if np.isnan(sizing_values[i]):
+            output["error"] = (
+                f"Cannot convert {sizing_units[i]} to {catalog_units[i].strip()}."
+            )
+        elif not estimate["in_range"][i]:
+            output["error"] = (
+                f"The input value must be between {s_lower[i]} and {s_upper[i]}."
+            )
+        else:
+            for field in COST_FIELDS:
+                value = float(estimate[field][i])
+                # Overflowed costs are not valid JSON numbers either
+                output[field] = value if math.isfinite(value) else None
+        result.update(output)
+        cache.put(catalog.version, keys[i], output)
+    return results
@@ -0,0 +1,192 @@
+"""
+budgewiser.core.curves
+
+This module sweeps the purchased cost correlation of an equipment type over
+a log-spaced grid of sizing values, for plotting cost-vs-size curves. Curves
+are memoized per (catalog row, grid, target cost index) with least recently used eviction.
+"""
+
+import functools
+from typing import Dict, Optional
+
+import numpy as np
+
+from budgewiser.catalog import (
+    CapitalCatalog,
+    MaterialCatalog,
+    get_capital_catalog,
+    get_catalog,
+)
+from budgewiser.core import engine, escalation
+from budgewiser.core.definitions import CapitalFactors, Factors
+
+CURVE_POINTS = 50
+CURVE_CACHE_SIZE = 1024
+
+
+def log_grid(s_lower: float, s_upper: float, points: int = CURVE_POINTS) -> np.ndarray:
+    """
+    Returns a log-spaced grid of sizing values between two bounds.
+
+    Raises:
+        ValueError: If the bounds are missing, not positive or not increasing.
+    """
+    if not (0 < s_lower < s_upper):
+        raise ValueError(
+            f"A sizing range 0 < S lower < S upper is required, got {s_lower} and {s_upper}."
+        )
+    return np.geomspace(s_lower, s_upper, points)
+
+
+def _read_only(curve: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    for array in curve.values():
+        array.flags.writeable = False
+    return curve
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _correlation_curve(
+    catalog: MaterialCatalog,
+    position: int,
+    s_lower: float,
+    s_upper: float,
+    points: int,
+    target_index: float,
+) -> Dict[str, np.ndarray]:
+    sizing_values = log_grid(s_lower, s_upper, points)
+    column = catalog.column
+    purchased = engine.purchased_equipment_cost(
+        column(Factors.A)[position],
+        column(Factors.B)[position],
+        column(Factors.N)[position],
+        sizing_values,
+        target_index,
+    )
+    return _read_only({"sizing_values": sizing_values, "purchased_cost": purchased})
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _power_law_curve(
+    catalog: CapitalCatalog,
+    position: int,
+    s_lower: float,
+    s_upper: float,
+    points: int,
+    target_index: float,
+) -> Dict[str, np.ndarray]:
+    sizing_values = log_grid(s_lower, s_upper, points)
+    column = catalog.column
+    purchased = engine.power_law_cost(
+        column(CapitalFactors.MIN_COST)[position],
+        column(CapitalFactors.MIN_SCALE)[position],
+        column(CapitalFactors.SCALING_FACTOR)[position],
+        column(CapitalFactors.CEPCI)[position],
+        sizing_values,
+        target_index,
+    )
+    return _read_only({"sizing_values": sizing_values, "purchased_cost": purchased})
+
+
+def cost_curve(
+    method: str,
+    plant_type: str,
+    equipment: str,
+    equipment_type: str,
+    points: int = CURVE_POINTS,
+    s_lower: Optional[float] = None,
+    s_upper: Optional[float] = None,
+    catalog: Optional[MaterialCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Sweeps the a + b * S^n correlation of a material catalog equipment type.
+
+    Args:
+        method (str): The method.
+        plant_type (str): The plant type.
+        equipment (str): The equipment.
+        equipment_type (str): The equipment type.
+        points (int): Number of grid points.
+        s_lower (float, optional): Lower bound, defaults to the catalog S lower.
+        s_upper (float, optional): Upper bound, defaults to the catalog S upper.
+        catalog (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+
+    Returns:
+        dict: Read-only "sizing_values" and "purchased_cost" arrays.
+
+    Raises:
+        KeyError: If no catalog row matches.
+        ValueError: If no valid sizing range is given or in the catalog, or the
+            target is not valid.
+    """
+    catalog = catalog if catalog is not None else get_catalog()
+    position = catalog.select(method, plant_type, equipment, equipment_type)[0]
+    if s_lower is None:
+        s_lower = float(catalog.column(Factors.S_LOWER)[position])
+    if s_upper is None:
+        s_upper = float(catalog.column(Factors.S_UPPER)[position])
+    return _correlation_curve(
+        catalog,
+        position,
+        float(s_lower),
+        float(s_upper),
+        int(points),
+        escalation.target_index(target_year, target_index),
+    )
+
+
+def capital_cost_curve(
+    equipment: str,
+    family_type: Optional[str] = None,
+    points: int = CURVE_POINTS,
+    s_lower: Optional[float] = None,
+    s_upper: Optional[float] = None,
+    catalog: Optional[CapitalCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Sweeps the power law of a capital equipment cost database row.
+
+    Args:
+        equipment (str): The equipment.
+        family_type (str, optional): The family type.
+        points (int): Number of grid points.
+        s_lower (float, optional): Lower bound, defaults to Min_Scale.
+        s_upper (float, optional): Upper bound, defaults to Max_Scale.
+        catalog (CapitalCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+
+    Returns:
+        dict: Read-only "sizing_values" and "purchased_cost" arrays.
+
+    Raises:
+        KeyError: If no database row matches.
+        ValueError: If the sizing range or the target is not valid.
+    """
+    catalog = catalog if catalog is not None else get_capital_catalog()
+    position = catalog.select(equipment, family_type)
+    if s_lower is None:
+        s_lower = float(catalog.column(CapitalFactors.MIN_SCALE)[position])
+    if s_upper is None:
+        s_upper = float(catalog.column(CapitalFactors.MAX_SCALE)[position])
+    return _power_law_curve(
+        catalog,
+        position,
+        float(s_lower),
+        float(s_upper),
+        int(points),
+        escalation.target_index(target_year, target_index),
+    )
+
+
+def cache_info() -> Dict[str, object]:
+    """Returns the hit/miss statistics of the curve caches."""
+    return {
+        "correlation": _correlation_curve.cache_info()._asdict(),
+        "power_law": _power_law_curve.cache_info()._asdict(),
+    }
@@ -30,3 +30,16 @@ class Methods:
     """ Method types """  
     MATERIAL_FACTORS = "material factors"
     HAND = "Hand"
+
+class CapitalFactors:
+    """ Capital equipment cost database columns"""
+    EQUIPMENT = "Equipment"
+    FAMILY_TYPE = "Family_type"
+    SCALING_QUANTITY = "Scaling_quantity"
+    UNIT = "Unit"
+    MIN_SCALE = "Min_Scale"
+    MAX_SCALE = "Max_Scale"
+    MIN_COST = "Min_Cost"
+    MAX_COST = "Max_Cost"
+    SCALING_FACTOR = "Scaling_Factor"
+    CEPCI = "CEPCI"
@@ -0,0 +1,344 @@
+"""
+budgewiser.core.engine
+
+This module contains the vectorized capital cost engine. The same formulas
+cost a single item (scalars) or a whole equipment list (NumPy arrays) in one
+pass over the catalog columns.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from budgewiser.catalog import (
+    CAPITAL_LOCATION_FACTOR,
+    MATERIALS_BASE_INDEX,
+    MaterialCatalog,
+    get_catalog,
+)
+from budgewiser.core import escalation
+from budgewiser.core.definitions import Factors, Methods
+from budgewiser.core.escalation import DEFAULT_TARGET_INDEX
+
+
+def purchased_equipment_cost(a, b, n, sizing_value, target_index=DEFAULT_TARGET_INDEX):
+    """
+    Calculates the purchased equipment cost based on the formula C = a + b * S^n,
+    escalated from the MATERIALS_BASE_INDEX basis of the correlations.
+
+    Args:
+        a (float or np.ndarray): Constant 'a' in the formula.
+        b (float or np.ndarray): Constant 'b' in the formula.
+        n (float or np.ndarray): Exponent 'n' in the formula.
+        sizing_value (float or np.ndarray): The sizing value S.
+        target_index (float or np.ndarray): Cost index to escalate to.
+
+    Returns:
+        float or np.ndarray: The purchased equipment cost.
+    """
+    return (a + b * np.power(sizing_value, n)) * target_index / MATERIALS_BASE_INDEX
+
+
+def power_law_cost(
+    min_cost, min_scale, n, cepci, sizing_value, target_index=DEFAULT_TARGET_INDEX
+):
+    """
+    Calculates the purchased equipment cost from the capital equipment cost
+    database power law C = Min_Cost * (S / Min_Scale)^n, escalated from the
+    row CEPCI and including the CAPITAL_LOCATION_FACTOR of 1.07.
+
+    Returns:
+        float or np.ndarray: The purchased equipment cost.
+    """
+    return (
+        min_cost
+        * np.power(sizing_value / min_scale, n)
+        * target_index
+        / cepci
+        * CAPITAL_LOCATION_FACTOR
+    )
+
+
+def unified_cost(
+    a, b, s_ref, n, base_index, purchase_factor, sizing_value, target_index
+):
+    """
+    Calculates the purchased equipment cost of the common catalog schema,
+    C = (a + b * (S / s_ref)^n) * target_index / base_index * purchase_factor,
+    which covers both the material factor correlations and the capital
+    equipment cost database power law.
+
+    Returns:
+        float or np.ndarray: The purchased equipment cost.
+    """
+    return (
+        (a + b * np.power(sizing_value / s_ref, n))
+        * target_index
+        / base_index
+        * purchase_factor
+    )
+
+
+def estimate_unified(
+    records: np.ndarray,
+    positions,
+    sizing_values,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Costs rows of the common catalog schema (see catalog.unified_records) in
+    one NumPy pass, whichever database they come from.
+
+    Args:
+        records (np.ndarray): Records of the common schema.
+        positions (array-like): Record position per item.
+        sizing_values (array-like): Sizing value per item.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+
+    Returns:
+        dict: Arrays "purchased_cost" (NaN outside the sizing range) and the
+            boolean "in_range" mask, one entry per item.
+    """
+    index = escalation.target_index(target_year, target_index)
+    rows = records[np.asarray(positions, dtype=np.intp)]
+    sizing_values = np.asarray(sizing_values, dtype=float)
+    in_range = (
+        np.isnan(rows["s_lower"])
+        | np.isnan(rows["s_upper"])
+        | ((rows["s_lower"] <= sizing_values) & (sizing_values <= rows["s_upper"]))
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        purchased = unified_cost(
+            rows["a"],
+            rows["b"],
+            rows["s_ref"],
+            rows["n"],
+            rows["base_index"],
+            rows["purchase_factor"],
+            sizing_values,
+            index,
+        )
+    return {
+        "purchased_cost": np.where(in_range, purchased, np.nan),
+        "in_range": in_range,
+    }
+
+
+def isbl_cost(purchased_cost, fm, fer, fp, fi, fel, fc, fs, fl):
+    """
+    Calculates the inside battery limits (ISBL) cost with the factorial method.
+
+    Returns:
+        float or np.ndarray: The ISBL cost.
+    """
+    return purchased_cost * ((1 + fp) * fm + (fer + fel + fi + fc + fs + fl))
+
+
+def total_fixed_capital_cost(isbl, OS, DE, X, location_factor):
+    """
+    Calculates the total fixed capital cost from the ISBL cost.
+
+    Returns:
+        float or np.ndarray: The total fixed capital cost.
+    """
+    return isbl * (1 + OS) * (1 + DE + X) * location_factor
+
+
+def estimate_batch(
+    keys: Iterable[tuple],
+    sizing_values,
+    catalog: Optional[MaterialCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Costs many equipment items in one NumPy pass.
+
+    Args:
+        keys (iterable): (method, plant_type, equipment, equipment_type) per item.
+        sizing_values (array-like): Sizing value per item.
+        catalog (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to,
+            defaults to escalation.DEFAULT_TARGET_INDEX.
+
+    Returns:
+        dict: Arrays "purchased_cost", "isbl_cost", "total_fixed_capital_cost"
+            and the boolean "in_range" mask, one entry per item.
+
+    Raises:
+        KeyError: If any key has no matching catalog row.
+    """
+    catalog = catalog if catalog is not None else get_catalog()
+    return estimate_positions(
+        catalog.positions(keys), sizing_values, catalog, target_year, target_index
+    )
+
+
+def estimate_positions(
+    positions: np.ndarray,
+    sizing_values,
+    catalog: Optional[MaterialCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Costs the catalog rows at the given positions in one NumPy pass.
+
+    For Methods.HAND rows both the ISBL cost and the total fixed capital cost
+    are the installed cost (purchased cost times the installation factor), as
+    the method defines no further factors. Items whose sizing value lies outside the
+    catalog range get NaN costs and a False "in_range" entry.
+
+    Args:
+        positions (np.ndarray): Catalog row position per item.
+        sizing_values (array-like): Sizing value per item.
+        catalog (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+
+    Returns:
+        dict: Arrays "purchased_cost", "isbl_cost", "total_fixed_capital_cost"
+            and the boolean "in_range" mask, one entry per item.
+    """
+    catalog = catalog if catalog is not None else get_catalog()
+    index = escalation.target_index(target_year, target_index)
+    positions = np.asarray(positions, dtype=np.intp)
+    sizing_values = np.asarray(sizing_values, dtype=float)
+
+    def column(name):
+        return catalog.column(name)[positions]
+
+    s_lower = column(Factors.S_LOWER)
+    s_upper = column(Factors.S_UPPER)
+    in_range = (
+        np.isnan(s_lower)
+        | np.isnan(s_upper)
+        | ((s_lower <= sizing_values) & (sizing_values <= s_upper))
+    )
+
+    with np.errstate(invalid="ignore"):
+        purchased = purchased_equipment_cost(
+            column(Factors.A),
+            column(Factors.B),
+            column(Factors.N),
+            sizing_values,
+            index,
+        )
+        purchased = np.where(in_range, purchased, np.nan)
+
+        factorial_isbl = isbl_cost(
+            purchased,
+            column(Factors.MATERIAL_FACTOR),
+            column(Factors.EQUIPMENT_ERECTION_FACTOR),
+            column(Factors.PIPING_FACTOR),
+            column(Factors.INSTRUMENTATION_AND_CONTROL_FACTOR),
+            column(Factors.ELECTRICAL_FACTOR),
+            column(Factors.CIVIL_FACTOR),
+            column(Factors.STRUCTURES_AND_BUILDINGS_FACTOR),
+            column(Factors.LAGGING_AND_PAINT_FACTOR),
+        )
+        installed = purchased * column(Factors.INSTALLATION_FACTOR)
+
+        is_hand = column(Factors.METHOD) == Methods.HAND
+        isbl = np.where(is_hand, installed, factorial_isbl)
+        total = np.where(
+            is_hand,
+            installed,
+            total_fixed_capital_cost(
+                isbl,
+                column(Factors.OFFSITES_FACTOR),
+                column(Factors.DESIGN_AND_ENGINEERING_FACTOR),
+                column(Factors.CONTINGENCY),
+                column(Factors.LOCATION_FACTOR),
+            ),
+        )
+
+    return {
+        "purchased_cost": purchased,
+        "isbl_cost": isbl,
+        "total_fixed_capital_cost": total,
+        "in_range": in_range,
+    }
+
+
+def cost_cases(
+    positions,
+    sizing_values,
+    multipliers: Dict[str, np.ndarray],
+    catalog: Optional[MaterialCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Costs a set of equipment items under many cases of scaled catalog terms in
+    one broadcast computation, and sums the item costs per case.
+
+    The range check of estimate_positions is not applied. Hand items add their
+    installed cost to both the ISBL cost and the total fixed capital cost, as
+    in estimate_positions.
+
+    Args:
+        positions (array-like): Catalog row position per item.
+        sizing_values (array-like): Sizing value per item.
+        multipliers (dict): Per catalog column (e.g. Factors.PIPING_FACTOR or
+            Factors.N) an array with one multiplier per case. Columns not given
+            keep their catalog value.
+        catalog (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+
+    Returns:
+        dict: "isbl_cost" and "total_fixed_capital_cost" arrays, one entry per case.
+    """
+    catalog = catalog if catalog is not None else get_catalog()
+    index = escalation.target_index(target_year, target_index)
+    positions = np.asarray(positions, dtype=np.intp)
+    sizing_values = np.asarray(sizing_values, dtype=float)
+
+    def column(name):
+        base = catalog.column(name)[positions][np.newaxis, :]
+        if name in multipliers:
+            return base * np.asarray(multipliers[name])[:, np.newaxis]
+        return base
+
+    with np.errstate(invalid="ignore"):
+        purchased = purchased_equipment_cost(
+            column(Factors.A),
+            column(Factors.B),
+            column(Factors.N),
+            sizing_values[np.newaxis, :],
+            index,
+        )
+        factorial_isbl = isbl_cost(
+            purchased,
+            column(Factors.MATERIAL_FACTOR),
+            column(Factors.EQUIPMENT_ERECTION_FACTOR),
+            column(Factors.PIPING_FACTOR),
+            column(Factors.INSTRUMENTATION_AND_CONTROL_FACTOR),
+            column(Factors.ELECTRICAL_FACTOR),
+            column(Factors.CIVIL_FACTOR),
+            column(Factors.STRUCTURES_AND_BUILDINGS_FACTOR),
+            column(Factors.LAGGING_AND_PAINT_FACTOR),
+        )
+        installed = purchased * column(Factors.INSTALLATION_FACTOR)
+        is_hand = column(Factors.METHOD) == Methods.HAND
+        isbl = np.where(is_hand, installed, factorial_isbl)
+        total = np.where(
+            is_hand,
+            installed,
+            total_fixed_capital_cost(
+                isbl,
+                column(Factors.OFFSITES_FACTOR),
+                column(Factors.DESIGN_AND_ENGINEERING_FACTOR),
+                column(Factors.CONTINGENCY),
+                column(Factors.LOCATION_FACTOR),
+            ),
+        )
+
+    return {
+        "isbl_cost": isbl.sum(axis=1),
+        "total_fixed_capital_cost": total.sum(axis=1),
+    }
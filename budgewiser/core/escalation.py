@@ -0,0 +1,60 @@
+"""
+budgewiser.core.escalation
+
+This module escalates costs between cost index bases. Costs scale linearly
+with the index, so re-basing any number of costs, e.g. a whole project or a
+whole catalog column, is one array multiplication.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from budgewiser.catalog.cost_index import get_cost_index
+from budgewiser.catalog.materials import MATERIALS_BASE_INDEX
+
+# CEPCI that costs are escalated to when no target is given
+DEFAULT_TARGET_INDEX = 800.0
+
+
+def target_index(
+    target_year: Optional[float] = None, target_index: Optional[float] = None
+) -> float:
+    """
+    Resolves the cost index that costs are escalated to.
+
+    Args:
+        target_year (float, optional): Year looked up in the cost index series.
+        target_index (float, optional): Cost index value.
+
+    Returns:
+        float: The target index, DEFAULT_TARGET_INDEX if neither is given.
+
+    Raises:
+        ValueError: If both are given, the index is not positive or the year
+            lies outside the series.
+    """
+    if target_year is not None and target_index is not None:
+        raise ValueError("Give either a target year or a target index, not both.")
+    if target_year is not None:
+        return get_cost_index().at(target_year)
+    if target_index is None:
+        return DEFAULT_TARGET_INDEX
+    if not target_index > 0:
+        raise ValueError("The target cost index must be a positive number.")
+    return float(target_index)
+
+
+def escalate(costs, base_index, target_index):
+    """
+    Escalates costs from their base index to a target index.
+
+    Args:
+        costs (float or np.ndarray): Costs at the base index.
+        base_index (float or np.ndarray): Base index, per cost or shared.
+        target_index (float or np.ndarray): Target index, per cost or shared.
+
+    Returns:
+        float or np.ndarray: The costs at the target index.
+    """
+    return np.asarray(costs) * target_index / base_index
@@ -0,0 +1,263 @@
+"""
+budgewiser.core.montecarlo
+
+This module contains the Monte Carlo uncertainty engine for the factorial
+method. Each installation factor and the correlation exponent n is sampled
+from a configurable distribution around its catalog value, and the resulting
+ISBL and total fixed capital costs are summarised as percentiles and
+histograms.
+
+Samples are generated and costed in chunks, so memory stays bounded however
+many samples are requested.
+"""
+
+from typing import Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from budgewiser.catalog import MaterialCatalog, get_catalog
+from budgewiser.core import engine, escalation
+from budgewiser.core.definitions import Factors
+
+
+class Distribution(NamedTuple):
+    """
+    Relative uncertainty of a sampled term. Samples are the catalog value
+    times a multiplier drawn around 1.
+
+    Attributes:
+        kind (str): "triangular" or "uniform" (multiplier within 1 +/- spread),
+            "normal" (standard deviation spread) or "fixed" (no uncertainty).
+        spread (float): Relative spread of the multiplier.
+    """
+
+    kind: str = "triangular"
+    spread: float = 0.2
+
+
+# Terms of the factorial formula that are sampled
+SAMPLED_TERMS = (
+    Factors.N,
+    Factors.INSTALLATION_FACTOR,
+    Factors.MATERIAL_FACTOR,
+    Factors.EQUIPMENT_ERECTION_FACTOR,
+    Factors.PIPING_FACTOR,
+    Factors.INSTRUMENTATION_AND_CONTROL_FACTOR,
+    Factors.ELECTRICAL_FACTOR,
+    Factors.CIVIL_FACTOR,
+    Factors.STRUCTURES_AND_BUILDINGS_FACTOR,
+    Factors.LAGGING_AND_PAINT_FACTOR,
+    Factors.OFFSITES_FACTOR,
+    Factors.DESIGN_AND_ENGINEERING_FACTOR,
+    Factors.CONTINGENCY,
+    Factors.LOCATION_FACTOR,
+)
+
+DEFAULT_DISTRIBUTIONS: Dict[str, Distribution] = {
+    term: Distribution() for term in SAMPLED_TERMS
+}
+DEFAULT_DISTRIBUTIONS[Factors.N] = Distribution("triangular", 0.1)
+DEFAULT_DISTRIBUTIONS[Factors.LOCATION_FACTOR] = Distribution("triangular", 0.05)
+
+OUTPUTS = ("isbl_cost", "total_fixed_capital_cost")
+PERCENTILES = (10, 50, 90)
+# Resolution of the streaming histogram the percentiles are read from
+QUANTILE_BINS = 8192
+
+
+def sample_multipliers(rng, distribution: Distribution, size: int) -> np.ndarray:
+    """
+    Draws multipliers around 1 for a distribution.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        distribution (Distribution): The distribution to sample.
+        size (int): Number of samples.
+
+    Returns:
+        np.ndarray: The multipliers.
+
+    Raises:
+        ValueError: If the distribution kind is unknown.
+    """
+    kind, spread = distribution
+    if kind == "fixed" or spread == 0:
+        return np.ones(size)
+    if kind == "triangular":
+        # The sum of two uniforms is triangular, and much faster than
+        # rng.triangular; single precision is plenty for a multiplier.
+        uniforms = rng.random((2, size), dtype=np.float32)
+        multipliers = uniforms[0]
+        multipliers += uniforms[1]
+        multipliers -= 1
+    elif kind == "uniform":
+        multipliers = rng.random(size, dtype=np.float32)
+        multipliers *= 2
+        multipliers -= 1
+    elif kind == "normal":
+        return rng.normal(1, spread, size)
+    else:
+        raise ValueError(f"Unknown distribution kind: {kind}")
+    multipliers *= spread
+    multipliers += 1
+    return multipliers
+
+
+def cost_samples(
+    positions: np.ndarray,
+    sizing_values: np.ndarray,
+    size: int,
+    rng,
+    distributions: Dict[str, Distribution],
+    catalog: MaterialCatalog,
+    target_index: float = escalation.DEFAULT_TARGET_INDEX,
+) -> Dict[str, np.ndarray]:
+    """
+    Costs one chunk of samples of a set of equipment items.
+
+    Each sample draws one multiplier per term that applies to all items, and
+    the item costs are summed per sample (see engine.cost_cases).
+
+    Returns:
+        dict: "isbl_cost" and "total_fixed_capital_cost" sample arrays.
+    """
+    multipliers = {}
+    for name in SAMPLED_TERMS:
+        # Terms not used by any of the items, e.g. the installation factor of
+        # the material factors method, are not sampled
+        if not np.isnan(catalog.column(name)[positions]).all():
+            multipliers[name] = sample_multipliers(rng, distributions[name], size)
+    if not multipliers:
+        multipliers[Factors.N] = np.ones(size)
+    return engine.cost_cases(
+        positions, sizing_values, multipliers, catalog, target_index=target_index
+    )
+
+
+class _StreamingHistogram:
+    """Fixed-bin histogram whose range is set by the first chunk it sees."""
+
+    def __init__(self, first_chunk: np.ndarray, bins: int):
+        low, high = float(first_chunk.min()), float(first_chunk.max())
+        margin = max(high - low, abs(high) * 1e-9, 1e-12)
+        self.edges = np.linspace(low - margin, high + margin, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.total = 0.0
+        self.n = 0
+        self.add(first_chunk)
+
+    def add(self, chunk: np.ndarray):
+        # Samples outside the range fall into the outermost bins
+        index = np.searchsorted(self.edges, chunk, side="right") - 1
+        np.clip(index, 0, len(self.counts) - 1, out=index)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+        self.total += float(chunk.sum())
+        self.n += len(chunk)
+
+    def percentile(self, q: float) -> float:
+        cumulative = np.cumsum(self.counts)
+        target = q / 100 * self.n
+        i = int(np.searchsorted(cumulative, target))
+        below = cumulative[i - 1] if i > 0 else 0
+        fraction = (target - below) / max(self.counts[i], 1)
+        return float(self.edges[i] + fraction * (self.edges[i + 1] - self.edges[i]))
+
+    def rebin(self, bins: int) -> Dict[str, list]:
+        factor = len(self.counts) // bins
+        counts = self.counts[: factor * bins].reshape(bins, factor).sum(axis=1)
+        counts[-1] += self.counts[factor * bins :].sum()
+        edges = self.edges[: factor * bins + 1 : factor].copy()
+        edges[-1] = self.edges[-1]
+        return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+
+def simulate(
+    positions,
+    sizing_values,
+    samples: int = 100_000,
+    distributions: Optional[Dict[str, Distribution]] = None,
+    bins: int = 64,
+    chunk_size: int = 1_000_000,
+    seed: Optional[int] = None,
+    catalog: Optional[MaterialCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, dict]:
+    """
+    Runs a Monte Carlo simulation of the ISBL and total fixed capital cost of
+    a set of equipment items.
+
+    Args:
+        positions (array-like): Catalog row position per item.
+        sizing_values (array-like): Sizing value per item.
+        samples (int): Number of samples.
+        distributions (dict, optional): Distribution per term of SAMPLED_TERMS;
+            terms not given use DEFAULT_DISTRIBUTIONS.
+        bins (int): Number of bins of the returned histograms.
+        chunk_size (int): Maximum number of item costs evaluated at once.
+        seed (int, optional): Seed of the random generator.
+        catalog (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+        progress (callable, optional): Called with the number of samples done
+            and the total after each chunk.
+
+    Returns:
+        dict: Per output ("isbl_cost", "total_fixed_capital_cost") the mean,
+            "p10", "p50", "p90" and a "histogram" with "counts" and "edges".
+            Percentiles are exact when all samples fit in one chunk, otherwise
+            they are read from a streaming histogram of QUANTILE_BINS bins.
+    """
+    catalog = catalog if catalog is not None else get_catalog()
+    index = escalation.target_index(target_year, target_index)
+    positions = np.asarray(positions, dtype=np.intp)
+    sizing_values = np.asarray(sizing_values, dtype=float)
+    distributions = {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}
+    rng = np.random.default_rng(seed)
+    samples_per_chunk = max(1, chunk_size // max(len(positions), 1))
+
+    if samples <= samples_per_chunk:
+        chunk = cost_samples(
+            positions, sizing_values, samples, rng, distributions, catalog, index
+        )
+        if progress:
+            progress(samples, samples)
+        result = {}
+        for output in OUTPUTS:
+            values = chunk[output]
+            counts, edges = np.histogram(values, bins=bins)
+            result[output] = {
+                "mean": float(values.mean()),
+                **{
+                    f"p{q}": float(value)
+                    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+                },
+                "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+            }
+        return result
+
+    histograms = {}
+    remaining = samples
+    while remaining > 0:
+        size = min(samples_per_chunk, remaining)
+        chunk = cost_samples(
+            positions, sizing_values, size, rng, distributions, catalog, index
+        )
+        for output in OUTPUTS:
+            if output in histograms:
+                histograms[output].add(chunk[output])
+            else:
+                histograms[output] = _StreamingHistogram(chunk[output], QUANTILE_BINS)
+        remaining -= size
+        if progress:
+            progress(samples - remaining, samples)
+
+    return {
+        output: {
+            "mean": histogram.total / histogram.n,
+            **{f"p{q}": histogram.percentile(q) for q in PERCENTILES},
+            "histogram": histogram.rebin(bins),
+        }
+        for output, histogram in histograms.items()
+    }
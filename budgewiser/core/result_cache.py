@@ -0,0 +1,176 @@
+"""
+budgewiser.core.result_cache
+
+This module memoizes equipment item cost results in front of the cost engine.
+Results are keyed by the cost relevant inputs of an item and the target cost
+index, held with least recently used eviction and a time to live, and dropped
+all at once when the catalog version they were computed against changes.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+# Bounds of the process-wide cache, can be overridden with
+# BUDGEWISER_RESULT_CACHE_SIZE and BUDGEWISER_RESULT_CACHE_TTL (seconds)
+RESULT_CACHE_SIZE = int(os.environ.get("BUDGEWISER_RESULT_CACHE_SIZE", 4096))
+RESULT_CACHE_TTL = float(os.environ.get("BUDGEWISER_RESULT_CACHE_TTL", 3600))
+
+_MISSING = object()
+
+
+def item_key(
+    kind: str,
+    target_index: float,
+    method,
+    plant_type,
+    equipment,
+    equipment_type,
+    sizing_value,
+    sizing_units=None,
+) -> Optional[Tuple[Hashable, ...]]:
+    """
+    Returns the cache key of an equipment item result.
+
+    Args:
+        kind (str): What the result is, e.g. "item" for the costs of an item.
+        target_index (float): Cost index the result is escalated to.
+        method, plant_type, equipment, equipment_type: Catalog keys.
+        sizing_value (float): The sizing value, as given.
+        sizing_units (str, optional): Units of the sizing value, None or ""
+            for the catalog units.
+
+    Returns:
+        tuple: The key, None if the inputs are not hashable.
+    """
+    key = (
+        kind,
+        float(target_index),
+        method,
+        plant_type,
+        equipment,
+        equipment_type,
+        float(sizing_value),
+        sizing_units or None,
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ResultCache:
+    """
+    A thread-safe least recently used cache with a time to live, bound to one
+    catalog version.
+
+    Values are dicts and are copied on the way in and out, so callers can
+    update the results they get without changing the cached ones.
+
+    Attributes:
+        maxsize (int): Maximum number of results held.
+        ttl (float): Seconds a result stays valid, None for no expiry.
+        version (str): Catalog version of the held results.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESULT_CACHE_SIZE,
+        ttl: Optional[float] = RESULT_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(
+            ("hits", "misses", "evictions", "expirations", "invalidations"), 0
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: str):
+        if version != self.version:
+            if self._entries:
+                self._counts["invalidations"] += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version: str, key: Hashable, default=None):
+        """
+        Returns a copy of the result held for key, or default. Results of
+        another catalog version are dropped first.
+        """
+        if key is None:
+            with self._lock:
+                self._counts["misses"] += 1
+            return default
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires, value = entry
+                if expires >= self._clock():
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return dict(value)
+                del self._entries[key]
+                self._counts["expirations"] += 1
+            self._counts["misses"] += 1
+            return default
+
+    def put(self, version: str, key: Hashable, value: dict):
+        """Holds a copy of a result, evicting the least recently used ones."""
+        if key is None or self.maxsize <= 0:
+            return
+        expires = self._clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (expires, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def clear(self):
+        """Drops all results, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        """Returns the counters, the size and the bounds of the cache."""
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "hit_rate": self._counts["hits"] / lookups if lookups else None,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "version": self.version,
+            }
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Returns the process-wide result cache, creating it on first use.
+
+    Returns:
+        ResultCache: The shared cache.
+    """
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
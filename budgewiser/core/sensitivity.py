@@ -0,0 +1,107 @@
+"""
+budgewiser.core.sensitivity
+
+This module contains the tornado (one-at-a-time) sensitivity analysis of the
+installation factors. Every factor is perturbed down and up by a relative
+amount and the impact on the total fixed capital cost is ranked. All
+perturbations are evaluated as one broadcast array computation.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from budgewiser.catalog import MaterialCatalog, get_catalog
+from budgewiser.core import engine
+from budgewiser.core.definitions import Factors
+
+# Terms of the factorial formula that are perturbed
+SENSITIVITY_TERMS = (
+    Factors.INSTALLATION_FACTOR,
+    Factors.MATERIAL_FACTOR,
+    Factors.EQUIPMENT_ERECTION_FACTOR,
+    Factors.PIPING_FACTOR,
+    Factors.INSTRUMENTATION_AND_CONTROL_FACTOR,
+    Factors.ELECTRICAL_FACTOR,
+    Factors.CIVIL_FACTOR,
+    Factors.STRUCTURES_AND_BUILDINGS_FACTOR,
+    Factors.LAGGING_AND_PAINT_FACTOR,
+    Factors.OFFSITES_FACTOR,
+    Factors.DESIGN_AND_ENGINEERING_FACTOR,
+    Factors.CONTINGENCY,
+    Factors.LOCATION_FACTOR,
+)
+
+
+def tornado(
+    positions,
+    sizing_values,
+    perturbation: float = 0.1,
+    terms=SENSITIVITY_TERMS,
+    catalog: Optional[MaterialCatalog] = None,
+    target_year: Optional[float] = None,
+    target_index: Optional[float] = None,
+) -> Dict[str, object]:
+    """
+    Ranks the impact of each term on the total fixed capital cost of a set of
+    equipment items.
+
+    Case 0 is the base case; cases 2i+1 and 2i+2 scale term i by
+    (1 - perturbation) and (1 + perturbation), all other terms unchanged.
+
+    Args:
+        positions (array-like): Catalog row position per item.
+        sizing_values (array-like): Sizing value per item.
+        perturbation (float): Relative perturbation, e.g. 0.1 for +/-10%.
+        terms (tuple): Catalog columns to perturb.
+        catalog (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        target_year (float, optional): Year to escalate the costs to.
+        target_index (float, optional): Cost index to escalate the costs to.
+
+    Returns:
+        dict: "base" costs and "terms", a list sorted by descending "swing" of
+            dicts with the term name and the ISBL and total fixed capital cost
+            at the low and high perturbation.
+    """
+    terms = tuple(terms)
+    cases = 2 * len(terms) + 1
+    # One column of multipliers per term, one row per case
+    multipliers = np.ones((cases, len(terms)))
+    for i in range(len(terms)):
+        multipliers[2 * i + 1, i] = 1 - perturbation
+        multipliers[2 * i + 2, i] = 1 + perturbation
+
+    results = engine.cost_cases(
+        positions,
+        sizing_values,
+        {term: multipliers[:, i] for i, term in enumerate(terms)},
+        catalog if catalog is not None else get_catalog(),
+        target_year,
+        target_index,
+    )
+    isbl = results["isbl_cost"]
+    total = results["total_fixed_capital_cost"]
+
+    ranking: List[dict] = []
+    for i, term in enumerate(terms):
+        low, high = 2 * i + 1, 2 * i + 2
+        ranking.append(
+            {
+                "term": term,
+                "isbl_low": float(isbl[low]),
+                "isbl_high": float(isbl[high]),
+                "total_low": float(total[low]),
+                "total_high": float(total[high]),
+                "swing": float(abs(total[high] - total[low])),
+            }
+        )
+    ranking.sort(key=lambda row: row["swing"], reverse=True)
+
+    return {
+        "perturbation": perturbation,
+        "base": {
+            "isbl_cost": float(isbl[0]),
+            "total_fixed_capital_cost": float(total[0]),
+        },
+        "terms": ranking,
+    }
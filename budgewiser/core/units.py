@@ -0,0 +1,388 @@
+"""
+budgewiser.core.units
+
+This module parses the free text units of the cost databases, e.g. "kg/h",
+"liters/s", "(gal/min)*(ft).5" or "2.5 kPa-g", into a factor to SI units and
+a canonical SI dimension, and converts sizing values between units in array
+form. Each distinct unit text is parsed once.
+"""
+
+import functools
+import math
+import re
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+# Unit symbol -> (factor to SI, SI dimension)
+UNIT_SYMBOLS: Dict[str, Tuple[float, Dict[str, float]]] = {
+    # Length
+    "m": (1.0, {"m": 1}),
+    "km": (1e3, {"m": 1}),
+    "dm": (1e-1, {"m": 1}),
+    "cm": (1e-2, {"m": 1}),
+    "mm": (1e-3, {"m": 1}),
+    "ft": (0.3048, {"m": 1}),
+    "in": (0.0254, {"m": 1}),
+    # Mass; "ton" is the US short ton used alongside lb in the capital database
+    "kg": (1.0, {"kg": 1}),
+    "g": (1e-3, {"kg": 1}),
+    "mg": (1e-6, {"kg": 1}),
+    "Mg": (1e3, {"kg": 1}),
+    "t": (1e3, {"kg": 1}),
+    "ton": (907.18474, {"kg": 1}),
+    "lb": (0.45359237, {"kg": 1}),
+    # Time
+    "s": (1.0, {"s": 1}),
+    "min": (60.0, {"s": 1}),
+    "h": (3600.0, {"s": 1}),
+    "hr": (3600.0, {"s": 1}),
+    "d": (86400.0, {"s": 1}),
+    "day": (86400.0, {"s": 1}),
+    # Volume
+    "L": (1e-3, {"m": 3}),
+    "gal": (3.785411784e-3, {"m": 3}),
+    # Gas volume at normal conditions
+    "Nm3": (1.0, {"Nm3": 1}),
+    "Ndm3": (1e-3, {"Nm3": 1}),
+    # Energy and power
+    "J": (1.0, {"kg": 1, "m": 2, "s": -2}),
+    "kJ": (1e3, {"kg": 1, "m": 2, "s": -2}),
+    "Btu": (1055.05585262, {"kg": 1, "m": 2, "s": -2}),
+    "W": (1.0, {"kg": 1, "m": 2, "s": -3}),
+    "kW": (1e3, {"kg": 1, "m": 2, "s": -3}),
+    "MW": (1e6, {"kg": 1, "m": 2, "s": -3}),
+    "hp": (745.69987158227022, {"kg": 1, "m": 2, "s": -3}),
+    # Pressure
+    "Pa": (1.0, {"kg": 1, "m": -1, "s": -2}),
+    "kPa": (1e3, {"kg": 1, "m": -1, "s": -2}),
+    "MPa": (1e6, {"kg": 1, "m": -1, "s": -2}),
+    "bar": (1e5, {"kg": 1, "m": -1, "s": -2}),
+    "psi": (6894.757293168, {"kg": 1, "m": -1, "s": -2}),
+    "torr": (101325 / 760, {"kg": 1, "m": -1, "s": -2}),
+}
+# Spellings of unit symbols
+UNIT_ALIASES = {
+    "liter": "L",
+    "liters": "L",
+    "litre": "L",
+    "litres": "L",
+    "l": "L",
+}
+# Named SI units of canonical dimensions
+NAMED_DIMENSIONS = {
+    (("kg", 1.0), ("m", 2.0), ("s", -3.0)): "W",
+    (("kg", 1.0), ("m", 2.0), ("s", -2.0)): "J",
+    (("kg", 1.0), ("m", -1.0), ("s", -2.0)): "Pa",
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<number>\d+(?:/\d+)?(?:\.\d*)?|\.\d+)|(?P<symbol>[A-Za-z]+)"
+    r"|(?P<op>[*/^()\-]))"
+)
+_QUALIFIER = re.compile(r"-\s*(?:g|a|abs)\s*$")
+
+
+class Unit(NamedTuple):
+    """A parsed unit: its text, factor to SI units and SI dimension."""
+
+    text: str
+    factor: float
+    dimension: Tuple[Tuple[str, float], ...]
+
+    @property
+    def canonical(self) -> str:
+        """The SI unit that factor converts to, e.g. "kg/s" or "W"."""
+        return format_dimension(self.dimension)
+
+
+def format_dimension(dimension: Tuple[Tuple[str, float], ...]) -> str:
+    """Formats an SI dimension as a unit text, e.g. (("kg", 1), ("s", -1)) -> "kg/s"."""
+    if dimension in NAMED_DIMENSIONS:
+        return NAMED_DIMENSIONS[dimension]
+
+    def power(name, exponent):
+        exponent = abs(exponent)
+        return name if exponent == 1 else f"{name}{exponent:g}"
+
+    numerator = [power(name, e) for name, e in dimension if e > 0]
+    denominator = [power(name, e) for name, e in dimension if e < 0]
+    text = "*".join(numerator) or "1"
+    if len(denominator) == 1:
+        text += "/" + denominator[0]
+    elif denominator:
+        text += "/(" + "*".join(denominator) + ")"
+    return text
+
+
+def _normalize(text: str) -> str:
+    text = text.strip()
+    text = re.sub(r"^S\s*=\s*", "", text)
+    text = text.replace("²", "2").replace("³", "3").replace("·", "*")
+    # "in." is inches, not a decimal point
+    text = re.sub(r"\bin\.", "in", text)
+    # Gauge and absolute pressures convert alike, the qualifier is dropped
+    return _QUALIFIER.sub("", text)
+
+
+def _tokenize(text: str):
+    tokens, position = [], 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unknown character in unit {text!r} at {position}.")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser of products and quotients of unit powers."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> Tuple[float, Dict[str, float]]:
+        factor = 1.0
+        # A leading number scales the unit, e.g. "1.5 MPa"
+        if self.peek()[0] == "number":
+            factor = _number(self.take()[1])
+        unit_factor, dimension = self.expression()
+        if self.peek()[0] is not None:
+            raise ValueError(f"Unexpected {self.peek()[1]!r} in unit {self.text!r}.")
+        return factor * unit_factor, dimension
+
+    def expression(self):
+        factor, dimension = self.power()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            sign = 1 if self.take()[1] == "*" else -1
+            other_factor, other = self.power()
+            factor *= other_factor**sign
+            dimension = _combine(dimension, other, sign)
+        return factor, dimension
+
+    def power(self):
+        kind, value = self.take()
+        if (kind, value) == ("op", "("):
+            factor, dimension = self.expression()
+            if self.take() != ("op", ")"):
+                raise ValueError(f"Unbalanced parentheses in unit {self.text!r}.")
+        elif kind == "symbol":
+            value = UNIT_ALIASES.get(value, value)
+            # Normal cubic metres are one symbol
+            if value in ("Nm", "Ndm") and self.peek() == ("number", "3"):
+                self.take()
+                value += "3"
+            if value not in UNIT_SYMBOLS:
+                raise ValueError(f"Unknown unit {value!r} in {self.text!r}.")
+            factor, dimension = UNIT_SYMBOLS[value]
+        else:
+            raise ValueError(f"Unexpected {value!r} in unit {self.text!r}.")
+
+        exponent = self.exponent()
+        if exponent != 1:
+            factor = factor**exponent
+            dimension = {name: e * exponent for name, e in dimension.items()}
+        return factor, dict(dimension)
+
+    def exponent(self) -> float:
+        # Exponents follow the unit directly, e.g. "m2.5", "m5/2", "(ft).5",
+        # "cm-1.5" or "ft^0.317"
+        sign = 1
+        if self.peek() == ("op", "^"):
+            self.take()
+        if self.peek() == ("op", "-") and self.position + 1 < len(self.tokens):
+            if self.tokens[self.position + 1][0] == "number":
+                self.take()
+                sign = -1
+        if self.peek()[0] == "number":
+            return sign * _number(self.take()[1])
+        return 1
+
+
+def _number(text: str) -> float:
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return float(numerator) / float(denominator)
+    return float(text)
+
+
+def _combine(dimension: Dict[str, float], other: Dict[str, float], sign: int):
+    combined = dict(dimension)
+    for name, exponent in other.items():
+        combined[name] = combined.get(name, 0) + sign * exponent
+    return combined
+
+
+@functools.lru_cache(maxsize=None)
+def parse_unit(text: str) -> Unit:
+    """
+    Parses a unit text into its factor to SI units and SI dimension.
+
+    Args:
+        text (str): The unit, e.g. "kg/h", "m³", "(gal/min)*(ft).5" or "1.5 MPa".
+
+    Returns:
+        Unit: The parsed unit.
+
+    Raises:
+        ValueError: If the unit cannot be parsed.
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("The unit is empty.")
+    factor, dimension = _Parser(_normalize(text)).parse()
+    dimension = tuple(
+        sorted(
+            (name, float(round(exponent, 9)))
+            for name, exponent in dimension.items()
+            if not math.isclose(exponent, 0, abs_tol=1e-9)
+        )
+    )
+    return Unit(text, factor, dimension)
+
+
+def unit_factors(units) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parses an array of unit texts, each distinct text once.
+
+    Args:
+        units (array-like): Unit texts.
+
+    Returns:
+        tuple: The factors to SI units (NaN where a unit cannot be parsed) and
+            the canonical SI units ("" where a unit cannot be parsed).
+    """
+    units = np.asarray(units, dtype=str)
+    distinct, inverse = np.unique(units, return_inverse=True)
+    factors = np.full(len(distinct), np.nan)
+    canonical = np.empty(len(distinct), dtype=object)
+    for i, text in enumerate(distinct.tolist()):
+        try:
+            unit = parse_unit(text)
+        except ValueError:
+            canonical[i] = ""
+            continue
+        factors[i] = unit.factor
+        canonical[i] = unit.canonical
+    canonical = canonical.astype(str)
+    return factors[inverse].reshape(units.shape), canonical[inverse].reshape(
+        units.shape
+    )
+
+
+def convert(values, from_units, to_units, strict: bool = True) -> np.ndarray:
+    """
+    Converts values between units, element-wise over arrays.
+
+    Args:
+        values (array-like): Values in from_units.
+        from_units (str or array-like): Unit of each value, or one unit for all.
+        to_units (str or array-like): Target unit of each value, or one for all.
+        strict (bool): Raise on units that cannot be parsed or converted; if
+            False such values become NaN.
+
+    Returns:
+        np.ndarray: The values in to_units.
+
+    Raises:
+        ValueError: If strict and a unit cannot be parsed or its dimension does
+            not match the target unit.
+    """
+    to_factors, to_canonical = unit_factors(to_units)
+    return convert_to(values, from_units, to_factors, to_canonical, strict)
+
+
+def convert_to(
+    values, from_units, to_factors, to_canonical, strict: bool = True
+) -> np.ndarray:
+    """
+    Converts values to target units that were parsed before with
+    unit_factors, e.g. the units of catalog rows.
+
+    Args:
+        values (array-like): Values in from_units.
+        from_units (str or array-like): Unit of each value, or one unit for all.
+        to_factors (np.ndarray): Factors to SI units of the target units.
+        to_canonical (np.ndarray): Canonical SI units of the target units.
+        strict (bool): Raise on units that cannot be parsed or converted; if
+            False such values become NaN.
+
+    Returns:
+        np.ndarray: The values in the target units.
+
+    Raises:
+        ValueError: If strict and a unit cannot be parsed or its dimension does
+            not match the target unit.
+    """
+    values = np.asarray(values, dtype=float)
+    from_factors, from_canonical = unit_factors(from_units)
+    valid = (
+        ~np.isnan(from_factors)
+        & ~np.isnan(to_factors)
+        & (from_canonical == to_canonical)
+    )
+    if strict and not valid.all():
+        sources, targets = np.broadcast_arrays(
+            np.asarray(from_units, dtype=str), np.asarray(to_canonical, dtype=str)
+        )
+        invalid = sorted(set(zip(sources[~valid].tolist(), targets[~valid].tolist())))
+        raise ValueError(
+            "Cannot convert "
+            + ", ".join(
+                f"{source!r} to {target or 'an unknown unit'!r}"
+                for source, target in invalid
+            )
+            + "."
+        )
+    with np.errstate(invalid="ignore"):
+        return np.where(valid, values * from_factors / to_factors, np.nan)
+
+
+def convert_sizes(
+    values, units, to_factors, to_canonical, strict: bool = True
+) -> np.ndarray:
+    """
+    Converts sizing values to the units of catalog rows. Values without a
+    unit (None or "") are taken to be in the row units already.
+
+    Args:
+        values (array-like): Sizing values.
+        units (str or array-like): Unit of each value, or one unit for all.
+        to_factors (np.ndarray): Factors to SI units of the row units.
+        to_canonical (np.ndarray): Canonical SI units of the row units.
+        strict (bool): Raise on units that cannot be converted; if False such
+            values become NaN.
+
+    Returns:
+        np.ndarray: The sizing values in the row units.
+
+    Raises:
+        ValueError: If strict and a unit cannot be converted.
+    """
+    values = np.array(values, dtype=float)
+    units = np.broadcast_to(np.asarray(units, dtype=object), values.shape)
+    given = np.array([bool(unit) for unit in units.ravel()], dtype=bool).reshape(
+        values.shape
+    )
+    if given.any():
+        values[given] = convert_to(
+            values[given],
+            units[given].astype(str),
+            np.broadcast_to(to_factors, values.shape)[given],
+            np.broadcast_to(to_canonical, values.shape)[given],
+            strict,
+        )
+    return values
@@ -0,0 +1,72 @@
+"""
+budgewiser.jobs
+
+This module runs the long running callbacks of the pages as Dash background
+callbacks, in worker processes managed through a disk cache, so they do not
+block the server and need no external broker. Jobs report their progress to
+a progress bar and can be cancelled.
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import diskcache
+from dash import DiskcacheManager, Output, html
+
+from budgewiser.catalog.snapshot import SNAPSHOT_DIR
+
+# Directory of the job cache, can be overridden with BUDGEWISER_JOB_DIR
+JOB_DIR = Path(os.environ.get("BUDGEWISER_JOB_DIR", SNAPSHOT_DIR / "jobs"))
+# Seconds the result of a job is kept for the browser to collect it
+JOB_EXPIRE = 3600
+
+JOB_SHOWN = {"display": "flex"}
+JOB_HIDDEN = {"display": "none"}
+
+
+def background_callback_manager(directory: Path = JOB_DIR) -> DiskcacheManager:
+    """Returns the manager of the background callbacks of the app."""
+    return DiskcacheManager(diskcache.Cache(str(directory)), expire=JOB_EXPIRE)
+
+
+def job_layout(container_id: str, progress_id: str, cancel_id: str) -> html.Div:
+    """
+    Returns the progress bar and cancel button of a background job, hidden
+    while the job is not running.
+    """
+    return html.Div(
+        [
+            html.Progress(id=progress_id, value="0", max="1", className="w-full"),
+            html.Button(
+                "Cancel",
+                id=cancel_id,
+                className="bg-gray-500 text-white px-2",
+            ),
+        ],
+        id=container_id,
+        className="items-center gap-2 px-6 pb-2 w-96",
+        style=JOB_HIDDEN,
+    )
+
+
+def job_running(container_id: str) -> List[Tuple[Output, dict, dict]]:
+    """Returns the running argument of a background callback for job_layout."""
+    return [(Output(container_id, "style"), JOB_SHOWN, JOB_HIDDEN)]
+
+
+def job_progress(progress_id: str) -> List[Output]:
+    """Returns the progress argument of a background callback for job_layout."""
+    return [Output(progress_id, "value"), Output(progress_id, "max")]
+
+
+def progress_reporter(set_progress) -> Callable[[int, int], None]:
+    """
+    Adapts the set_progress function of a background callback to a
+    progress(done, total) callback, as taken by the engine functions.
+    """
+
+    def progress(done: int, total: int):
+        set_progress((str(done), str(total)))
+
+    return progress
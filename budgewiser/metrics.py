@@ -0,0 +1,194 @@
+"""
+budgewiser.metrics
+
+This module instruments the server side Dash callbacks of the app. Every
+callback request records its wall time and its request and response payload
+sizes, per callback and triggering input, into histograms that are served as
+Prometheus text metrics, e.g. under /budgewiser/_metrics.
+
+Metrics are held per server process.
+"""
+
+import bisect
+import json
+import math
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from flask import Response, g, request
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(256 * 4**i for i in range(9))  # 256 B to 16 MiB
+
+DISPATCH_PATH = "_dash-update-component"
+# Trigger label of pattern-matching IDs without a type
+PATTERN_TRIGGER = "{pattern}"
+
+# Histogram name -> (help text, buckets)
+HISTOGRAMS = {
+    "budgewiser_callback_duration_seconds": (
+        "Wall time of Dash callback requests.",
+        DURATION_BUCKETS,
+    ),
+    "budgewiser_callback_request_bytes": (
+        "Payload size of Dash callback requests.",
+        BYTES_BUCKETS,
+    ),
+    "budgewiser_callback_response_bytes": (
+        "Payload size of Dash callback responses.",
+        BYTES_BUCKETS,
+    ),
+}
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == math.inf else f"{bound:g}"
+            yield f'{name}_bucket{{{labels},le="{le}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum:g}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CallbackMetrics:
+    """
+    Thread-safe histograms of the callback requests, keyed by callback and
+    triggering input.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], Dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        callback: str,
+        trigger: str,
+        seconds: float,
+        request_bytes: int,
+        response_bytes: int,
+    ):
+        """Records one callback request."""
+        with self._lock:
+            histograms = self._histograms.get((callback, trigger))
+            if histograms is None:
+                histograms = self._histograms[(callback, trigger)] = {
+                    name: Histogram(buckets)
+                    for name, (_, buckets) in HISTOGRAMS.items()
+                }
+            for name, value in zip(
+                HISTOGRAMS, (seconds, request_bytes, response_bytes)
+            ):
+                histograms[name].observe(value)
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            keys = sorted(self._histograms)
+            for name, (help_text, _) in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for callback, trigger in keys:
+                    labels = (
+                        f'callback="{_label(callback)}",trigger="{_label(trigger)}"'
+                    )
+                    lines.extend(
+                        self._histograms[(callback, trigger)][name].lines(name, labels)
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def callback_name(dash_app, output: str) -> str:
+    """
+    Returns a readable ID of the callback of an output, "<page>.<function>",
+    e.g. "bw-estimation.display_input", or the output itself if unknown.
+    """
+    function = dash_app.callback_map.get(output, {}).get("callback")
+    if function is None:
+        return output
+    module = getattr(function, "__module__", "") or ""
+    page = module.rpartition(".")[2]
+    return f"{page}.{function.__name__}" if page else function.__name__
+
+
+def _trigger(body: dict) -> str:
+    changed = body.get("changedPropIds") or []
+    if not changed:
+        return ""
+    component_id = changed[0].rpartition(".")[0]
+    # Pattern-matching IDs, e.g. {"index":3,"type":"..."}, are reduced to their
+    # type, so each index does not become a series of its own
+    if component_id.startswith("{"):
+        try:
+            return str(json.loads(component_id).get("type", PATTERN_TRIGGER))
+        except (ValueError, AttributeError):
+            return PATTERN_TRIGGER
+    return component_id
+
+
+def install_callback_metrics(
+    dash_app, path: str, metrics: Optional[CallbackMetrics] = None
+) -> CallbackMetrics:
+    """
+    Instruments the callback requests of a Dash app and serves the metrics.
+
+    Args:
+        dash_app (dash.Dash): The app, its callbacks may be registered later.
+        path (str): URL path of the metrics, e.g. "/budgewiser/_metrics".
+        metrics (CallbackMetrics, optional): Collector, a new one by default.
+
+    Returns:
+        CallbackMetrics: The collector.
+    """
+    metrics = metrics or CallbackMetrics()
+    server = dash_app.server
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith(DISPATCH_PATH):
+            g.budgewiser_callback_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        start = g.pop("budgewiser_callback_start", None)
+        if start is None:
+            return response
+        seconds = time.perf_counter() - start
+        body = request.get_json(silent=True) or {}
+        request_bytes = request.content_length or len(request.get_data())
+        response_bytes = response.calculate_content_length() or 0
+        metrics.observe(
+            callback_name(dash_app, body.get("output", "")),
+            _trigger(body),
+            seconds,
+            request_bytes,
+            response_bytes,
+        )
+        return response
+
+    def serve_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule(path, "budgewiser_metrics", serve_metrics)
+    return metrics
@@ -1,3 +1,4 @@
+import functools
 import os
 import traceback
 from typing import Final
@@ -12,12 +13,33 @@ from agility.components import (
     InputCustom,
     MessageCustom,
 )
-from dash import Dash, Input, Output, State, html
+from dash import (
+    ALL,
+    ClientsideFunction,
+    Dash,
+    Input,
+    Output,
+    Patch,
+    State,
+    ctx,
+    dcc,
+    html,
+)
 from dash.exceptions import PreventUpdate
+from plotly import graph_objects as go
 
-from budgewiser.config.main import DATA_STORE, STORE_ID
+from budgewiser.catalog import (
+    SOURCE_MATERIALS,
+    get_catalog,
+    range_index,
+    search_index,
+)
+from budgewiser.config.main import STORE_ID
+from budgewiser.jobs import job_layout, job_progress, job_running, progress_reporter
+from budgewiser.core import curves
 from budgewiser.core.definitions import Factors
 from budgewiser.project import estimation
+from budgewiser.project.store import snapshot, store_patch
 
 dash.register_page(__name__)
 app: Dash = dash.get_app()
@@ -34,6 +56,9 @@ class PageIDs:
         self.prefix: Final[str] = prefix
         self.status: Final[str] = f"{prefix}_status"
         self.input: Final[str] = f"{prefix}_input"
+        self.search_input: Final[str] = f"{prefix}_search_input"
+        self.search_results: Final[str] = f"{prefix}_search_results"
+        self.search_result: Final[str] = f"{prefix}_search_result"
         self.add_btn: Final[str] = f"{prefix}_add_btn"
         self.delete_btn: Final[str] = f"{prefix}_delete_btn"
         self.save_btn: Final[str] = f"{prefix}_save_btn"
@@ -41,9 +66,32 @@ class PageIDs:
         self.feedback_save: Final[str] = f"{prefix}_feedback_save"
         self.run_btn: Final[str] = f"{prefix}_run_btn"
         self.run_container: Final[str] = f"{prefix}_run_container"
+        self.run_request: Final[str] = f"{prefix}_run_request"
+        self.run_job: Final[str] = f"{prefix}_run_job"
+        self.run_progress: Final[str] = f"{prefix}_run_progress"
+        self.run_cancel_btn: Final[str] = f"{prefix}_run_cancel_btn"
         self.feedback_run: Final[str] = f"{prefix}_feedback_run"
         self.output: Final[str] = f"{prefix}_output"
-
+        self.cost_curve: Final[str] = f"{prefix}_cost_curve"
+        self.alternatives: Final[str] = f"{prefix}_alternatives"
+        self.monte_carlo_btn: Final[str] = f"{prefix}_monte_carlo_btn"
+        self.feedback_monte_carlo: Final[str] = f"{prefix}_feedback_monte_carlo"
+        self.monte_carlo_output: Final[str] = f"{prefix}_monte_carlo_output"
+        self.cascade_store: Final[str] = f"{prefix}_cascade_store"
+        self.loaded_slice: Final[str] = f"{prefix}_loaded_slice"
+        self.input_slice: Final[str] = f"{prefix}_input_slice"
+        self.output_slice: Final[str] = f"{prefix}_output_slice"
+        self.monte_carlo_slice: Final[str] = f"{prefix}_monte_carlo_slice"
+        self.cost_basis_slice: Final[str] = f"{prefix}_cost_basis_slice"
+        self.save_slot: Final[str] = f"{prefix}_save_slot"
+        self.run_slice: Final[str] = f"{prefix}_run_slice"
+        self.costing_slice: Final[str] = f"{prefix}_costing_slice"
+        self.catalog_version: Final[str] = f"{prefix}_catalog_version"
+        self.monte_carlo_job: Final[str] = f"{prefix}_monte_carlo_job"
+        self.monte_carlo_progress: Final[str] = f"{prefix}_monte_carlo_progress"
+        self.monte_carlo_cancel_btn: Final[str] = f"{prefix}_monte_carlo_cancel_btn"
+
+        self.item_id_input: Final[str] = f"{prefix}_item_id_input"
         self.method_dropdown: Final[str] = f"{prefix}_method_dropdown"
         self.plant_dropdown: Final[str] = f"{prefix}_plant_dropdown"
         self.equipment_dropdown: Final[str] = f"{prefix}_equipment_dropdown"
@@ -53,11 +101,53 @@ class PageIDs:
             f"{prefix}_purchased_equipment_cost_output"
         )
         self.total_cost_output: Final[str] = f"{prefix}_total_cost_output"
+        self.project_items_output: Final[str] = f"{prefix}_project_items_output"
+        self.project_cost_output: Final[str] = f"{prefix}_project_cost_output"
 
 
 ids = PageIDs()
 
 PAGE_TITLE = "Capital Cost Estimation"
+# Number of typeahead matches shown under the search box
+SEARCH_LIMIT = 8
+# Run costs more items than this as a background job, can be overridden with
+# BUDGEWISER_RUN_JOB_ITEMS
+RUN_JOB_ITEMS = int(os.environ.get("BUDGEWISER_RUN_JOB_ITEMS", 1000))
+
+
+def sizing_placeholder(row):
+    """Returns the sizing input help text of a catalog row."""
+    sizing_quantity = row[Factors.SIZING_QUANTITY]
+    units = row[Factors.UNITS]
+    s_lower = row[Factors.S_LOWER]
+    s_upper = row[Factors.S_UPPER]
+
+    if np.isnan(s_lower) or np.isnan(s_upper):
+        return f"Enter {sizing_quantity} in {units}"
+    return f"Enter {sizing_quantity} in {units} between {s_lower} and {s_upper}"
+
+
+@functools.lru_cache(maxsize=4)
+def cascade_tree(catalog):
+    """
+    Returns the dropdown cascade of a catalog as nested dicts method -> plant
+    type -> equipment -> equipment type -> sizing help text, in catalog order.
+    It is shipped to the browser with the page layout, where the clientside
+    callbacks in assets/budgewiser.js filter the dropdown options from it.
+    """
+
+    def walk(node, keys):
+        if len(keys) == 3:
+            return {
+                equipment_type: sizing_placeholder(
+                    catalog.lookup(*keys, equipment_type)
+                )
+                for equipment_type in node
+            }
+        return {key: walk(child, keys + (key,)) for key, child in node.items()}
+
+    return walk(catalog.cascade, ())
+
 
 layout = html.Div(
     [
@@ -71,10 +161,27 @@ layout = html.Div(
         ),
         html.Hr(),
         html.Div(id=ids.status),
+        html.Div(
+            [
+                dcc.Input(
+                    id=ids.search_input,
+                    type="search",
+                    placeholder="Search equipment, type or sizing quantity",
+                    debounce=False,
+                    className="w-full border border-gray-300 rounded px-2 py-1",
+                ),
+                html.Div(id=ids.search_results, className="flex flex-col"),
+            ],
+            className="px-6 pb-2 w-96",
+        ),
         html.Div(id=ids.input, className="px-6 pb-2 w-96"),
         html.Div(id=ids.save_container, className="px-6 pb-2 w-96"),
         html.Div(id=ids.feedback_save, className="px-6 pb-2 w-96"),
         html.Div(id=ids.run_container, className="px-6 pb-2 w-96"),
+        job_layout(ids.run_job, ids.run_progress, ids.run_cancel_btn),
+        job_layout(
+            ids.monte_carlo_job, ids.monte_carlo_progress, ids.monte_carlo_cancel_btn
+        ),
         html.Div(id=ids.feedback_run, className="px-6 pb-2 w-96"),
         # html.Div(id=ids.output, className="px-6 pb-2 w-60"),
         html.Div(
@@ -90,19 +197,74 @@ layout = html.Div(
                 "textAlign": "left",  # Center-align content within the Div
             },
         ),
+        html.Div(id=ids.cost_curve, className="px-6 pb-5"),
+        html.Div(id=ids.alternatives, className="px-6 pb-5 w-96"),
+        html.Div(id=ids.feedback_monte_carlo, className="px-6 pb-2 w-96"),
+        html.Div(id=ids.monte_carlo_output, className="px-6 pb-5"),
+        dcc.Store(id=ids.cascade_store, data=cascade_tree(get_catalog())),
+        dcc.Store(id=ids.loaded_slice),
+        dcc.Store(id=ids.input_slice),
+        dcc.Store(id=ids.output_slice),
+        dcc.Store(id=ids.monte_carlo_slice),
+        dcc.Store(id=ids.cost_basis_slice),
+        dcc.Store(id=ids.save_slot),
+        dcc.Store(id=ids.run_slice),
+        dcc.Store(id=ids.run_request),
+        dcc.Store(id=ids.costing_slice),
+        dcc.Store(id=ids.catalog_version, data=get_catalog().version),
     ],
     className="w-full",
 )
 
 
+# Clientside callbacks to split the project store into the slices that the
+# callbacks below depend on, so they only fire when their slice changes
+for slice_id, function_name in (
+    (ids.loaded_slice, "loadedSlice"),
+    (ids.input_slice, "inputSlice"),
+    (ids.output_slice, "outputSlice"),
+    (ids.monte_carlo_slice, "monteCarloSlice"),
+    (ids.cost_basis_slice, "costBasisSlice"),
+    (ids.costing_slice, "costingSlice"),
+):
+    app.clientside_callback(
+        ClientsideFunction(namespace="budgewiser", function_name=function_name),
+        Output(slice_id, "data"),
+        Input(STORE_ID, "data"),
+        State(slice_id, "data"),
+    )
+
+# The items Run costs depend on the catalog version the outputs were costed
+# against
+app.clientside_callback(
+    ClientsideFunction(namespace="budgewiser", function_name="runSlice"),
+    Output(ids.run_slice, "data"),
+    Input(STORE_ID, "data"),
+    State(ids.catalog_version, "data"),
+    State(ids.run_slice, "data"),
+)
+
+# A click on Save first looks up the slot of the item in the equipment list in
+# the browser, so save_data gets only the saved item rather than the list
+app.clientside_callback(
+    ClientsideFunction(namespace="budgewiser", function_name="saveSlot"),
+    Output(ids.save_slot, "data"),
+    Input(ids.save_btn, "n_clicks"),
+    State(ids.item_id_input, "value"),
+    State(STORE_ID, "data"),
+    prevent_initial_call=True,
+)
+
+
 # Callback to check if the project is loaded
 @app.callback(
     Output(ids.status, "children"),
-    Input(STORE_ID, "data"),
+    Input(ids.loaded_slice, "data"),
+    prevent_initial_call=True,
 )
-def load_status(data):
+def load_status(loaded):
     """loading the data"""
-    if data is None:
+    if not loaded:
         return MessageCustom(
             messages="Project not loaded. Go to start page and create new or open existing project.",
             success=False,
@@ -113,10 +275,10 @@ def load_status(data):
 @app.callback(
     Output(ids.input, "children"),
     Output(ids.save_container, "children"),
-    Input(STORE_ID, "data"),
-    State(DATA_STORE, "data"),
+    Input(ids.input_slice, "data"),
+    prevent_initial_call=True,
 )
-def display_input(data, material_data):
+def display_input(data):
     """displaying input"""
 
     if data is None:
@@ -124,29 +286,38 @@ def display_input(data, material_data):
 
     estimation_input = data.get("estimation_input", {})
     estimation_input, errors = estimation.validate_input(estimation_input)
-    df = pd.DataFrame(material_data)
+    catalog = get_catalog()
+    method = estimation_input.get("method", "")
+    plant_type = estimation_input.get("plant_type", "")
+    equipment = estimation_input.get("equipment", "")
 
     method_options = [
-        {"label": method, "value": method} for method in df[Factors.METHOD].unique()
+        {"label": method, "value": method} for method in catalog.methods()
     ]
 
     plant_options = [
-        {"label": plant, "value": plant} for plant in df[Factors.PLANT_TYPE].unique()
+        {"label": plant, "value": plant} for plant in catalog.plant_types(method)
     ]
 
     equipment_options = [
         {"label": equipment, "value": equipment}
-        for equipment in df[Factors.EQUIPMENT].unique()
+        for equipment in catalog.equipment(method, plant_type)
     ]
 
     equipment_type_options = [
         {"label": equipment_type, "value": equipment_type}
-        for equipment_type in df[Factors.EQUIPMENT_TYPE].unique()
+        for equipment_type in catalog.equipment_types(method, plant_type, equipment)
     ]
 
     input_fields = html.Div(
         [
             html.H1("Input", className="dash-h1"),
+            InputCustom(
+                id=ids.item_id_input,
+                label="Item ID",
+                value=estimation_input.get("id", ""),
+                help_text="Saving with a new ID adds an item to the equipment list",
+            ).layout,
             DropdownCustom(
                 id=ids.method_dropdown,
                 label="Method",
@@ -195,128 +366,242 @@ def display_input(data, material_data):
     return input_fields, save_btn
 
 
-# Callbacks to update options based on selections
+# Typeahead search of the catalog, answered from the search index
 @app.callback(
-    Output(ids.plant_dropdown, "options"),
-    Input(ids.method_dropdown, "value"),
-    State(STORE_ID, "data"),
-    State(DATA_STORE, "data"),
+    Output(ids.search_results, "children"),
+    Input(ids.search_input, "value"),
+    prevent_initial_call=True,
 )
-def update_plant_options(method_choice, data, material_data):
-    if method_choice:
-        df = pd.DataFrame(material_data)
-        plant_types = (
-            df[df[Factors.METHOD] == method_choice][Factors.PLANT_TYPE]
-            .dropna()
-            .unique()
+def search_catalog(query):
+    matches = search_index().search(query or "", SEARCH_LIMIT, SOURCE_MATERIALS)
+    return [
+        html.Button(
+            f"{match['equipment'].strip()} - {match['equipment_type'].strip()} "
+            f"({match['method']}, {match['plant_type']})",
+            id={"type": ids.search_result, "index": match["position"]},
+            className="text-left px-2 py-1 hover:bg-gray-200",
         )
-        return [{"label": plant, "value": plant} for plant in plant_types]
-    return []
+        for match in matches
+    ]
 
 
+# Callback to fill the estimation input with the selected search match
 @app.callback(
+    Output(STORE_ID, "data", allow_duplicate=True),
+    Output(ids.search_input, "value"),
+    Input({"type": ids.search_result, "index": ALL}, "n_clicks"),
+    State(ids.input_slice, "data"),
+    prevent_initial_call=True,
+)
+def select_search_result(n_clicks, data):
+    if data is None or not any(n_clicks):
+        raise PreventUpdate
+    row = get_catalog().records[ctx.triggered_id["index"]]
+    estimation_input = dict(data.get("estimation_input") or {})
+    estimation_input.update(
+        {
+            "method": str(row[Factors.METHOD]),
+            "plant_type": str(row[Factors.PLANT_TYPE]),
+            "equipment": str(row[Factors.EQUIPMENT]),
+            "equipment_type": str(row[Factors.EQUIPMENT_TYPE]),
+        }
+    )
+    # Only the estimation input changes, so only it is sent back to the store
+    patch = Patch()
+    patch["estimation_input"] = estimation_input
+    return patch, ""
+
+
+# Clientside callbacks to update options based on selections, filtered in the
+# browser from the cascade store without a round trip to the server
+app.clientside_callback(
+    ClientsideFunction(namespace="budgewiser", function_name="plantOptions"),
+    Output(ids.plant_dropdown, "options"),
+    Input(ids.method_dropdown, "value"),
+    State(ids.cascade_store, "data"),
+)
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="budgewiser", function_name="equipmentOptions"),
     Output(ids.equipment_dropdown, "options"),
     Input(ids.plant_dropdown, "value"),
-    State(DATA_STORE, "data"),
+    State(ids.method_dropdown, "value"),
+    State(ids.cascade_store, "data"),
 )
-def update_equipment_options(plant_choice, material_data):
-    if plant_choice:
-        df = pd.DataFrame(material_data)
-        equipment_types = (
-            df[df[Factors.PLANT_TYPE] == plant_choice][Factors.EQUIPMENT]
-            .dropna()
-            .unique()
-        )
-        return [
-            {"label": equipment, "value": equipment} for equipment in equipment_types
-        ]
-    return []
 
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace="budgewiser", function_name="equipmentTypeOptions"),
     Output(ids.equipment_type_dropdown, "options"),
     [
         Input(ids.method_dropdown, "value"),
         Input(ids.plant_dropdown, "value"),
         Input(ids.equipment_dropdown, "value"),
-        Input(STORE_ID, "data"),
+        Input(ids.input_slice, "data"),
+    ],
+    State(ids.cascade_store, "data"),
+)
+
+
+# Update Sizing Label and Input Placeholder based on selected specific equipment type
+app.clientside_callback(
+    ClientsideFunction(namespace="budgewiser", function_name="sizingPlaceholder"),
+    Output(f"{ids.sizing_quantity_input}-hel", "value"),
+    [
+        Input(ids.method_dropdown, "value"),
+        Input(ids.plant_dropdown, "value"),
+        Input(ids.equipment_dropdown, "value"),
+        Input(ids.equipment_type_dropdown, "value"),
     ],
-    State(DATA_STORE, "data"),
+    State(ids.cascade_store, "data"),
 )
-def update_equipment_type_options(
-    method_choice, plant_choice, equipment_choice, _, material_data
+
+
+# Plot the cost-vs-size curve of the selected specific equipment type
+@app.callback(
+    Output(ids.cost_curve, "children"),
+    [
+        Input(ids.method_dropdown, "value"),
+        Input(ids.plant_dropdown, "value"),
+        Input(ids.equipment_dropdown, "value"),
+        Input(ids.equipment_type_dropdown, "value"),
+        Input(ids.sizing_quantity_input, "value"),
+    ],
+    State(ids.cost_basis_slice, "data"),
+)
+def update_cost_curve(
+    method_choice,
+    plant_choice,
+    equipment_choice,
+    type_choice,
+    sizing_value,
+    cost_basis_slice,
 ):
-    if method_choice and plant_choice and equipment_choice:
-        specific_types = (
-            estimation.filter_material_data(
-                material_data, method_choice, plant_choice, equipment_choice
-            )[Factors.EQUIPMENT_TYPE]
-            .dropna()
-            .unique()
+    if not (method_choice and plant_choice and equipment_choice and type_choice):
+        return None
+    try:
+        curve = curves.cost_curve(
+            method_choice,
+            plant_choice,
+            equipment_choice,
+            type_choice,
+            target_index=estimation.project_target_index(cost_basis_slice or {}),
         )
-        return [
-            {"label": equipment_type, "value": equipment_type}
-            for equipment_type in specific_types
-        ]
-    return []
+        selected_row = get_catalog().lookup(
+            method_choice, plant_choice, equipment_choice, type_choice
+        )
+    except (KeyError, ValueError):
+        # Stale selection, or no sizing range to sweep
+        return None
 
+    figure = go.Figure(
+        go.Scatter(
+            x=curve["sizing_values"],
+            y=curve["purchased_cost"],
+            mode="lines",
+            name="Purchased equipment cost",
+        )
+    )
+    if sizing_value:
+        figure.add_vline(x=sizing_value, line_dash="dash")
+    figure.update_layout(
+        xaxis_type="log",
+        xaxis_title=f"{selected_row[Factors.SIZING_QUANTITY]} ({selected_row[Factors.UNITS]})",
+        yaxis_title="Purchased equipment cost ($)",
+        showlegend=False,
+    )
+    return dcc.Graph(figure=figure)
 
-# Update Sizing Label and Input Placeholder based on selected specific equipment type
+
+# List the other equipment types of the process type valid for the size
 @app.callback(
-    Output(f"{ids.sizing_quantity_input}-hel", "value"),
+    Output(ids.alternatives, "children"),
     [
         Input(ids.method_dropdown, "value"),
         Input(ids.plant_dropdown, "value"),
         Input(ids.equipment_dropdown, "value"),
         Input(ids.equipment_type_dropdown, "value"),
+        Input(ids.sizing_quantity_input, "value"),
     ],
-    State(DATA_STORE, "data"),
 )
-def update_sizing_label(
-    method_choice, plant_choice, equipment_choice, type_choice, material_data
+def update_alternatives(
+    method_choice, plant_choice, equipment_choice, type_choice, sizing_value
 ):
-    if method_choice and plant_choice and equipment_choice and type_choice:
-        selected_row = estimation.filter_material_data(
-            material_data, method_choice, plant_choice, equipment_choice, type_choice
+    if not (method_choice and plant_choice and equipment_choice and type_choice):
+        return None
+    try:
+        selected_row = get_catalog().lookup(
+            method_choice, plant_choice, equipment_choice, type_choice
         )
-        selected_row = selected_row.iloc[0]
-
-        sizing_quantity = selected_row[Factors.SIZING_QUANTITY]
-        units = selected_row[Factors.UNITS]
-        s_lower = selected_row[Factors.S_LOWER]
-        s_upper = selected_row[Factors.S_UPPER]
-
-        if np.isnan(s_lower) or np.isnan(s_upper):
-            placeholder = f"Enter {sizing_quantity} in {units}"
-        else:
-            placeholder = (
-                f"Enter {sizing_quantity} in {units} between {s_lower} and {s_upper}"
-            )
-        return placeholder
-    return "Enter sizing value11"
+        sizing_value = float(sizing_value)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    matches = [
+        match
+        for match in range_index().covering(
+            sizing_value,
+            selected_row[Factors.UNITS],
+            selected_row[Factors.SIZING_QUANTITY],
+            SOURCE_MATERIALS,
+        )
+        if match["method"] == method_choice
+        and match["plant_type"] == plant_choice
+        and (match["equipment"], match["equipment_type"])
+        != (equipment_choice, type_choice)
+    ]
+    if not matches:
+        return None
+    return html.Div(
+        [
+            html.H2(
+                f"Alternatives for {sizing_value:g} {selected_row[Factors.UNITS]}",
+                className="font-bold",
+            ),
+            html.Ul(
+                [
+                    html.Li(
+                        f"{match['equipment'].strip()} - "
+                        f"{match['equipment_type'].strip()}"
+                    )
+                    for match in matches
+                ]
+            ),
+        ]
+    )
 
 
-# Callback to save data
+# Callback to save data. The item is put into the slot of the equipment list
+# that saveSlot found for it, see assets/budgewiser.js, and its output is
+# dropped if its inputs changed, so Run costs it again
 @app.callback(
     Output(STORE_ID, "data", allow_duplicate=True),
     Output(ids.feedback_save, "children", allow_duplicate=True),
     Output(ids.feedback_run, "children", allow_duplicate=True),
     [
-        Input(ids.save_btn, "n_clicks"),
+        Input(ids.save_slot, "data"),
         State(ids.method_dropdown, "value"),
         State(ids.plant_dropdown, "value"),
         State(ids.equipment_dropdown, "value"),
         State(ids.equipment_type_dropdown, "value"),
         State(ids.sizing_quantity_input, "value"),
-        State(STORE_ID, "data"),
     ],
     prevent_initial_call=True,
 )
-def save_data(n_clicks, method, plant, equipment, equipment_type, sizing_value, data):
+def save_data(slot, method, plant, equipment, equipment_type, sizing_value):
 
-    if n_clicks is None:
+    if not slot:
         raise PreventUpdate
+    # The outputs that depend on the saved input, by presence only
+    data = {
+        key: True
+        for key in ("estimation_output", "monte_carlo_output", "report")
+        if slot.get(key)
+    }
+    before = snapshot(data)
     estimation_input = {
+        "id": slot["id"],
         "method": method,
         "plant_type": plant,
         "equipment": equipment,
@@ -324,10 +609,24 @@ def save_data(n_clicks, method, plant, equipment, equipment_type, sizing_value,
         "sizing_value": sizing_value,
     }
     data["estimation_input"] = estimation_input
-
     data = estimation.save_reset(data)
+
+    patch = store_patch(before, data)
+    replaced = slot.get("item")
+    if slot.get("position") is not None:
+        patch["equipment_list"][slot["position"]] = estimation_input
+    elif slot.get("has_list"):
+        patch["equipment_list"].append(estimation_input)
+    else:
+        patch["equipment_list"] = [estimation_input]
+    if slot.get("has_output") and (
+        replaced is None
+        or estimation.item_input_hash(replaced)
+        != estimation.item_input_hash(estimation_input)
+    ):
+        del patch["equipment_output"][slot["id"]]
     return (
-        data,
+        patch,
         MessageCustom(messages="Data saved successfully", success=True).layout,
         None,
     )
@@ -336,7 +635,8 @@ def save_data(n_clicks, method, plant, equipment, equipment_type, sizing_value,
 # Callback to display the run button if inputs are valid
 @app.callback(
     Output(ids.run_container, "children"),
-    Input(STORE_ID, "data"),
+    Input(ids.input_slice, "data"),
+    prevent_initial_call=True,
 )
 def display_run_btn(data):
     if data is None:
@@ -349,51 +649,88 @@ def display_run_btn(data):
             label="Run",
             color="bg-purple-500",
         ).layout
-        return run_btn
+        monte_carlo_btn = ButtonCustom(
+            id=ids.monte_carlo_btn,
+            label="Monte Carlo",
+            color="bg-purple-500",
+        ).layout
+        return html.Div([run_btn, monte_carlo_btn], className="flex gap-2")
     else:
         return MessageCustom(messages=messages, success=False).layout
 
 
-# Callback to run calculations
-@app.callback(
-    Output(STORE_ID, "data", allow_duplicate=True),
-    Output(ids.feedback_run, "children"),
-    Output(ids.feedback_save, "children"),
-    Input(ids.run_btn, "n_clicks"),
-    State(STORE_ID, "data"),
-    State(DATA_STORE, "data"),
-    prevent_initial_call=True,
-)
-def run_calculation(n_clicks, data, material_data):
-    if n_clicks is None:
-        raise PreventUpdate
+def cost_project(data, progress=None):
+    """Costs the equipment items of the run slice and the estimation input."""
+    before = snapshot(data)
     message = []
 
     is_ready, msgs = estimation.all_inputs_ready(data)
 
     if is_ready:
         try:
-            data = estimation.run_calculation(data, material_data)
+            data, costed = estimation.recalculate(
+                data, get_catalog(), progress=progress
+            )
+            data = estimation.run_calculation(data, get_catalog())
             # data = estimation.run_reset(data)
-            msg = "Calculation successful"
+            msg = f"Calculation successful ({costed} equipment items costed)"
             feedback_html = MessageCustom(messages=msg, success=True).layout
-            return data, feedback_html, None
+            return store_patch(before, data), feedback_html
         except Exception as e:
             traceback.print_exc()
             message.append("Failure in Calculations")
             message.append(f"Error: {str(e)}")
             feedback_html = MessageCustom(messages=message, success=False).layout
-            return data, feedback_html, None
+            return store_patch(before, data), feedback_html
     else:
         message.extend(msgs)
         feedback_html = MessageCustom(messages=message, success=False).layout
-        return data, feedback_html, None
+        return store_patch(before, data), feedback_html
+
+
+# Callback to run calculations. It gets only the items that need costing, see
+# runSlice in assets/budgewiser.js. Up to RUN_JOB_ITEMS of them are costed on
+# the server, served from the process-wide result cache; more are handed to
+# the background job below
+@app.callback(
+    Output(STORE_ID, "data", allow_duplicate=True),
+    Output(ids.feedback_run, "children"),
+    Output(ids.feedback_save, "children"),
+    Output(ids.run_request, "data"),
+    Input(ids.run_btn, "n_clicks"),
+    State(ids.run_slice, "data"),
+    prevent_initial_call=True,
+)
+def run_calculation(n_clicks, data):
+    if n_clicks is None:
+        raise PreventUpdate
+    if data and len(data.get("equipment_list", [])) > RUN_JOB_ITEMS:
+        return dash.no_update, None, None, n_clicks
+    return (*cost_project(data), None, dash.no_update)
+
+
+# Callback to run large calculations as a background job
+@app.callback(
+    Output(STORE_ID, "data", allow_duplicate=True),
+    Output(ids.feedback_run, "children", allow_duplicate=True),
+    Input(ids.run_request, "data"),
+    State(ids.run_slice, "data"),
+    background=True,
+    running=job_running(ids.run_job),
+    progress=job_progress(ids.run_progress),
+    cancel=[Input(ids.run_cancel_btn, "n_clicks")],
+    prevent_initial_call=True,
+)
+def run_calculation_job(set_progress, run_request, data):
+    if run_request is None:
+        raise PreventUpdate
+    return cost_project(data, progress_reporter(set_progress))
 
 
 # Callback to display the output
 @app.callback(
     Output(ids.output, "children"),
-    Input(STORE_ID, "data"),
+    Input(ids.output_slice, "data"),
     prevent_initial_call=True,
 )
 def display_output(data):
@@ -404,6 +741,7 @@ def display_output(data):
     if estimation_output is None:
         return None
     estimation_output = data.get("estimation_output", {})
+    summary = data["summary"]
 
     return html.Div(
         [
@@ -421,5 +759,96 @@ def display_output(data):
                 label="ISBL cost",
                 value=estimation_output["total_cost_output"],
             ).layout,
+            DisplayField(
+                id=ids.project_items_output,
+                label="Equipment Items",
+                value=f"{summary['items']} ({summary['errors']} with errors)",
+            ).layout,
+            DisplayField(
+                id=ids.project_cost_output,
+                label="Project ISBL cost",
+                value=f"${summary['isbl_cost']:,.2f}",
+            ).layout,
         ]
     )
+
+
+# Callback to run the Monte Carlo uncertainty analysis, as a background job.
+# It samples every item, so it gets the whole equipment list
+@app.callback(
+    Output(STORE_ID, "data", allow_duplicate=True),
+    Output(ids.feedback_monte_carlo, "children"),
+    Input(ids.monte_carlo_btn, "n_clicks"),
+    State(ids.costing_slice, "data"),
+    background=True,
+    running=job_running(ids.monte_carlo_job),
+    progress=job_progress(ids.monte_carlo_progress),
+    cancel=[Input(ids.monte_carlo_cancel_btn, "n_clicks")],
+    prevent_initial_call=True,
+)
+def run_monte_carlo(set_progress, n_clicks, data):
+    if n_clicks is None:
+        raise PreventUpdate
+    progress = progress_reporter(set_progress)
+    before = snapshot(data)
+    try:
+        progress(0, 1)
+        data, _ = estimation.recalculate(data, get_catalog())
+        data = estimation.run_monte_carlo(data, get_catalog(), progress=progress)
+        msg = "Monte Carlo analysis successful"
+        return (
+            store_patch(before, data),
+            MessageCustom(messages=msg, success=True).layout,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        message = ["Failure in Monte Carlo analysis", f"Error: {str(e)}"]
+        return (
+            store_patch(before, data),
+            MessageCustom(messages=message, success=False).layout,
+        )
+
+
+# Callback to display the Monte Carlo output
+@app.callback(
+    Output(ids.monte_carlo_output, "children"),
+    Input(ids.monte_carlo_slice, "data"),
+    prevent_initial_call=True,
+)
+def display_monte_carlo_output(data):
+    if not data or "monte_carlo_output" not in data:
+        return None
+    monte_carlo_output = data["monte_carlo_output"]
+
+    children = [html.H1("Uncertainty", className="dash-h1")]
+    figure = go.Figure()
+    for key, label in (
+        ("isbl_cost", "ISBL cost"),
+        ("total_fixed_capital_cost", "Total fixed capital cost"),
+    ):
+        output = monte_carlo_output[key]
+        children.append(
+            DisplayField(
+                id=f"{ids.monte_carlo_output}_{key}",
+                label=f"{label} P10 / P50 / P90",
+                value=" / ".join(f"${output[p]:,.0f}" for p in ("p10", "p50", "p90")),
+            ).layout
+        )
+        edges = np.asarray(output["histogram"]["edges"])
+        figure.add_trace(
+            go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=output["histogram"]["counts"],
+                name=label,
+            )
+        )
+    figure.update_layout(
+        barmode="overlay",
+        xaxis_title="Cost ($)",
+        yaxis_title="Samples",
+        title=f"{monte_carlo_output['samples']:,} samples, "
+        f"{monte_carlo_output['items']} equipment items",
+    )
+    figure.update_traces(opacity=0.6)
+    children.append(dcc.Graph(figure=figure))
+    return html.Div(children)
@@ -1,8 +1,17 @@
 import os
-import tempfile
 import dash
 import pandas as pd
-from dash import Dash, Input, Output, State, dcc, html, dash_table
+from dash import (
+    ClientsideFunction,
+    Dash,
+    Input,
+    Output,
+    Patch,
+    State,
+    dcc,
+    html,
+    dash_table,
+)
 from dash.exceptions import PreventUpdate
 from dash_ag_grid import AgGrid
 from plotly import graph_objects as go
@@ -11,7 +20,7 @@ from collections import namedtuple
 from typing import Final
 import traceback
 import math
-from flask import Flask, send_from_directory
+from flask import Flask, abort, send_file
 
 from agility.components import (
     ButtonCustom,
@@ -24,8 +33,10 @@ from agility.components import (
 )
 
 from budgewiser.config.main import STORE_ID
+from budgewiser.jobs import job_layout, job_progress, job_running, progress_reporter
 from budgewiser.project import Project as PRJ
-from budgewiser.project.report import generate_report
+from budgewiser.project.artifacts import get_report_store, get_section_store
+from budgewiser.project.report import report_key, write_report
 
 from typing import Final
 
@@ -51,6 +62,12 @@ class PageIDs:
         self.run_container: Final[str] = f"{prefix}_run_container"
         self.feedback_run: Final[str] = f"{prefix}_feedback_run"
         self.report_download: Final[str] = f"{prefix}_report_download"
+        self.loaded_slice: Final[str] = f"{prefix}_loaded_slice"
+        self.progress_slice: Final[str] = f"{prefix}_progress_slice"
+        self.report_slice: Final[str] = f"{prefix}_report_slice"
+        self.report_job: Final[str] = f"{prefix}_report_job"
+        self.report_progress: Final[str] = f"{prefix}_report_progress"
+        self.report_cancel_btn: Final[str] = f"{prefix}_report_cancel_btn"
 
 
 ids = PageIDs()
@@ -71,20 +88,39 @@ layout = html.Div(
         html.Div(id=ids.save_container, className="px-6 pb-2 w-96"),
         html.Div(id=ids.feedback_save, className="px-6 pb-2 w-96"),
         html.Div(id=ids.run_container, className="px-6 pb-2 w-96"),
+        job_layout(ids.report_job, ids.report_progress, ids.report_cancel_btn),
         html.Div(id=ids.feedback_run, className="px-6 pb-4 w-96"),
         html.Div(id=ids.report_download, className="px-6 pb-2"),
+        dcc.Store(id=ids.loaded_slice),
+        dcc.Store(id=ids.progress_slice),
+        dcc.Store(id=ids.report_slice),
     ],
     className="w-full",
 )
 
 
+# clientside callbacks to split the project store into the slices the callbacks below depend on
+for slice_id, function_name in (
+    (ids.loaded_slice, "loadedSlice"),
+    (ids.progress_slice, "progressSlice"),
+    (ids.report_slice, "reportSlice"),
+):
+    app.clientside_callback(
+        ClientsideFunction(namespace="budgewiser", function_name=function_name),
+        Output(slice_id, "data"),
+        Input(STORE_ID, "data"),
+        State(slice_id, "data"),
+    )
+
+
 # callback function : if data in store is none then show project as not loaded in Div with id = "load_status" , show nothing otherwise
 @app.callback(
     Output(ids.status, "children"),
-    [Input(STORE_ID, "data")],
+    [Input(ids.loaded_slice, "data")],
+    prevent_initial_call=True,
 )
-def load_status(data):
-    if data is None:
+def load_status(loaded):
+    if not loaded:
         return MessageCustom(
             messages="Project not loaded. Go to start page and create new or open existing project.",
             success=False,
@@ -95,7 +131,8 @@ def load_status(data):
 # callback function to display the input fields and save btn if project is loaded
 @app.callback(
     Output(ids.input, "children"),
-    [Input(STORE_ID, "data")],
+    [Input(ids.progress_slice, "data")],
+    prevent_initial_call=True,
 )
 def display_input(data):
     if data is None:
@@ -150,7 +187,8 @@ def display_input(data):
 # callback to show generate report button if all steps are completed
 @app.callback(
     Output(ids.run_container, "children"),
-    [Input(STORE_ID, "data")],
+    [Input(ids.progress_slice, "data")],
+    prevent_initial_call=True,
 )
 def show_run_button(data):
     if not data:
@@ -164,41 +202,61 @@ def show_run_button(data):
         )
 
 
-# callback to run the report generation and save the zipped folder in the store
+# callback to run the report generation and save the zipped folder in the store,
+# it gets the project data the report is built from, which includes the whole
+# equipment list
 @app.callback(
     Output(ids.report_download, "children"),
     Output(ids.feedback_run, "children"),
     Output(STORE_ID, "data", allow_duplicate=True),
     Input(ids.run_btn, "n_clicks"),
-    State(STORE_ID, "data"),
+    State(ids.report_slice, "data"),
+    background=True,
+    running=job_running(ids.report_job),
+    progress=job_progress(ids.report_progress),
+    cancel=[Input(ids.report_cancel_btn, "n_clicks")],
     prevent_initial_call=True,
 )
-def report_run(n_clicks, data):
+def report_run(set_progress, n_clicks, data):
     if n_clicks is None:
         raise PreventUpdate
+    progress = progress_reporter(set_progress)
 
-    memory_output = generate_report(data)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
-        tmp.write(memory_output.getvalue())
-        tmp_path = tmp.name
+    # Reuse the stored report of the same project content, or stream a new one
+    # into the report store, rebuilding only the tables whose data changed
+    key = report_key(data)
+    store = get_report_store()
+    if store.get(key) is None:
+        store.put(
+            key,
+            lambda file: write_report(data, file, get_section_store(), progress),
+        )
 
     report_link = html.A(
         "Click to Download Report",
-        href=f"/budge/download/{os.path.basename(tmp_path)}",
+        href=f"/budge/download/{key}.zip",
         target="_blank",
         style={"color": "blue", "textDecoration": "underline"},
     )
+    # Only the report flag changes, so only it is sent back to the store
     report = {"report": "generated"}
-    data["report"] = report
+    patch = Patch()
+    patch["report"] = report
     msg = MessageCustom(
         messages="Report generated successfully.",
         success=True,
     )
-    return report_link, msg.layout, data
+    return report_link, msg.layout, patch
 
 
-# Serve the file from the temporary directory
+# Serve the report from the report store
 @app.server.route("/budge/download/<filename>")
 def serve_file(filename):
-    directory = tempfile.gettempdir()
-    return send_from_directory(directory, filename, as_attachment=True)
+    key, _, suffix = filename.partition(".")
+    try:
+        path = get_report_store().get(key) if suffix == "zip" else None
+    except ValueError:
+        path = None
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name="report.zip")
@@ -0,0 +1,184 @@
+"""
+budgewiser.project.artifacts
+
+This module holds generated report archives, and the tables they are built
+from, in a managed cache directory, content-addressed by a hash of what they
+were built from. Artifacts expire after a time to live, and the least
+recently used ones are evicted to keep the directory under a size bound. As
+the directory is the only state, the store is shared by all worker processes
+of the server.
+"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+from budgewiser.catalog.snapshot import SNAPSHOT_DIR
+
+# Directory and bounds of the report store, can be overridden with
+# BUDGEWISER_REPORT_DIR, BUDGEWISER_REPORT_STORE_BYTES and
+# BUDGEWISER_REPORT_TTL (seconds)
+REPORT_DIR = Path(os.environ.get("BUDGEWISER_REPORT_DIR", SNAPSHOT_DIR / "reports"))
+REPORT_STORE_BYTES = int(os.environ.get("BUDGEWISER_REPORT_STORE_BYTES", 256 << 20))
+REPORT_TTL = float(os.environ.get("BUDGEWISER_REPORT_TTL", 24 * 3600))
+
+ARTIFACT_KEY = re.compile(r"^[0-9a-f]{16,64}$")
+
+
+class ArtifactStore:
+    """
+    A directory of artifact files named by their key.
+
+    The modification time of a file is its last use, so reads refresh it and
+    eviction removes the files with the oldest ones first.
+
+    Attributes:
+        directory (Path): Directory of the artifact files.
+        max_bytes (int): Total size the store is trimmed to after each put.
+        ttl (float): Seconds an unused artifact is kept, None for no expiry.
+        suffix (str): File name suffix of the artifacts.
+    """
+
+    def __init__(
+        self,
+        directory: Path = REPORT_DIR,
+        max_bytes: int = REPORT_STORE_BYTES,
+        ttl: Optional[float] = REPORT_TTL,
+        suffix: str = ".zip",
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.suffix = suffix
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> Path:
+        """
+        Returns the file path of an artifact key.
+
+        Raises:
+            ValueError: If the key is not a hex digest, so no path outside the
+                store can be formed from it.
+        """
+        if not ARTIFACT_KEY.match(key):
+            raise ValueError(f"Invalid artifact key {key!r}.")
+        return self.directory / f"{key}{self.suffix}"
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.ttl is not None and now - mtime > self.ttl
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Returns the path of a stored artifact and marks it used, or None if
+        the artifact is missing or expired.
+        """
+        path = self.path(key)
+        try:
+            if self._expired(path.stat().st_mtime, time.time()):
+                return None
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, write: Callable[[BinaryIO], object]) -> Path:
+        """
+        Stores an artifact under its key. The content is written by
+        write(file) to a temporary file that then replaces any artifact of the
+        same key, so readers never see a partial file.
+
+        Args:
+            key (str): Hex digest the artifact is addressed by.
+            write (callable): Writes the artifact to a binary file object.
+
+        Returns:
+            Path: Path of the stored artifact.
+        """
+        path = self.path(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{key}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as file:
+                write(file)
+            os.replace(temp_path, path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """
+        Removes the expired artifacts, then the least recently used ones until
+        the store fits in max_bytes. The artifact keep is never removed.
+
+        Returns:
+            int: The number of artifacts removed.
+        """
+        removed = 0
+        now = time.time()
+        with self._lock:
+            entries = []
+            for path in self.directory.glob(f"*{self.suffix}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if path != keep and self._expired(stat.st_mtime, now):
+                    path.unlink(missing_ok=True)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
+
+
+_report_store: Optional[ArtifactStore] = None
+_section_store: Optional[ArtifactStore] = None
+_report_store_lock = threading.Lock()
+
+
+def get_report_store() -> ArtifactStore:
+    """
+    Returns the process-wide report store, creating it on first use.
+
+    Returns:
+        ArtifactStore: The shared store.
+    """
+    global _report_store
+    if _report_store is None:
+        with _report_store_lock:
+            if _report_store is None:
+                _report_store = ArtifactStore()
+    return _report_store
+
+
+def get_section_store() -> ArtifactStore:
+    """
+    Returns the process-wide store of report tables, creating it on first use.
+
+    Returns:
+        ArtifactStore: The shared store, in the sections subdirectory of the
+            report store.
+    """
+    global _section_store
+    if _section_store is None:
+        with _report_store_lock:
+            if _section_store is None:
+                _section_store = ArtifactStore(REPORT_DIR / "sections", suffix=".csv")
+    return _section_store
@@ -1,10 +1,19 @@
+import hashlib
+import json
+
 import pandas as pd
 import numpy as np
 from agility.utils.pydantic import validate_data
 
-from budgewiser.schemas.estimation import EstimationInput
-from budgewiser.core.definitions import Factors
-from budgewiser.config.main import STORE_ID, DATA_STORE
+from budgewiser.schemas.estimation import (
+    CostBasisInput,
+    EstimationInput,
+    MonteCarloInput,
+)
+from budgewiser.core import engine, escalation, montecarlo, sensitivity, units
+from budgewiser.core.definitions import Factors, Methods
+from budgewiser.core.result_cache import get_result_cache, item_key
+from budgewiser.catalog import CostRecord, MaterialCatalog, get_catalog
 
 import traceback
 
@@ -17,8 +26,9 @@ def filter_material_data(
     Filters are only applied if their corresponding parameter is not None or empty.
 
     Parameters:
-    - data: pd.DataFrame or dict
-        The input data containing material information. It can be a DataFrame or a dictionary that can be converted to a DataFrame.
+    - data: MaterialCatalog, pd.DataFrame, dict or None
+        The input data containing material information. It can be a MaterialCatalog, a DataFrame or a dictionary that can be converted to a DataFrame.
+        If None, the process-wide catalog is used.
     - method: str, optional
         The method to filter by. If None or empty, this filter is ignored.
     - plant_type: str, optional
@@ -36,6 +46,12 @@ def filter_material_data(
     - KeyError: If the filtered dataframe is empty.
     - ValueError: If data is not in a valid format or required columns are missing.
     """
+    if data is None:
+        data = get_catalog()
+    # The catalog answers from its compound-key hash index, no column scans
+    if isinstance(data, MaterialCatalog):
+        return data.frame(data.select(method, plant_type, equipment, equipment_type))
+
     # Ensure data is a DataFrame
     if isinstance(data, dict):
         data = pd.DataFrame(data)
@@ -95,6 +111,56 @@ def filter_material_data(
     return filtered_data
 
 
+def select_material_row(
+    data, method=None, plant_type=None, equipment=None, equipment_type=None
+):
+    """
+    Returns the first material data row matching the specified criteria.
+
+    For the catalog (the default) this is a single hash lookup on the
+    (method, plant_type, equipment, equipment_type) key; DataFrames and dicts
+    fall back to filter_material_data.
+
+    Returns:
+    - dict or pd.Series
+        The matching row, indexable by the Factors column names.
+
+    Raises:
+    - KeyError: If no row matches the input criteria.
+    """
+    if data is None:
+        data = get_catalog()
+    if isinstance(data, MaterialCatalog):
+        return data.lookup(method, plant_type, equipment, equipment_type)
+    return filter_material_data(
+        data, method, plant_type, equipment, equipment_type
+    ).iloc[0]
+
+
+def select_cost_record(
+    data, method=None, plant_type=None, equipment=None, equipment_type=None
+):
+    """
+    Returns the typed cost record of the first material data row matching the
+    specified criteria. The catalog hands out its precompiled record; other
+    inputs are converted from the row found by select_material_row.
+
+    Returns:
+    - CostRecord
+        The matching record, with float fields as plain Python floats.
+
+    Raises:
+    - KeyError: If no row matches the input criteria.
+    """
+    if data is None:
+        data = get_catalog()
+    if isinstance(data, MaterialCatalog):
+        return data.record(method, plant_type, equipment, equipment_type)
+    return CostRecord.from_row(
+        select_material_row(data, method, plant_type, equipment, equipment_type)
+    )
+
+
 def validate_input(page_input):
     """
     Check if the page_input data is valid.
@@ -122,72 +188,480 @@ def all_inputs_ready(data):
     return ready, msgs
 
 
-def run_calculation(data, material_data):
+def project_target_index(data):
+    """
+    Returns the cost index that the project costs are escalated to, from the
+    target year or target index in data["cost_basis"].
+    """
+    cost_basis = CostBasisInput(**(data.get("cost_basis") or {}))
+    return escalation.target_index(cost_basis.target_year, cost_basis.target_index)
+
+
+def catalog_version(material_data=None):
+    """
+    Returns the version of the catalog that results are computed against, or
+    None for plain material data frames, whose results are not memoized.
+    """
+    if material_data is None:
+        material_data = get_catalog()
+    return getattr(material_data, "version", None)
+
+
+def run_calculation(data, material_data=None):
     estimation_output = {"result": "This is the output of the calculation"}
     # estimation_input = data["estimation_input"]
     estimation_input = EstimationInput(**data["estimation_input"])
+    target_index = project_target_index(data)
+
+    # Repeated runs of the same inputs are served from the result cache
+    cache = get_result_cache()
+    version = catalog_version(material_data)
+    key = item_key(
+        "run_calculation",
+        target_index,
+        estimation_input.method,
+        estimation_input.plant_type,
+        estimation_input.equipment,
+        estimation_input.equipment_type,
+        estimation_input.sizing_value,
+        estimation_input.sizing_units,
+    )
+    if version is not None:
+        cached = cache.get(version, key)
+        if cached is not None:
+            data["estimation_output"] = cached
+            return data
 
-    selected_row = filter_material_data(
+    record = select_cost_record(
         material_data,
         estimation_input.method,
         estimation_input.plant_type,
         estimation_input.equipment,
         estimation_input.equipment_type,
     )
-    selected_row = selected_row.iloc[0]
-    s_lower = selected_row[Factors.S_LOWER]
-    s_upper = selected_row[Factors.S_UPPER]
+    s_lower = record.s_lower
+    s_upper = record.s_upper
+    sizing_value = estimation_input.sizing_value
+    if estimation_input.sizing_units:
+        sizing_value = float(
+            units.convert(sizing_value, estimation_input.sizing_units, record.units)
+        )
 
     if not (np.isnan(s_lower) or np.isnan(s_upper)) and not (
-        s_lower <= estimation_input.sizing_value <= s_upper
+        s_lower <= sizing_value <= s_upper
     ):
-        return "", f"Error: The input value must be between {s_lower} and {s_upper}."
-
-    if selected_row.empty:
-        raise ValueError("No matching data found for the selected options.")
-
-    a = selected_row[Factors.A]
-    b = selected_row[Factors.B]
-    n = selected_row[Factors.N]
-
-    purchased_equipment_cost = (
-        (a + b * (estimation_input.sizing_value) ** float(n)) * 800 / 509.7
+        raise ValueError(f"The input value must be between {s_lower} and {s_upper}.")
+
+    purchased_equipment_cost = engine.purchased_equipment_cost(
+        record.a,
+        record.b,
+        record.n,
+        sizing_value,
+        target_index,
     )
     purchased_cost_output = f"${purchased_equipment_cost:,.2f}"
 
-    if estimation_input.method == "Hand":
-        installation_factor = selected_row[Factors.INSTALLATION_FACTOR]
-        installed_equipment_cost = purchased_equipment_cost * installation_factor
+    if estimation_input.method == Methods.HAND:
+        installed_equipment_cost = purchased_equipment_cost * record.installation_factor
         total_cost_output = f"${installed_equipment_cost:,.2f}"
     else:
-        fm = selected_row[Factors.MATERIAL_FACTOR]
-        fer = selected_row[Factors.EQUIPMENT_ERECTION_FACTOR]
-        fp = selected_row[Factors.PIPING_FACTOR]
-        fi = selected_row[Factors.INSTRUMENTATION_AND_CONTROL_FACTOR]
-        fel = selected_row[Factors.ELECTRICAL_FACTOR]
-        fc = selected_row[Factors.CIVIL_FACTOR]
-        fs = selected_row[Factors.STRUCTURES_AND_BUILDINGS_FACTOR]
-        fl = selected_row[Factors.LAGGING_AND_PAINT_FACTOR]
-        OS = selected_row[Factors.OFFSITES_FACTOR]
-        DE = selected_row[Factors.DESIGN_AND_ENGINEERING_FACTOR]
-        X = selected_row[Factors.CONTINGENCY]
-        location_factor = selected_row[Factors.LOCATION_FACTOR]
-
-        ISBL_cost = purchased_equipment_cost * (
-            (1 + float(fp)) * fm + (fer + fel + fi + fc + fs + fl)
+        ISBL_cost = engine.isbl_cost(
+            purchased_equipment_cost,
+            record.material_factor,
+            record.equipment_erection_factor,
+            record.piping_factor,
+            record.instrumentation_and_control_factor,
+            record.electrical_factor,
+            record.civil_factor,
+            record.structures_and_buildings_factor,
+            record.lagging_and_paint_factor,
+        )
+        total_fixed_capital_cost = engine.total_fixed_capital_cost(
+            ISBL_cost,
+            record.offsites_factor,
+            record.design_and_engineering_factor,
+            record.contingency,
+            record.location_factor,
         )
-        total_fixed_capital_cost = ISBL_cost * (1 + OS) * (1 + DE + X) * location_factor
         total_cost_output = f"${ISBL_cost:,.2f}"
 
     estimation_output = {}
     estimation_output["purchased_cost_output"] = f"{purchased_cost_output}"
     estimation_output["total_cost_output"] = f"{total_cost_output}"
 
+    if version is not None:
+        cache.put(version, key, estimation_output)
     data["estimation_output"] = estimation_output
     return data
 
 
+# Cost outputs of an equipment item
+COST_OUTPUT_KEYS = ("purchased_cost", "isbl_cost", "total_fixed_capital_cost")
+
+# Number of items recalculate() looks up between two progress reports
+PROGRESS_STEP = 1000
+
+# Inputs of an equipment item that its cost depends on
+ITEM_INPUT_KEYS = (
+    "method",
+    "plant_type",
+    "equipment",
+    "equipment_type",
+    "sizing_value",
+    "sizing_units",
+)
+
+
+def item_input_hash(item, version=None):
+    """
+    Returns a hash of the cost relevant inputs of an equipment item and of the
+    version of the catalog it is costed against.
+    """
+    # Unset inputs are left out, so adding an input keeps existing hashes
+    inputs = {
+        key: item.get(key) for key in ITEM_INPUT_KEYS if item.get(key) is not None
+    }
+    if version is not None:
+        inputs["catalog_version"] = version
+    canonical = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def upsert_item(data, item):
+    """
+    Adds an equipment item to the project equipment list, or replaces the item
+    with the same ID. Items without an ID get the next free "EQ-nnn" ID.
+    """
+    equipment_list = data.setdefault("equipment_list", [])
+    item = dict(item)
+    if not item.get("id"):
+        ids = {existing.get("id") for existing in equipment_list}
+        number = len(equipment_list) + 1
+        while f"EQ-{number:03d}" in ids:
+            number += 1
+        item["id"] = f"EQ-{number:03d}"
+
+    for position, existing in enumerate(equipment_list):
+        if existing.get("id") == item["id"]:
+            equipment_list[position] = item
+            break
+    else:
+        equipment_list.append(item)
+    return data, item
+
+
+def stale_items(data, version=None):
+    """
+    Returns the equipment items whose cached output is missing or was computed
+    from different inputs or against another catalog version.
+    """
+    equipment_output = data.get("equipment_output", {})
+    return [
+        item
+        for item in data.get("equipment_list", [])
+        if equipment_output.get(item.get("id"), {}).get("input_hash")
+        != item_input_hash(item, version)
+    ]
+
+
+def rebase_outputs(equipment_output, target_index):
+    """
+    Escalates the cached equipment item costs to a new target cost index in
+    one array operation, as the costs scale linearly with the index.
+
+    Args:
+        equipment_output (dict): Cached outputs by item ID, updated in place.
+        target_index (float): The new target cost index.
+
+    Returns:
+        int: The number of outputs re-based.
+    """
+    outputs = [
+        output
+        for output in equipment_output.values()
+        if "error" not in output
+        and output.get("target_index", escalation.DEFAULT_TARGET_INDEX) != target_index
+    ]
+    if not outputs:
+        return 0
+    costs = np.array(
+        [[output.get(key) for key in COST_OUTPUT_KEYS] for output in outputs],
+        dtype=float,
+    )
+    base_index = np.array(
+        [
+            output.get("target_index", escalation.DEFAULT_TARGET_INDEX)
+            for output in outputs
+        ]
+    )
+    costs = escalation.escalate(costs, base_index[:, np.newaxis], target_index)
+    for output, row in zip(outputs, costs.tolist()):
+        for key, value in zip(COST_OUTPUT_KEYS, row):
+            output[key] = None if np.isnan(value) else value
+        output["target_index"] = target_index
+    return len(outputs)
+
+
+def recalculate(data, material_data=None, incremental=True, progress=None):
+    """
+    Costs the project equipment list into data["equipment_output"].
+
+    In incremental mode only items whose inputs changed since their output was
+    cached are costed, in one batch; the cached outputs of the other items are
+    kept, re-based to the project cost basis if it changed. Outputs of items
+    no longer in the list are dropped. Stale items costed before against the
+    same catalog, e.g. after a reload, come from the result cache. The
+    catalog version and cost basis the outputs are now current for are
+    recorded in data["costing_basis"], see costing_basis().
+
+    Args:
+        data (dict): The project data.
+        material_data (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        incremental (bool): If False, every item is re-costed.
+        progress (callable, optional): Called with the number of items done
+            and the number to cost as they are looked up.
+
+    Returns:
+        tuple: The project data and the number of items costed.
+    """
+    catalog = material_data if material_data is not None else get_catalog()
+    cache = get_result_cache()
+    target_index = project_target_index(data)
+    equipment_list = data.get("equipment_list", [])
+    equipment_output = data.get("equipment_output", {}) if incremental else {}
+    ids = {item.get("id") for item in equipment_list}
+    equipment_output = {
+        item_id: output
+        for item_id, output in equipment_output.items()
+        if item_id in ids
+    }
+    data["equipment_output"] = equipment_output
+    rebase_outputs(equipment_output, target_index)
+    items = stale_items(data, catalog.version) if incremental else list(equipment_list)
+
+    costed, keys, positions, sizing_values, sizing_units = [], [], [], [], []
+    for done, item in enumerate(items):
+        if progress and done % PROGRESS_STEP == 0:
+            progress(done, len(items))
+        output = {"input_hash": item_input_hash(item, catalog.version)}
+        equipment_output[item["id"]] = output
+        try:
+            estimation_input = EstimationInput(
+                **{key: item.get(key) for key in ITEM_INPUT_KEYS}
+            )
+        except ValueError as e:
+            output["error"] = str(e)
+            continue
+        cache_key = item_key(
+            "item",
+            target_index,
+            estimation_input.method,
+            estimation_input.plant_type,
+            estimation_input.equipment,
+            estimation_input.equipment_type,
+            estimation_input.sizing_value,
+            estimation_input.sizing_units,
+        )
+        cached = cache.get(catalog.version, cache_key)
+        if cached is not None:
+            output.update(cached)
+            if "error" not in cached:
+                output["target_index"] = target_index
+            continue
+        try:
+            position = catalog.select(
+                estimation_input.method,
+                estimation_input.plant_type,
+                estimation_input.equipment,
+                estimation_input.equipment_type,
+            )[0]
+        except KeyError as e:
+            output["error"] = e.args[0]
+            cache.put(catalog.version, cache_key, {"error": output["error"]})
+            continue
+        except ValueError as e:
+            output["error"] = str(e)
+            continue
+        costed.append(output)
+        keys.append(cache_key)
+        positions.append(position)
+        sizing_values.append(estimation_input.sizing_value)
+        sizing_units.append(estimation_input.sizing_units)
+
+    if costed:
+        # Sizes given in other units are converted in one pass
+        sizing_values = catalog.convert_sizes(
+            positions, sizing_values, sizing_units, strict=False
+        )
+        results = engine.estimate_positions(
+            positions, sizing_values, catalog, target_index=target_index
+        )
+        s_lower = catalog.column(Factors.S_LOWER)[positions]
+        s_upper = catalog.column(Factors.S_UPPER)[positions]
+        catalog_units = catalog.column(Factors.UNITS)[positions]
+        for i, output in enumerate(costed):
+            result = {}
+            if np.isnan(sizing_values[i]):
+                result["error"] = (
+                    f"Cannot convert {sizing_units[i]} to {catalog_units[i].strip()}."
+                )
+            elif not results["in_range"][i]:
+                result["error"] = (
+                    f"The input value must be between {s_lower[i]} and {s_upper[i]}."
+                )
+            else:
+                for key in COST_OUTPUT_KEYS:
+                    value = float(results[key][i])
+                    result[key] = None if np.isnan(value) else value
+            cache.put(catalog.version, keys[i], result)
+            output.update(result)
+            if "error" not in result:
+                output["target_index"] = target_index
+
+    data["costing_basis"] = costing_basis(data, catalog)
+    if progress:
+        progress(len(items), len(items))
+    return data, len(items)
+
+
+def costing_basis(data, material_data=None):
+    """
+    Returns what the cached equipment item outputs of a project depend on
+    besides the inputs of the items: the catalog version and the cost basis.
+    While it equals data["costing_basis"], only the items without an output
+    need costing, so the browser sends just those to be recalculated.
+    """
+    cost_basis = data.get("cost_basis")
+    return {
+        "catalog_version": catalog_version(material_data),
+        "cost_basis": dict(cost_basis) if cost_basis is not None else None,
+    }
+
+
+def project_summary(data):
+    """
+    Sums the cached equipment item outputs over the project equipment list.
+    """
+    equipment_output = data.get("equipment_output", {})
+    outputs = [
+        equipment_output.get(item.get("id"), {})
+        for item in data.get("equipment_list", [])
+    ]
+    summary = {
+        "items": len(outputs),
+        "errors": sum(1 for output in outputs if "error" in output),
+    }
+    for key in COST_OUTPUT_KEYS:
+        summary[key] = sum(output.get(key) or 0.0 for output in outputs)
+    return summary
+
+
+def costable_items(data, material_data=None):
+    """
+    Returns the catalog positions and sizing values of the equipment items
+    that were costed without error by recalculate().
+
+    Returns:
+        tuple: Item IDs, catalog positions and sizing values in catalog units.
+    """
+    catalog = material_data if material_data is not None else get_catalog()
+    equipment_output = data.get("equipment_output", {})
+    ids, positions, sizing_values, sizing_units = [], [], [], []
+    for item in data.get("equipment_list", []):
+        output = equipment_output.get(item.get("id"), {})
+        if "error" in output or output.get("input_hash") != item_input_hash(
+            item, catalog.version
+        ):
+            continue
+        ids.append(item["id"])
+        positions.append(
+            catalog.select(
+                item["method"],
+                item["plant_type"],
+                item["equipment"],
+                item["equipment_type"],
+            )[0]
+        )
+        sizing_values.append(float(item["sizing_value"]))
+        sizing_units.append(item.get("sizing_units"))
+    positions = np.asarray(positions, dtype=np.intp)
+    if ids:
+        sizing_values = catalog.convert_sizes(positions, sizing_values, sizing_units)
+    return ids, positions, np.asarray(sizing_values, dtype=float)
+
+
+def run_monte_carlo(data, material_data=None, progress=None):
+    """
+    Runs the Monte Carlo uncertainty analysis over the costed equipment items
+    into data["monte_carlo_output"], using the settings in
+    data["monte_carlo_input"]. progress(done, total) is called with the number
+    of samples done as the simulation goes.
+
+    Raises:
+        ValueError: If the settings are invalid or no item has been costed.
+    """
+    catalog = material_data if material_data is not None else get_catalog()
+    settings = MonteCarloInput(**data.get("monte_carlo_input", {}))
+    unknown = set(settings.distributions) - set(montecarlo.SAMPLED_TERMS)
+    if unknown:
+        raise ValueError(f"Unknown Monte Carlo terms: {', '.join(sorted(unknown))}")
+
+    ids, positions, sizing_values = costable_items(data, catalog)
+    if not ids:
+        raise ValueError("No costed equipment items. Run the calculation first.")
+
+    distributions = {
+        term: montecarlo.Distribution(distribution.kind, distribution.spread)
+        for term, distribution in settings.distributions.items()
+    }
+    monte_carlo_output = montecarlo.simulate(
+        positions,
+        sizing_values,
+        samples=settings.samples,
+        distributions=distributions,
+        seed=settings.seed,
+        catalog=catalog,
+        target_index=project_target_index(data),
+        progress=progress,
+    )
+    monte_carlo_output["items"] = len(ids)
+    monte_carlo_output["samples"] = settings.samples
+    data["monte_carlo_output"] = monte_carlo_output
+    return data
+
+
+def run_sensitivity(data, material_data=None, perturbation=0.1):
+    """
+    Runs the tornado sensitivity analysis over the costed equipment items.
+
+    Args:
+        data (dict): The project data.
+        material_data (MaterialCatalog, optional): Defaults to the process-wide catalog.
+        perturbation (float): Relative perturbation of each factor, e.g. 0.1 for +/-10%.
+
+    Returns:
+        dict or None: The ranked factors (see sensitivity.tornado), or None if
+            no equipment item has been costed.
+    """
+    catalog = material_data if material_data is not None else get_catalog()
+    ids, positions, sizing_values = costable_items(data, catalog)
+    if not ids:
+        return None
+    return sensitivity.tornado(
+        positions,
+        sizing_values,
+        perturbation=perturbation,
+        catalog=catalog,
+        target_index=project_target_index(data),
+    )
+
+
 def save_reset(data):
+    """
+    Drops the output that depends on the saved input. Cached equipment item
+    outputs are kept; recalculate() re-costs only the items that changed.
+    """
+    data.pop("monte_carlo_output", None)
     try:
         data.pop("estimation_output")
         data = run_reset(data)
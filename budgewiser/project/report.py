@@ -1,57 +1,181 @@
-import tempfile
-import os
 import csv
+import hashlib
 import io
+import json
 import zipfile
-import pandas as pd
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from budgewiser.catalog import get_catalog
 from budgewiser.project import estimation
+from budgewiser.project.artifacts import ArtifactStore
 
+# Bump when the content or layout of the report changes
+REPORT_FORMAT = 1
+# Tables of the report: file name -> project data keys the table is built from
+REPORT_SECTIONS = {
+    "meta_input.csv": ("meta_input",),
+    "estimation_input.csv": ("estimation_input",),
+    "estimation_output.csv": ("estimation_output",),
+    "equipment.csv": ("equipment_list", "equipment_output"),
+    "sensitivity.csv": ("equipment_list", "equipment_output", "cost_basis"),
+}
+# Columns of the equipment list table of the report
+EQUIPMENT_COLUMNS = (
+    ("id",) + estimation.ITEM_INPUT_KEYS + estimation.COST_OUTPUT_KEYS + ("error",)
+)
 
-def generate_report(data):
-    files = []
-    with tempfile.TemporaryDirectory() as tempdir:
-        # Create a temporary directory to store the files
-        # Generate the report files
-
-        # save project info as csv file in the tempdir
-        meta_input = data.get("meta_input", {})
-        meta_input_path = os.path.join(tempdir, "meta_input.csv")
-        with open(meta_input_path, "w") as f:
-            w = csv.DictWriter(f, meta_input.keys())
-            w.writeheader()
-            w.writerow(meta_input)
-
-        # save estimation_input as csv file in the tempdir
-        estimation_input = data.get("estimation_input", {})
-        estimation_input_path = os.path.join(tempdir, "estimation_input.csv")
-        with open(estimation_input_path, "w") as f:
-            w = csv.DictWriter(f, estimation_input.keys())
-            w.writeheader()
-            w.writerow(estimation_input)
-
-        # save estimation_output as csv file in the tempdir
-        estimation_output = data.get("estimation_output", {})
-        estimation_output_path = os.path.join(tempdir, "estimation_output.csv")
-        with open(estimation_output_path, "w") as f:
-            w = csv.DictWriter(f, estimation_output.keys())
-            w.writeheader()
-            w.writerow(estimation_output)
-
-        # After each file is saved, read it into memory and add it to the files list
-        for root, dirs, file_names in os.walk(tempdir):
-            for file_name in file_names:
-                file_path = os.path.join(root, file_name)
-                with open(file_path, "rb") as f:
-                    data = f.read()
-                files.append((file_name, data))
-
-    in_memory_output = io.BytesIO()
-    with zipfile.ZipFile(in_memory_output, "w", zipfile.ZIP_DEFLATED) as zf:
-        for file_name, data in files:
-            data = data.encode() if isinstance(data, str) else data
-            data = io.BytesIO(data)
-            zf.writestr(file_name, data.getvalue())
 
-    in_memory_output.seek(0)
+def _hash(content) -> str:
+    canonical = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def section_keys(data) -> Dict[str, str]:
+    """
+    Returns the content address of each table of the report of a project: a
+    hash of the project data the table is built from, the catalog version and
+    the report format. A table only changes when its key does.
+    """
+    catalog_version = get_catalog().version
+    data_keys = {key for keys in REPORT_SECTIONS.values() for key in keys}
+    content_hashes = {key: _hash(data.get(key)) for key in data_keys}
+    return {
+        file_name: _hash(
+            [
+                REPORT_FORMAT,
+                catalog_version,
+                file_name,
+                [content_hashes[key] for key in keys],
+            ]
+        )
+        for file_name, keys in REPORT_SECTIONS.items()
+    }
+
+
+def report_key(data) -> str:
+    """
+    Returns the content address of the report of a project, a hash of its
+    section keys. Projects with the same content share one report.
+    """
+    return _hash(sorted(section_keys(data).items()))
+
+
+def _equipment_rows(data) -> Iterator[dict]:
+    equipment_output = data.get("equipment_output", {})
+    for item in data.get("equipment_list", []):
+        output = equipment_output.get(item.get("id"), {})
+        yield {
+            **{key: item.get(key) for key in ("id",) + estimation.ITEM_INPUT_KEYS},
+            **{key: output.get(key) for key in estimation.COST_OUTPUT_KEYS},
+            "error": output.get("error"),
+        }
+
+
+def build_table(data, file_name: str) -> Optional[Tuple[Sequence[str], Iterable]]:
+    """
+    Returns the columns and rows of a table of REPORT_SECTIONS, or None if the
+    project has nothing to report in it. Rows are produced lazily, so tables
+    of any length are never held in memory as a whole.
+    """
+    # The costs of the equipment list, one row per item
+    if file_name == "equipment.csv":
+        if not data.get("equipment_list"):
+            return None
+        return EQUIPMENT_COLUMNS, _equipment_rows(data)
+
+    # The tornado sensitivity of the equipment list
+    if file_name == "sensitivity.csv":
+        sensitivity_output = estimation.run_sensitivity(data)
+        if sensitivity_output is None:
+            return None
+        terms = sensitivity_output["terms"]
+        return list(terms[0].keys()), terms
+
+    (name,) = REPORT_SECTIONS[file_name]
+    section = data.get(name, {})
+    return list(section.keys()), [section]
+
 
+def report_tables(data) -> Iterator[Tuple[str, Sequence[str], Iterable[dict]]]:
+    """Yields the tables of the project report as (file name, columns, rows)."""
+    for file_name in REPORT_SECTIONS:
+        table = build_table(data, file_name)
+        if table is not None:
+            yield (file_name, *table)
+
+
+def write_csv(file: BinaryIO, columns: Sequence[str], rows: Iterable[dict]):
+    """Writes rows as utf-8 csv to a binary file object and closes it."""
+    with io.TextIOWrapper(file, encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, columns)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def write_csv_entry(
+    zf: zipfile.ZipFile, file_name: str, columns: Sequence[str], rows: Iterable[dict]
+):
+    """
+    Writes rows as a csv file entry of a zip archive, compressing them as they
+    are written rather than after the whole file is built.
+    """
+    with zf.open(file_name, "w") as entry:
+        write_csv(entry, columns, rows)
+
+
+def write_report(
+    data,
+    file: BinaryIO,
+    section_store: Optional[ArtifactStore] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> BinaryIO:
+    """
+    Writes the project report, a zip archive of csv tables, to a binary file
+    object, e.g. an open file, a BytesIO or a non-seekable stream.
+
+    With a section store, tables are kept in it by their section key, and
+    only the tables whose project data changed since they were stored are
+    built again.
+
+    Args:
+        data (dict): The project data.
+        file (BinaryIO): The file object to write to, left open.
+        section_store (ArtifactStore, optional): Store of built tables.
+        progress (callable, optional): Called with the number of tables done
+            and the total after each table.
+
+    Returns:
+        BinaryIO: The file object.
+    """
+    total = len(REPORT_SECTIONS)
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as zf:
+        keys = section_keys(data) if section_store is not None else {}
+        for done, file_name in enumerate(REPORT_SECTIONS, start=1):
+            path = section_store.get(keys[file_name]) if keys else None
+            table = build_table(data, file_name) if path is None else None
+            if table is not None and section_store is not None:
+                path = section_store.put(
+                    keys[file_name], lambda f: write_csv(f, *table)
+                )
+            if path is not None:
+                zf.write(path, file_name)
+            elif table is not None:
+                write_csv_entry(zf, file_name, *table)
+            if progress:
+                progress(done, total)
+    return file
+
+
+def generate_report(data):
+    in_memory_output = write_report(data, io.BytesIO())
+    in_memory_output.seek(0)
     return in_memory_output
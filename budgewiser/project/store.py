@@ -0,0 +1,80 @@
+"""
+budgewiser.project.store
+
+This module turns changes of the project data into partial updates of the
+browser side project store, so callbacks send only what changed rather than
+the whole project back to the browser.
+"""
+
+import copy
+
+from dash import Patch, no_update
+
+_MISSING = object()
+
+
+def snapshot(data):
+    """
+    Returns a deep copy of the project data, to diff against after a
+    callback has updated the data in place.
+    """
+    return copy.deepcopy(data)
+
+
+def _patch_into(patch, before, after, depth: int) -> bool:
+    changed = False
+    if isinstance(before, dict):
+        for key in before.keys() - after.keys():
+            del patch[key]
+            changed = True
+        items = after.items()
+    else:
+        items = enumerate(after)
+
+    for key, value in items:
+        old = before.get(key, _MISSING) if isinstance(before, dict) else before[key]
+        if old is not _MISSING and old == value:
+            continue
+        changed = True
+        same_dicts = isinstance(old, dict) and isinstance(value, dict)
+        same_lists = (
+            isinstance(old, list) and isinstance(value, list) and len(old) == len(value)
+        )
+        if depth > 1 and (same_dicts or same_lists):
+            _patch_into(patch[key], old, value, depth - 1)
+        elif (
+            isinstance(old, list)
+            and isinstance(value, list)
+            and len(old) < len(value)
+            and value[: len(old)] == old
+        ):
+            patch[key].extend(value[len(old) :])
+        else:
+            patch[key] = value
+    return changed
+
+
+def store_patch(before, after, depth: int = 2):
+    """
+    Returns the update of the project store from one version of the project
+    data to the next.
+
+    Changed keys are patched down to the given depth, e.g. a single item of
+    data["equipment_output"] at depth 2, and appended list items are sent
+    on their own.
+
+    Args:
+        before (dict): The project data as the browser has it, see snapshot().
+        after (dict): The updated project data.
+        depth (int): Number of nested levels to patch individual keys of.
+
+    Returns:
+        Patch: The changes, or no_update if nothing changed, or the whole
+            data if there was no project before.
+    """
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        return no_update if before == after else after
+    patch = Patch()
+    if not _patch_into(patch, before, after, depth):
+        return no_update
+    return patch
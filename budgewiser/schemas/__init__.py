@@ -9,9 +9,15 @@ from pydantic import BaseModel, Field, field_validator, model_validator
 import uuid
 from pydantic import BaseModel, Field, field_validator, model_validator
 from budgewiser.schemas.meta import MetaInput
-from budgewiser.schemas.estimation import EstimationInput
+from budgewiser.schemas.estimation import (
+    CostBasisInput,
+    EstimationInput,
+    EquipmentItem,
+)
 
 
 class ProjectData(BaseModel):
     meta_input: MetaInput
     estimation_input: EstimationInput
+    equipment_list: List[EquipmentItem] = []
+    cost_basis: CostBasisInput = CostBasisInput()
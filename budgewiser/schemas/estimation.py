@@ -1,6 +1,10 @@
 """schemas/estimation.py"""
 
-from pydantic import BaseModel, field_validator
+from typing import Dict, Literal, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from budgewiser.core.units import parse_unit
 
 
 class EstimationInput(BaseModel):
@@ -11,6 +15,7 @@ class EstimationInput(BaseModel):
     equipment: str
     equipment_type: str
     sizing_value: float
+    sizing_units: Optional[str] = None
 
     @field_validator("method")
     @classmethod
@@ -46,3 +51,72 @@ class EstimationInput(BaseModel):
         if v is None or v <= 0:
             raise ValueError("Sizing quantity must be a positive number.")
         return v
+
+    @field_validator("sizing_units")
+    @classmethod
+    def sizing_units_validate(cls, v):
+        if v:
+            parse_unit(v)
+        return v or None
+
+
+class EquipmentItem(EstimationInput):
+    """Equipment list item schema"""
+
+    id: str
+
+    @field_validator("id")
+    @classmethod
+    def id_validate(cls, v):
+        if not v:
+            raise ValueError("Item ID must not be empty.")
+        return v
+
+
+class DistributionInput(BaseModel):
+    """Monte Carlo distribution of one factorial term, relative to its catalog value"""
+
+    kind: Literal["triangular", "uniform", "normal", "fixed"] = "triangular"
+    spread: float = 0.2
+
+    @field_validator("spread")
+    @classmethod
+    def spread_validate(cls, v):
+        if v < 0:
+            raise ValueError("Spread must not be negative.")
+        return v
+
+
+class MonteCarloInput(BaseModel):
+    """Monte Carlo input schema"""
+
+    samples: int = 100_000
+    seed: Optional[int] = None
+    distributions: Dict[str, DistributionInput] = {}
+
+    @field_validator("samples")
+    @classmethod
+    def samples_validate(cls, v):
+        if v <= 0:
+            raise ValueError("Number of samples must be a positive number.")
+        return v
+
+
+class CostBasisInput(BaseModel):
+    """Cost basis schema, the year or cost index that costs are escalated to"""
+
+    target_year: Optional[float] = Field(None, allow_inf_nan=False)
+    target_index: Optional[float] = Field(None, allow_inf_nan=False)
+
+    @field_validator("target_index")
+    @classmethod
+    def target_index_validate(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("Target cost index must be a positive number.")
+        return v
+
+    @model_validator(mode="after")
+    def target_validate(self):
+        if self.target_year is not None and self.target_index is not None:
+            raise ValueError("Give either a target year or a target index, not both.")
+        return self
@@ -0,0 +1,42 @@
+import pytest
+from flask import Flask
+
+from budgewiser import api
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(api.blueprint, url_prefix="/api")
+    return app.test_client()
+
+
+def test_ranges_batch_rejects_non_text_sizing_quantity(client):
+    item = {"sizing_value": 500, "sizing_units": "kW", "sizing_quantity": ["a"]}
+    response = client.post("/api/ranges/batch", json={"items": [item]})
+    assert response.status_code == 400
+    assert "sizing_quantity" in response.get_json()["error"]
+
+
+ITEM = {
+    "method": "Hand",
+    "plant_type": "any",
+    "equipment": "Agitators and Mixers",
+    "equipment_type": "Propeller ",
+    "sizing_value": 10,
+}
+
+
+@pytest.mark.parametrize(
+    "cost_basis, message",
+    [
+        ({"target_index": "nan"}, "target_index: Input should be a finite number."),
+        ({"target_year": [1]}, "target_year: Input should be a valid number."),
+        ({"target_index": 0}, "target_index: Target cost index must be a positive"),
+        ({"target_year": 2020, "target_index": 600}, "either a target year or"),
+    ],
+)
+def test_invalid_cost_basis_is_answered_clearly(client, cost_basis, message):
+    response = client.post("/api/estimate", json={**ITEM, **cost_basis})
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
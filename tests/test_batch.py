@@ -0,0 +1,39 @@
+from budgewiser.core.batch import estimate_items
+
+ITEM = {
+    "method": "Hand",
+    "plant_type": "any",
+    "equipment": "Agitators and Mixers",
+    "equipment_type": "Propeller ",
+    "sizing_value": 10,
+}
+
+
+def test_complete_item_is_costed():
+    (result,) = estimate_items([ITEM])
+    assert "error" not in result
+    assert result["purchased_cost"] > 0
+
+
+def test_partial_key_item_is_not_costed():
+    rows = [
+        {"sizing_value": 10},
+        {"equipment": "Pressure Vessels", "sizing_value": 160},
+        {**ITEM, "equipment_type": ""},
+        {**ITEM, "method": None},
+    ]
+    for result in estimate_items(rows):
+        assert "must be selected" in result["error"]
+        assert "purchased_cost" not in result
+
+
+def test_non_finite_size_is_not_costed():
+    rows = [{**ITEM, "sizing_value": value} for value in (1e400, "inf", "nan")]
+    for result in estimate_items(rows):
+        assert "finite positive number" in result["error"]
+        assert "purchased_cost" not in result
+
+
+def test_non_text_units_are_named_in_the_error():
+    (result,) = estimate_items([{**ITEM, "sizing_units": ["kW"]}])
+    assert result["error"] == "Sizing units must be text."
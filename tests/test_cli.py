@@ -0,0 +1,37 @@
+import json
+
+from budgewiser.cli import main
+
+ITEM = {
+    "method": "Hand",
+    "plant_type": "any",
+    "equipment": "Agitators and Mixers",
+    "equipment_type": "Propeller ",
+    "sizing_value": 10,
+}
+
+
+def test_bad_jsonl_lines_become_error_rows(tmp_path):
+    source = tmp_path / "items.jsonl"
+    source.write_text(
+        "\n".join([json.dumps(ITEM), "{not json", "[1]", json.dumps(ITEM)]) + "\n"
+    )
+    target = tmp_path / "costs.jsonl"
+    assert main(["estimate", str(source), "-o", str(target)]) == 0
+    rows = [json.loads(line) for line in target.read_text().splitlines()]
+    assert len(rows) == 4
+    assert rows[0]["purchased_cost"] == rows[3]["purchased_cost"] > 0
+    assert rows[1]["error"].startswith("Invalid JSON")
+    assert rows[2]["error"] == "Every line must be a JSON object."
+
+
+def test_csv_with_byte_order_mark(tmp_path):
+    source = tmp_path / "items.csv"
+    header = ",".join(ITEM)
+    values = ",".join(str(value) for value in ITEM.values())
+    source.write_bytes(f"\ufeff{header}\n{values}\n".encode("utf-8"))
+    target = tmp_path / "costs.jsonl"
+    assert main(["estimate", str(source), "-o", str(target)]) == 0
+    (row,) = [json.loads(line) for line in target.read_text().splitlines()]
+    assert row["method"] == "Hand"
+    assert row["purchased_cost"] > 0
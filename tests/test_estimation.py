@@ -0,0 +1,19 @@
+from budgewiser.catalog import get_catalog
+from budgewiser.project.estimation import recalculate, stale_items
+
+ITEM = {
+    "id": "EQ-001",
+    "method": "Hand",
+    "plant_type": "any",
+    "equipment": "Agitators and Mixers",
+    "equipment_type": "Propeller ",
+    "sizing_value": 10,
+}
+
+
+def test_items_are_stale_against_another_catalog_version():
+    version = get_catalog().version
+    data, costed = recalculate({"equipment_list": [ITEM]})
+    assert costed == 1
+    assert stale_items(data, version) == []
+    assert stale_items(data, f"{version}-changed") == [ITEM]
@@ -0,0 +1,14 @@
+from budgewiser.metrics import _trigger
+
+
+def test_trigger_of_pattern_matching_id_is_its_type():
+    triggers = {
+        _trigger({"changedPropIds": [f'{{"index":{i},"type":"result"}}.n_clicks']})
+        for i in range(3)
+    }
+    assert triggers == {"result"}
+
+
+def test_trigger_of_plain_id():
+    assert _trigger({"changedPropIds": ["save_btn.n_clicks"]}) == "save_btn"
+    assert _trigger({}) == ""
@@ -0,0 +1,33 @@
+import numpy as np
+
+from budgewiser.catalog import get_catalog
+from budgewiser.core import engine, sensitivity
+from budgewiser.core.definitions import Factors
+
+HAND_KEY = ("Hand", "any", "Agitators and Mixers", "Propeller ")
+FACTORIAL_KEY = ("material factors", "solid", "Agitators and Mixers", "Propeller ")
+
+
+def test_hand_item_total_is_its_installed_cost():
+    positions = get_catalog().positions([HAND_KEY])
+    costs = engine.estimate_positions(positions, [10])
+    total = costs["total_fixed_capital_cost"][0]
+    assert total > 0
+    assert np.isclose(total, costs["isbl_cost"][0])
+
+
+def test_case_totals_match_item_totals():
+    positions = get_catalog().positions([HAND_KEY, FACTORIAL_KEY])
+    sizing_values = [10, 20]
+    costs = engine.estimate_positions(positions, sizing_values)
+    results = engine.cost_cases(positions, sizing_values, {Factors.N: np.ones(1)})
+    for key in ("isbl_cost", "total_fixed_capital_cost"):
+        assert np.isclose(results[key][0], costs[key].sum())
+
+
+def test_tornado_ranks_installation_factor_of_hand_item():
+    positions = get_catalog().positions([HAND_KEY])
+    result = sensitivity.tornado(positions, [10], perturbation=0.1)
+    top = result["terms"][0]
+    assert top["term"] == Factors.INSTALLATION_FACTOR
+    assert np.isclose(top["swing"], 0.2 * result["base"]["total_fixed_capital_cost"])